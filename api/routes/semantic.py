@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
 from semantic.engine import SemanticEngine
 from core.database import get_session
 from pydantic import BaseModel
@@ -15,22 +15,31 @@ class EntityInput(BaseModel):
 
 @router.post("/enrich")
 async def enrich_entity(
-    entity: EntityInput,
+    entity: Union[EntityInput, List[EntityInput]],
     session: AsyncSession = Depends(get_session)
 ) -> Dict[str, Any]:
-    """Enrich an entity with semantic intelligence."""
+    """Enrich an entity, or a list of entities in one batch, with semantic intelligence."""
     engine = SemanticEngine(session)
+    if isinstance(entity, list):
+        enriched = await engine.enrich_entities([e.dict() for e in entity])
+        return {"entities": enriched, "total": len(enriched)}
     return await engine.enrich_entity(entity.dict())
 
 @router.post("/learn")
 async def learn_patterns(
-    entities: List[EntityInput],
+    entities: Optional[List[EntityInput]] = None,
+    min_support: float = 0.01,
+    min_confidence: float = 0.8,
     session: AsyncSession = Depends(get_session)
-) -> Dict[str, str]:
-    """Learn semantic patterns from a set of entities."""
+) -> Dict[str, Any]:
+    """Learn semantic patterns from a set of entities, or from the whole graph when no body is sent."""
     engine = SemanticEngine(session)
-    await engine.learn_patterns([e.dict() for e in entities])
-    return {"status": "Patterns learned successfully"}
+    patterns = await engine.learn_patterns(
+        [e.dict() for e in entities] if entities is not None else None,
+        min_support=min_support,
+        min_confidence=min_confidence
+    )
+    return {"status": "Patterns learned successfully", "patterns": patterns, "total": len(patterns)}
 
 @router.get("/patterns/{pattern_type}")
 async def get_patterns(
@@ -122,3 +122,25 @@ JOIN entities e1 ON e1.id = r.from_entity_id
 JOIN entities e2 ON e2.id = r.to_entity_id
 JOIN relation_types rt ON rt.id = r.relation_type
 WHERE rt.semantic_category = 'inheritance';
+
+
+-- ===========================
+-- 7. All Implementations of an Interface Through extends/implements
+-- ===========================
+-- Uses the materialized closure (derived_relations) instead of a recursive
+-- CTE: implementers of the interface, plus anything extending one of them.
+WITH implementers AS (
+    SELECT rc.from_entity_id AS entity_id
+    FROM relation_closure rc
+    WHERE rc.relation_type = (SELECT id FROM relation_types WHERE relation_name = 'implements')
+    AND rc.to_entity_id = (SELECT id FROM entities WHERE name = 'Intercom')
+)
+SELECT e.id, e.name
+FROM entities e
+WHERE e.id IN (SELECT entity_id FROM implementers)
+OR e.id IN (
+    SELECT rc.from_entity_id
+    FROM relation_closure rc
+    JOIN implementers i ON i.entity_id = rc.to_entity_id
+    WHERE rc.relation_type = (SELECT id FROM relation_types WHERE relation_name = 'extends')
+);
@@ -1,15 +1,22 @@
 from fastapi import FastAPI, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, List, Any
+from typing import AsyncIterator, Dict, List, Any, Optional
+import json
 
 from mcp.operations import MCPOperations
-from semantic.operations import SemanticOperations
+from semantic.operations import SemanticOperations, build_relation_indexes
 from semantic.type_system import TypeSystem
-from core.database import get_db_session
+from semantic.graph_index import graph_index
+from core.database import AsyncSessionLocal, get_db_session
 
 app = FastAPI(title="MCP-Compliant Semantic Graph Server")
 
+@app.on_event("startup")
+async def load_relation_indexes() -> None:
+    """Build the relation closure and graph index before serving; writes then only apply increments."""
+    await build_relation_indexes(AsyncSessionLocal)
+
 # Dependency injection
 async def get_semantic_operations(
     db: AsyncSession = Depends(get_db_session),
@@ -23,7 +30,13 @@ async def create_entities(
     request: Dict[str, Any],
     ops: SemanticOperations = Depends(get_semantic_operations)
 ) -> Dict[str, Any]:
-    """Standard MCP entity creation endpoint."""
+    """Standard MCP entity creation endpoint.
+
+    With ``"bulk": true`` the batch is inserted in one transaction and only
+    the created ids are returned, in input order.
+    """
+    if request.get("bulk"):
+        return await ops.bulk_create_entities(request["entities"])
     return await ops.create_entities(request["entities"])
 
 @app.post("/relations")
@@ -31,9 +44,98 @@ async def create_relations(
     request: Dict[str, Any],
     ops: SemanticOperations = Depends(get_semantic_operations)
 ) -> Dict[str, Any]:
-    """Standard MCP relation creation endpoint."""
+    """Standard MCP relation creation endpoint (``"bulk": true`` as for entities)."""
+    if request.get("bulk"):
+        return await ops.bulk_create_relations(request["relations"])
     return await ops.create_relations(request["relations"])
 
+# Streaming MCP read endpoints (NDJSON, one entity or relation record per line)
+async def _ndjson(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for record in records:
+        yield (json.dumps(record) + "\n").encode("utf-8")
+
+@app.get("/read_graph")
+async def read_graph(
+    after_entity_id: int = 0,
+    after_relation_id: int = 0,
+    ops: SemanticOperations = Depends(get_semantic_operations)
+) -> StreamingResponse:
+    """Stream the whole graph; pass the last ids received to resume."""
+    return StreamingResponse(
+        _ndjson(ops.iter_read_graph(after_entity_id, after_relation_id)),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/open_nodes")
+async def open_nodes(
+    request: Dict[str, Any],
+    ops: SemanticOperations = Depends(get_semantic_operations)
+) -> StreamingResponse:
+    """Stream the named entities and the relations between them."""
+    return StreamingResponse(_ndjson(ops.iter_open_nodes(request["names"])), media_type="application/x-ndjson")
+
+@app.post("/search_nodes")
+async def search_nodes(
+    request: Dict[str, Any],
+    ops: SemanticOperations = Depends(get_semantic_operations)
+) -> StreamingResponse:
+    """Stream entities matching a query and the relations between them."""
+    return StreamingResponse(_ndjson(ops.iter_search_nodes(request["query"])), media_type="application/x-ndjson")
+
+@app.post("/search")
+async def search(
+    request: Dict[str, Any],
+    ops: SemanticOperations = Depends(get_semantic_operations)
+) -> Dict[str, Any]:
+    """Full-text search over entity names and observations, ranked by bm25 and optionally graph importance."""
+    results = await ops.search(
+        request["query"],
+        entity_type=request.get("entity_type"),
+        limit=request.get("limit", 20),
+        importance_weight=request.get("importance_weight", 0.0),
+        importance_scope=request.get("importance_scope", "all")
+    )
+    return {"results": results, "total": len(results)}
+
+# In-memory graph traversal endpoints
+@app.get("/graph/neighborhood/{entity_id}")
+async def graph_neighborhood(
+    entity_id: int,
+    k: int = 1,
+    direction: str = "out",
+    category: Optional[str] = None,
+    ops: SemanticOperations = Depends(get_semantic_operations)
+) -> Dict[str, Any]:
+    """Entities within k hops, with their hop counts."""
+    index = await graph_index.refresh(ops.db)
+    hops = index.k_hop(entity_id, k, direction=direction, category=category)
+    return {"nodes": [{"id": node, "hops": hop} for node, hop in hops.items()]}
+
+@app.get("/graph/path")
+async def graph_path(
+    source: int,
+    target: int,
+    direction: str = "out",
+    category: Optional[str] = None,
+    ops: SemanticOperations = Depends(get_semantic_operations)
+) -> Dict[str, Any]:
+    """Fewest-hop path between two entities."""
+    index = await graph_index.refresh(ops.db)
+    return {"path": index.shortest_path(source, target, direction=direction, category=category)}
+
+@app.post("/graph/subgraph")
+async def graph_subgraph(
+    request: Dict[str, Any],
+    ops: SemanticOperations = Depends(get_semantic_operations)
+) -> Dict[str, Any]:
+    """Relations among a set of entity ids."""
+    index = await graph_index.refresh(ops.db)
+    edges = index.subgraph(request["entity_ids"], category=request.get("category"))
+    return {"relations": [
+        {"relation_type": relation_type, "from_entity_id": from_id, "to_entity_id": to_id}
+        for relation_type, from_id, to_id in edges
+    ]}
+
 # Semantic extension endpoints
 @app.post("/semantic/validate")
 async def validate_semantic(
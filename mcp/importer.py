@@ -0,0 +1,270 @@
+"""Streaming importer for MCP memory-server knowledge-graph dumps.
+
+Reads either a ``read_graph`` payload (``{"entities": [...], "relations": [...]}``,
+possibly embedded in surrounding text such as the ``knowledge-graph`` file) or
+the memory server's JSONL export (one ``{"type": "entity" | "relation", ...}``
+object per line). Records are parsed one at a time, so memory use does not
+grow with the size of the dump.
+
+    python -m mcp.importer knowledge-graph --batch-size 5000 --offset 0
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from mcp.operations import MCPOperations
+
+CHUNK_SIZE = 1 << 16
+_GRAPH_START = re.compile(r'\{\s*"(entities|relations)"\s*:')
+_JSONL_START = re.compile(r'\s*\{\s*"type"\s*:')
+# Non-blank characters read before deciding the dump format
+_PREFIX_SIZE = 256
+
+@dataclass
+class ImportStats:
+    offset: int = 0                 # Records consumed, including any skipped on resume
+    entities: int = 0
+    observations: int = 0
+    relations: int = 0
+    skipped_relations: int = 0
+    invalid: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        imported = self.entities + self.relations
+        return imported / self.elapsed if self.elapsed else 0.0
+
+    def report(self) -> str:
+        return (
+            f"offset={self.offset} entities={self.entities} observations={self.observations} "
+            f"relations={self.relations} skipped_relations={self.skipped_relations} "
+            f"invalid={self.invalid} elapsed={self.elapsed:.1f}s "
+            f"rate={self.records_per_second:.0f} records/s"
+        )
+
+class _JSONStream:
+    """Incremental JSON tokenizer over a text stream, decoding one value at a time."""
+
+    def __init__(self, stream: TextIO, buffer: str = ""):
+        self.stream = stream
+        self.buffer = buffer
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == "]":
+                return
+            if separator != ",":
+                raise ValueError(f"Expected ',' or ']', found {separator!r}")
+
+def iter_graph_records(stream: TextIO) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ("entity" | "relation", record) pairs from a dump in either format.
+
+    JSONL lines that are not JSON objects are yielded with a kind of None, so
+    the caller can count them without losing its place in the stream.
+    """
+    # The format is decided from a bounded prefix, never by buffering a whole line
+    head = stream.read(CHUNK_SIZE)
+    while len(head.lstrip()) < _PREFIX_SIZE:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        head += chunk
+    if _JSONL_START.match(head):
+        yield from _iter_jsonl(head, stream)
+        return
+
+    # Skip any text before the read_graph payload
+    match = _GRAPH_START.search(head)
+    while match is None:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("No knowledge-graph payload found")
+        # Keep a tail in case the opening straddles two chunks
+        head = head[-64:] + chunk
+        match = _GRAPH_START.search(head)
+
+    tokens = _JSONStream(stream, head[match.start():])
+    tokens.expect("{")
+    while tokens.peek() not in ("}", ""):
+        key = tokens.value()
+        tokens.expect(":")
+        if key in ("entities", "relations") and tokens.peek() == "[":
+            kind = "entity" if key == "entities" else "relation"
+            for record in tokens.array():
+                yield kind, record
+        else:
+            tokens.value()
+        if tokens.peek() == ",":
+            tokens.pos += 1
+
+def _jsonl_record(line: str) -> Tuple[Optional[str], Any]:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None, line
+    if not isinstance(record, dict):
+        return None, record
+    return record.get("type"), record
+
+def _iter_jsonl(head: str, stream: TextIO) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    pending = head
+    while True:
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if line.strip():
+                yield _jsonl_record(line)
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+    if pending.strip():
+        yield _jsonl_record(pending)
+
+class GraphImporter:
+    """Writes dump records in batches through MCPOperations' bulk path.
+
+    Each batch (entities, their observations and relations) is one
+    transaction, so after a failure the import can be resumed with
+    ``offset`` set to the last reported offset. Relations whose entities or
+    relation type are unknown are skipped and counted, as are malformed
+    records of either kind.
+    """
+
+    def __init__(self, ops: MCPOperations, batch_size: int = 5000,
+                 progress: Optional[TextIO] = sys.stderr):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self.ops = ops
+        self.batch_size = batch_size
+        self.progress = progress
+
+    async def import_stream(self, stream: TextIO, offset: int = 0) -> ImportStats:
+        stats = ImportStats(offset=offset)
+        started = time.monotonic()
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        for position, (kind, record) in enumerate(iter_graph_records(stream)):
+            if position < offset:
+                continue
+            batch.append((kind, record))
+            if len(batch) >= self.batch_size:
+                await self._write_batch(batch, stats)
+                stats.elapsed = time.monotonic() - started
+                self._report(stats)
+                batch = []
+        if batch:
+            await self._write_batch(batch, stats)
+        stats.elapsed = time.monotonic() - started
+        self._report(stats)
+        return stats
+
+    async def import_file(self, path: str, offset: int = 0) -> ImportStats:
+        with open(path, "r", encoding="utf-8") as stream:
+            return await self.import_stream(stream, offset)
+
+    async def _write_batch(self, batch: List[Tuple[str, Dict[str, Any]]], stats: ImportStats) -> None:
+        entities = [record for kind, record in batch if kind == "entity" and isinstance(record, dict)]
+        relations = [record for kind, record in batch if kind == "relation" and isinstance(record, dict)]
+        stats.invalid += len(batch) - len(entities) - len(relations)
+
+        if entities:
+            result = await self.ops.bulk_create_entities(entities, skip_invalid=True, commit=False)
+            stats.invalid += result["invalid"]
+            stats.entities += len(entities) - result["invalid"]
+            stats.observations += sum(
+                len(entity["observations"])
+                for entity, entity_id in zip(entities, result["ids"])
+                if entity_id is not None and "observations" in entity
+            )
+        if relations:
+            result = await self.ops.bulk_create_relations(
+                relations, skip_unknown=True, skip_invalid=True, commit=False
+            )
+            created = sum(1 for relation_id in result["ids"] if relation_id is not None)
+            stats.invalid += result["invalid"]
+            stats.relations += created
+            stats.skipped_relations += len(relations) - created - result["invalid"]
+        await self.ops.db.commit()
+        stats.offset += len(batch)
+
+    def _report(self, stats: ImportStats) -> None:
+        if self.progress is not None:
+            print(stats.report(), file=self.progress, flush=True)
+
+async def _main(args: argparse.Namespace) -> ImportStats:
+    engine = create_async_engine(args.database_url)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            importer = GraphImporter(MCPOperations(session), batch_size=args.batch_size)
+            return await importer.import_file(args.path, offset=args.offset)
+    finally:
+        await engine.dispose()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from core.config import settings
+
+    parser = argparse.ArgumentParser(description="Import an MCP memory-server knowledge-graph dump")
+    parser.add_argument("path", help="read_graph JSON payload or JSONL export")
+    parser.add_argument("--batch-size", type=int, default=5000, help="records per transaction")
+    parser.add_argument("--offset", type=int, default=0, help="records to skip (resume from a reported offset)")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    asyncio.run(_main(parser.parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
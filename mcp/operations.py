@@ -1,7 +1,172 @@
-from typing import Dict, List, Any, Optional
+import json
+import sqlite3
+from typing import AsyncIterator, Dict, List, Any, Optional, Sequence, Set, Tuple
 from fastapi import HTTPException
+from sqlalchemy import bindparam, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+# Bind parameters SQLite accepts per statement (SQLITE_MAX_VARIABLE_NUMBER):
+# 999 before 3.32, 32766 since
+MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+# Rows per multi-row statement, capped further so rows * columns fits MAX_VARIABLES
+BULK_CHUNK_SIZE = 1000
+# Rows per keyset page when streaming the graph
+READ_PAGE_SIZE = 1000
+
+_ENTITY_PAGE = text("""
+    SELECT id, name, entity_type FROM entities
+    WHERE id > :after_id
+    ORDER BY id
+    LIMIT :limit
+""")
+
+_ENTITIES_BY_NAME = text("""
+    SELECT id, name, entity_type FROM entities
+    WHERE name IN :names
+    ORDER BY id
+""").bindparams(bindparam("names", expanding=True))
+
+_SEARCH_PAGE = text("""
+    SELECT e.id, e.name, e.entity_type FROM entities e
+    WHERE e.id > :after_id
+    AND (
+        e.name LIKE :pattern ESCAPE '\\'
+        OR e.entity_type LIKE :pattern ESCAPE '\\'
+        OR EXISTS (
+            SELECT 1 FROM observations o
+            WHERE o.entity_id = e.id AND o.observation LIKE :pattern ESCAPE '\\'
+        )
+    )
+    ORDER BY e.id
+    LIMIT :limit
+""")
+
+_ENTITIES_BY_ID = text("""
+    SELECT id, name, entity_type FROM entities
+    WHERE id IN :entity_ids
+    ORDER BY id
+""").bindparams(bindparam("entity_ids", expanding=True))
+
+_FTS_ENTITY_IDS = text("""
+    SELECT DISTINCT entity_id FROM graph_fts
+    WHERE graph_fts MATCH :query
+""")
+
+# Every LIKE pattern in the JSON array :short_terms (terms too short for the
+# trigram index) occurs in the entity's name, type or observations
+_HAS_SHORT_TERMS = """
+    NOT EXISTS (
+        SELECT 1 FROM json_each(:short_terms) t
+        WHERE NOT (
+            e.name LIKE t.value ESCAPE '\\'
+            OR e.entity_type LIKE t.value ESCAPE '\\'
+            OR EXISTS (
+                SELECT 1 FROM observations o
+                WHERE o.entity_id = e.id AND o.observation LIKE t.value ESCAPE '\\'
+            )
+        )
+    )
+"""
+
+# bm25 weights per graph_fts column: name, observation, entity_type
+_FTS_RANKED = text("""
+    WITH hits AS MATERIALIZED (
+        SELECT entity_id, bm25(graph_fts, 10.0, 1.0, 0.5) AS score
+        FROM graph_fts
+        WHERE graph_fts MATCH :query
+        AND (:entity_type IS NULL OR entity_type = :entity_type)
+    )
+    SELECT e.id, e.name, e.entity_type, MIN(hits.score) AS score
+    FROM hits
+    JOIN entities e ON e.id = hits.entity_id
+    WHERE """ + _HAS_SHORT_TERMS + """
+    GROUP BY e.id
+    ORDER BY score, e.id
+    LIMIT :limit
+""")
+
+# bm25 boosted by graph importance (PageRank percentile from semantic/analytics.py)
+_FTS_RANKED_BY_IMPORTANCE = text("""
+    WITH hits AS MATERIALIZED (
+        SELECT entity_id, bm25(graph_fts, 10.0, 1.0, 0.5) AS score
+        FROM graph_fts
+        WHERE graph_fts MATCH :query
+        AND (:entity_type IS NULL OR entity_type = :entity_type)
+    )
+    SELECT e.id, e.name, e.entity_type,
+           MIN(hits.score) * (1 + :importance_weight * COALESCE(gm.importance, 0)) AS score,
+           gm.importance
+    FROM hits
+    JOIN entities e ON e.id = hits.entity_id
+    LEFT JOIN graph_metrics gm ON gm.entity_id = e.id AND gm.scope = :importance_scope
+    WHERE """ + _HAS_SHORT_TERMS + """
+    GROUP BY e.id
+    ORDER BY score, e.id
+    LIMIT :limit
+""")
+
+# LIKE scan for queries made only of short terms; each term found in the name adds to the score
+_LIKE_RANKED_SELECT = """
+    SELECT e.id, e.name, e.entity_type,
+           -(1 + (SELECT COUNT(*) FROM json_each(:short_terms) t WHERE e.name LIKE t.value ESCAPE '\\'))
+"""
+
+_LIKE_RANKED = text(_LIKE_RANKED_SELECT + """ AS score
+    FROM entities e
+    WHERE (:entity_type IS NULL OR e.entity_type = :entity_type)
+    AND """ + _HAS_SHORT_TERMS + """
+    ORDER BY score, e.id
+    LIMIT :limit
+""")
+
+_LIKE_RANKED_BY_IMPORTANCE = text(_LIKE_RANKED_SELECT + """
+           * (1 + :importance_weight * COALESCE(gm.importance, 0)) AS score
+    FROM entities e
+    LEFT JOIN graph_metrics gm ON gm.entity_id = e.id AND gm.scope = :importance_scope
+    WHERE (:entity_type IS NULL OR e.entity_type = :entity_type)
+    AND """ + _HAS_SHORT_TERMS + """
+    ORDER BY score, e.id
+    LIMIT :limit
+""")
+
+_FTS_SNIPPETS = text("""
+    SELECT entity_id, snippet(graph_fts, -1, :start, :end, '…', 32) AS snippet
+    FROM graph_fts
+    WHERE graph_fts MATCH :query
+    AND entity_id IN :entity_ids
+    ORDER BY rank
+""").bindparams(bindparam("entity_ids", expanding=True))
+
+# The trigram tokenizer cannot match shorter terms
+FTS_MIN_TERM = 3
+
+_OBSERVATIONS = text("""
+    SELECT entity_id, observation FROM observations
+    WHERE entity_id IN :entity_ids
+    ORDER BY entity_id, id
+""").bindparams(bindparam("entity_ids", expanding=True))
+
+_RELATION_SELECT = """
+    SELECT r.id, r.from_entity_id, r.to_entity_id,
+           f.name AS from_name, t.name AS to_name,
+           COALESCE(rt.relation_name, r.relation_type) AS relation_name
+    FROM relations r
+    JOIN entities f ON f.id = r.from_entity_id
+    JOIN entities t ON t.id = r.to_entity_id
+    LEFT JOIN relation_types rt ON rt.id = r.relation_type
+"""
+
+_RELATION_PAGE = text(_RELATION_SELECT + """
+    WHERE r.id > :after_id
+    ORDER BY r.id
+    LIMIT :limit
+""")
+
+_RELATIONS_FROM = text(_RELATION_SELECT + """
+    WHERE r.from_entity_id IN :entity_ids
+    ORDER BY r.id
+""").bindparams(bindparam("entity_ids", expanding=True))
+
 class MCPOperations:
     """Core MCP operations implementation."""
     
@@ -36,4 +201,402 @@ class MCPOperations:
                 
             return {"status": "success", "relations": created_relations}
         except Exception as e:
-            raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def bulk_create_entities(self, entities: List[Dict[str, Any]],
+                                   chunk_size: int = BULK_CHUNK_SIZE,
+                                   skip_invalid: bool = False,
+                                   commit: bool = True) -> Dict[str, Any]:
+        """Bulk MCP entity creation in one transaction.
+
+        Entities are ``{"name", "entityType", "observations"}`` dicts. Existing
+        names are kept as they are (new observations are still added), and the
+        returned ids follow input order, repeating the id for repeated names.
+        With ``skip_invalid``, malformed entities are left out (their id is
+        None, and ``invalid`` counts them) instead of failing the batch.
+        Pass ``commit=False`` to leave the transaction open for the caller.
+        """
+        try:
+            checked = self._validate_entity_batch(entities, skip_invalid)
+            rows = [row for row in checked if row is not None]
+            
+            # The first occurrence of a repeated name decides its type
+            first: Dict[str, str] = {}
+            for name, entity_type, _ in rows:
+                first.setdefault(name, entity_type)
+            unique = list(first.items())
+            for chunk in _chunks(unique, chunk_size, columns=2):
+                await self._insert_rows(
+                    "entities", ("name", "entity_type"), chunk,
+                    on_conflict="ON CONFLICT(name) DO NOTHING"
+                )
+            
+            ids = await self._resolve_entity_ids([name for name, _, _ in rows], chunk_size)
+            observations = [
+                (ids[name], observation)
+                for name, _, entity_observations in rows
+                for observation in entity_observations
+            ]
+            for chunk in _chunks(observations, chunk_size, columns=2):
+                await self._insert_rows(
+                    "observations", ("entity_id", "observation"), chunk,
+                    on_conflict="ON CONFLICT(entity_id, observation) WHERE relation_id IS NULL DO NOTHING"
+                )
+            
+            if commit:
+                await self.db.commit()
+            return {
+                "status": "success",
+                "ids": [ids[row[0]] if row is not None else None for row in checked],
+                "invalid": len(checked) - len(rows)
+            }
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def bulk_create_relations(self, relations: List[Dict[str, Any]],
+                                    chunk_size: int = BULK_CHUNK_SIZE,
+                                    skip_unknown: bool = False,
+                                    skip_invalid: bool = False,
+                                    commit: bool = True) -> Dict[str, Any]:
+        """Bulk MCP relation creation in one transaction.
+
+        Relations are ``{"from", "to", "relationType"}`` dicts naming existing
+        entities and relation types. The whole batch is resolved and validated
+        before anything is written; returned ids follow input order. With
+        ``skip_unknown``, relations naming unknown entities or relation types
+        are left out (their id is None) instead of failing the batch.
+        ``skip_invalid`` and ``commit`` work as for ``bulk_create_entities``.
+        """
+        try:
+            checked = self._validate_relation_batch(relations, skip_invalid)
+            rows = [row for row in checked if row is not None]
+            
+            entity_ids = await self._resolve_entity_ids(
+                [name for from_name, to_name, _ in rows for name in (from_name, to_name)],
+                chunk_size
+            )
+            relation_type_ids = await self._resolve_relation_type_ids({rt for _, _, rt in rows})
+            
+            if not skip_unknown:
+                missing = sorted(
+                    {name for from_name, to_name, _ in rows for name in (from_name, to_name)} - entity_ids.keys()
+                )
+                if missing:
+                    raise ValueError(f"Unknown entities: {', '.join(missing[:10])}")
+                missing = sorted({rt for _, _, rt in rows} - relation_type_ids.keys())
+                if missing:
+                    raise ValueError(f"Unknown relation types: {', '.join(missing)}")
+            
+            keys = [
+                (entity_ids[row[0]], relation_type_ids[row[2]], entity_ids[row[1]])
+                if row is not None and row[0] in entity_ids and row[1] in entity_ids
+                and row[2] in relation_type_ids
+                else None
+                for row in checked
+            ]
+            unique = list(dict.fromkeys(key for key in keys if key is not None))
+            for chunk in _chunks(unique, chunk_size, columns=3):
+                await self._insert_rows(
+                    "relations", ("from_entity_id", "relation_type", "to_entity_id"), chunk,
+                    on_conflict="ON CONFLICT(from_entity_id, relation_type, to_entity_id) DO NOTHING"
+                )
+            
+            ids: Dict[Tuple[int, int, int], int] = {}
+            for chunk in _chunks(unique, chunk_size, columns=3):
+                values, params = _values_clause(chunk)
+                result = await self.db.execute(
+                    text(f"""
+                        SELECT id, from_entity_id, relation_type, to_entity_id FROM relations
+                        WHERE (from_entity_id, relation_type, to_entity_id) IN (VALUES {values})
+                    """),
+                    params
+                )
+                for row in result.fetchall():
+                    ids[(row.from_entity_id, row.relation_type, row.to_entity_id)] = row.id
+            
+            if commit:
+                await self.db.commit()
+            return {
+                "status": "success",
+                "ids": [ids.get(key) for key in keys],
+                "invalid": len(checked) - len(rows)
+            }
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def iter_read_graph(self, after_entity_id: int = 0, after_relation_id: int = 0,
+                              page_size: int = READ_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the whole graph as MCP entity records, then relation records.
+
+        Both tables are read in keyset pages (``id > last id``), so memory use
+        is bounded by the page size. Every record carries its ``id``; passing
+        the last ids seen resumes an interrupted export.
+        """
+        after_id = after_entity_id
+        while True:
+            result = await self.db.execute(_ENTITY_PAGE, {"after_id": after_id, "limit": page_size})
+            rows = result.fetchall()
+            if not rows:
+                break
+            async for record in self._entity_records(rows):
+                yield record
+            after_id = rows[-1].id
+        
+        after_id = after_relation_id
+        while True:
+            result = await self.db.execute(_RELATION_PAGE, {"after_id": after_id, "limit": page_size})
+            rows = result.fetchall()
+            if not rows:
+                break
+            for row in rows:
+                yield _relation_record(row)
+            after_id = rows[-1].id
+
+    async def iter_open_nodes(self, names: List[str],
+                              page_size: int = READ_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the named entities, then the relations between them."""
+        entity_ids: Set[int] = set()
+        for chunk in _chunks(list(dict.fromkeys(names)), page_size):
+            result = await self.db.execute(_ENTITIES_BY_NAME, {"names": chunk})
+            rows = result.fetchall()
+            entity_ids.update(row.id for row in rows)
+            async for record in self._entity_records(rows):
+                yield record
+        
+        async for record in self._relations_among(entity_ids, page_size):
+            yield record
+
+    async def iter_search_nodes(self, query: str,
+                                page_size: int = READ_PAGE_SIZE) -> AsyncIterator[Dict[str, Any]]:
+        """Stream entities whose name, type or observations contain ``query``
+        (case-insensitive), then the relations between them.
+
+        Uses the graph_fts index; queries shorter than a trigram fall back to
+        a LIKE scan.
+        """
+        entity_ids: Set[int] = set()
+        if len(query) >= FTS_MIN_TERM:
+            result = await self.db.execute(_FTS_ENTITY_IDS, {"query": _fts_phrase(query)})
+            matches = sorted(row.entity_id for row in result.fetchall())
+            for chunk in _chunks(matches, page_size):
+                result = await self.db.execute(_ENTITIES_BY_ID, {"entity_ids": chunk})
+                rows = result.fetchall()
+                entity_ids.update(row.id for row in rows)
+                async for record in self._entity_records(rows):
+                    yield record
+        else:
+            params = {"pattern": _like_pattern(query), "limit": page_size, "after_id": 0}
+            while True:
+                result = await self.db.execute(_SEARCH_PAGE, params)
+                rows = result.fetchall()
+                if not rows:
+                    break
+                entity_ids.update(row.id for row in rows)
+                async for record in self._entity_records(rows):
+                    yield record
+                params["after_id"] = rows[-1].id
+        
+        async for record in self._relations_among(entity_ids, page_size):
+            yield record
+
+    async def search(self, query: str, entity_type: Optional[str] = None, limit: int = 20,
+                     snippets: int = 3, highlight: Tuple[str, str] = ("<b>", "</b>"),
+                     importance_weight: float = 0.0, importance_scope: str = "all") -> List[Dict[str, Any]]:
+        """Rank entities by bm25 over their name and observations.
+
+        Every whitespace-separated term must occur (as a case-insensitive
+        substring); name hits weigh more than observation hits. Each result
+        carries up to ``snippets`` highlighted excerpts of the matching text.
+        Terms shorter than a trigram are matched with LIKE instead; a query
+        made only of such terms is ranked by name hits and has no snippets.
+        With ``importance_weight`` set, scores are scaled by
+        ``1 + importance_weight * importance`` using graph_metrics for
+        ``importance_scope``; entities without metrics are not boosted.
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        fts_terms = [term for term in terms if len(term) >= FTS_MIN_TERM]
+        fts_query = " ".join(_fts_phrase(term) for term in fts_terms)
+        short_terms = [_like_pattern(term) for term in terms if len(term) < FTS_MIN_TERM]
+        
+        params = {"query": fts_query, "short_terms": json.dumps(short_terms),
+                  "entity_type": entity_type, "limit": limit}
+        if importance_weight:
+            params.update(importance_weight=importance_weight, importance_scope=importance_scope)
+            statement = _FTS_RANKED_BY_IMPORTANCE if fts_terms else _LIKE_RANKED_BY_IMPORTANCE
+        else:
+            statement = _FTS_RANKED if fts_terms else _LIKE_RANKED
+        result = await self.db.execute(statement, params)
+        ranked = result.fetchall()
+        if not ranked:
+            return []
+        
+        excerpts: Dict[int, List[str]] = {}
+        if snippets and fts_terms:
+            result = await self.db.execute(_FTS_SNIPPETS, {
+                "query": fts_query,
+                "entity_ids": [row.id for row in ranked],
+                "start": highlight[0],
+                "end": highlight[1]
+            })
+            for entity_id, snippet in result.fetchall():
+                entity_excerpts = excerpts.setdefault(entity_id, [])
+                if len(entity_excerpts) < snippets:
+                    entity_excerpts.append(snippet)
+        
+        return [
+            {
+                "id": row.id,
+                "name": row.name,
+                "entityType": row.entity_type,
+                # bm25 is lower-is-better; negate so higher scores rank first
+                "score": -row.score,
+                "snippets": excerpts.get(row.id, [])
+            }
+            for row in ranked
+        ]
+
+    async def _entity_records(self, rows: Sequence[Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Entity records for a page of entity rows, with one grouped observations query."""
+        if not rows:
+            return
+        result = await self.db.execute(_OBSERVATIONS, {"entity_ids": [row.id for row in rows]})
+        observations: Dict[int, List[str]] = {}
+        for entity_id, observation in result.fetchall():
+            observations.setdefault(entity_id, []).append(observation)
+        for row in rows:
+            yield {
+                "type": "entity",
+                "id": row.id,
+                "name": row.name,
+                "entityType": row.entity_type,
+                "observations": observations.get(row.id, [])
+            }
+
+    async def _relations_among(self, entity_ids: Set[int], page_size: int) -> AsyncIterator[Dict[str, Any]]:
+        """Relations with both ends in ``entity_ids``, queried per chunk of sources."""
+        for chunk in _chunks(sorted(entity_ids), page_size):
+            result = await self.db.execute(_RELATIONS_FROM, {"entity_ids": chunk})
+            for row in result.fetchall():
+                if row.to_entity_id in entity_ids:
+                    yield _relation_record(row)
+
+    def _validate_entity_batch(self, entities: List[Dict[str, Any]],
+                               skip_invalid: bool = False) -> List[Optional[Tuple[str, str, List[str]]]]:
+        """Validate every entity up front; returns (name, entity_type, observations) rows.
+
+        With ``skip_invalid`` a malformed entity yields None instead of raising.
+        """
+        rows = []
+        errors = []
+        for index, entity in enumerate(entities):
+            name = entity.get("name")
+            entity_type = entity.get("entityType", entity.get("entity_type"))
+            observations = entity.get("observations", [])
+            if not isinstance(name, str) or not name:
+                errors.append(f"entities[{index}]: name is required")
+            elif not isinstance(entity_type, str) or not entity_type:
+                errors.append(f"entities[{index}]: entityType is required")
+            elif not isinstance(observations, list) or not all(isinstance(o, str) for o in observations):
+                errors.append(f"entities[{index}]: observations must be a list of strings")
+            else:
+                rows.append((name, entity_type, observations))
+                continue
+            if skip_invalid:
+                rows.append(None)
+        if errors and not skip_invalid:
+            raise ValueError("; ".join(errors[:10]))
+        return rows
+
+    def _validate_relation_batch(self, relations: List[Dict[str, Any]],
+                                 skip_invalid: bool = False) -> List[Optional[Tuple[str, str, str]]]:
+        """Validate every relation up front; returns (from, to, relation_type) rows.
+
+        With ``skip_invalid`` a malformed relation yields None instead of raising.
+        """
+        rows = []
+        errors = []
+        for index, relation in enumerate(relations):
+            values = (relation.get("from"), relation.get("to"),
+                      relation.get("relationType", relation.get("relation_type")))
+            if not all(isinstance(value, str) and value for value in values):
+                errors.append(f"relations[{index}]: from, to and relationType are required")
+                if skip_invalid:
+                    rows.append(None)
+            else:
+                rows.append(values)
+        if errors and not skip_invalid:
+            raise ValueError("; ".join(errors[:10]))
+        return rows
+
+    async def _resolve_entity_ids(self, names: List[str], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, int]:
+        """Map entity names to ids, one IN query per chunk of distinct names."""
+        ids = {}
+        for chunk in _chunks(list(dict.fromkeys(names)), chunk_size):
+            values, params = _values_clause([(name,) for name in chunk])
+            result = await self.db.execute(
+                text(f"SELECT id, name FROM entities WHERE name IN (VALUES {values})"),
+                params
+            )
+            ids.update({row.name: row.id for row in result.fetchall()})
+        return ids
+
+    async def _resolve_relation_type_ids(self, names: set) -> Dict[str, int]:
+        if not names:
+            return {}
+        values, params = _values_clause([(name,) for name in names])
+        result = await self.db.execute(
+            text(f"SELECT id, relation_name FROM relation_types WHERE relation_name IN (VALUES {values})"),
+            params
+        )
+        return {row.relation_name: row.id for row in result.fetchall()}
+
+    async def _insert_rows(self, table: str, columns: Sequence[str], rows: List[Tuple],
+                           on_conflict: str = "") -> None:
+        """Insert rows with one multi-row INSERT statement."""
+        if not rows:
+            return
+        values, params = _values_clause(rows)
+        await self.db.execute(
+            text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} {on_conflict}"),
+            params
+        )
+
+def _fts_phrase(value: str) -> str:
+    """Quote text as a single FTS5 phrase."""
+    return '"' + value.replace('"', '""') + '"'
+
+def _like_pattern(value: str) -> str:
+    """Substring LIKE pattern for text, escaped for ``ESCAPE '\\'``."""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _relation_record(row: Any) -> Dict[str, Any]:
+    return {
+        "type": "relation",
+        "id": row.id,
+        "from": row.from_name,
+        "to": row.to_name,
+        "relationType": row.relation_name
+    }
+
+def _values_clause(rows: List[Tuple]) -> Tuple[str, Dict[str, Any]]:
+    """Build ``(:p0_0, :p0_1), (:p1_0, ...)`` placeholders and their parameters."""
+    groups = []
+    params = {}
+    for i, row in enumerate(rows):
+        names = []
+        for j, value in enumerate(row):
+            params[f"p{i}_{j}"] = value
+            names.append(f":p{i}_{j}")
+        groups.append(f"({', '.join(names)})")
+    return ", ".join(groups), params
+
+def _chunks(items: List[Any], size: int, columns: int = 1):
+    """Slices of at most ``size`` items, each binding ``columns`` parameters per item."""
+    size = max(1, min(size, MAX_VARIABLES // columns))
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
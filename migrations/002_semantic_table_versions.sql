@@ -0,0 +1,37 @@
+-- Migration: Semantic Table Versions
+-- Version: 002
+-- Description: Adds version counters used to refresh in-process semantic caches
+
+-- Start transaction
+BEGIN;
+
+-- 1. Create version table
+CREATE TABLE IF NOT EXISTS semantic_table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO semantic_table_versions (table_name, version) VALUES
+('entity_type_hierarchy', 0);
+
+-- 2. Bump the entity_type_hierarchy version on every change
+CREATE TRIGGER IF NOT EXISTS trg_entity_type_hierarchy_version_insert
+AFTER INSERT ON entity_type_hierarchy
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'entity_type_hierarchy';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entity_type_hierarchy_version_update
+AFTER UPDATE ON entity_type_hierarchy
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'entity_type_hierarchy';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entity_type_hierarchy_version_delete
+AFTER DELETE ON entity_type_hierarchy
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'entity_type_hierarchy';
+END;
+
+-- 3. Commit transaction
+COMMIT;
@@ -0,0 +1,51 @@
+-- Migration: Relation Table Versions
+-- Version: 003
+-- Description: Tracks changes to relation_types and valid_type_relations for in-process lookups
+
+-- Start transaction
+BEGIN;
+
+-- 1. Register version counters
+INSERT OR IGNORE INTO semantic_table_versions (table_name, version) VALUES
+('relation_types', 0),
+('valid_type_relations', 0);
+
+-- 2. Bump versions on every change
+CREATE TRIGGER IF NOT EXISTS trg_relation_types_version_insert
+AFTER INSERT ON relation_types
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'relation_types';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relation_types_version_update
+AFTER UPDATE ON relation_types
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'relation_types';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relation_types_version_delete
+AFTER DELETE ON relation_types
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'relation_types';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_type_relations_version_insert
+AFTER INSERT ON valid_type_relations
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'valid_type_relations';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_type_relations_version_update
+AFTER UPDATE ON valid_type_relations
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'valid_type_relations';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_type_relations_version_delete
+AFTER DELETE ON valid_type_relations
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'valid_type_relations';
+END;
+
+-- 3. Commit transaction
+COMMIT;
@@ -0,0 +1,32 @@
+-- Migration: Semantic Rule Versions
+-- Version: 004
+-- Description: Tracks changes to semantic_rules_v1 for the in-process rule registry
+
+-- Start transaction
+BEGIN;
+
+-- 1. Register version counter
+INSERT OR IGNORE INTO semantic_table_versions (table_name, version) VALUES
+('semantic_rules_v1', 0);
+
+-- 2. Bump the version on every change
+CREATE TRIGGER IF NOT EXISTS trg_semantic_rules_v1_version_insert
+AFTER INSERT ON semantic_rules_v1
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'semantic_rules_v1';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_semantic_rules_v1_version_update
+AFTER UPDATE ON semantic_rules_v1
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'semantic_rules_v1';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_semantic_rules_v1_version_delete
+AFTER DELETE ON semantic_rules_v1
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'semantic_rules_v1';
+END;
+
+-- 3. Commit transaction
+COMMIT;
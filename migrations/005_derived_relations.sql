@@ -0,0 +1,68 @@
+-- Migration: Derived Relations
+-- Version: 005
+-- Description: Materialized closure of transitive, symmetric and inverse relations with provenance
+
+-- Start transaction
+BEGIN;
+
+-- 1. Log relation changes for incremental maintenance
+CREATE TABLE IF NOT EXISTS relation_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL CHECK (operation IN ('INSERT', 'DELETE')),
+    relation_type INTEGER NOT NULL,
+    from_entity_id INTEGER NOT NULL,
+    to_entity_id INTEGER NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_relations_changes_insert
+AFTER INSERT ON relations
+BEGIN
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('INSERT', NEW.relation_type, NEW.from_entity_id, NEW.to_entity_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relations_changes_update
+AFTER UPDATE OF relation_type, from_entity_id, to_entity_id ON relations
+BEGIN
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('DELETE', OLD.relation_type, OLD.from_entity_id, OLD.to_entity_id);
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('INSERT', NEW.relation_type, NEW.from_entity_id, NEW.to_entity_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relations_changes_delete
+AFTER DELETE ON relations
+BEGIN
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('DELETE', OLD.relation_type, OLD.from_entity_id, OLD.to_entity_id);
+END;
+
+-- 2. Derived relations with provenance
+CREATE TABLE IF NOT EXISTS derived_relations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_entity_id INTEGER NOT NULL,
+    to_entity_id INTEGER NOT NULL,
+    relation_type INTEGER NOT NULL, -- References relation_types(id)
+    rule TEXT NOT NULL, -- 'transitive', 'symmetric' or 'inverse'
+    premises TEXT NOT NULL, -- JSON list of [relation_type, from_entity_id, to_entity_id]
+    depth INTEGER NOT NULL, -- Derivation steps from asserted relations
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(relation_type, from_entity_id, to_entity_id),
+    FOREIGN KEY (from_entity_id) REFERENCES entities(id),
+    FOREIGN KEY (to_entity_id) REFERENCES entities(id),
+    FOREIGN KEY (relation_type) REFERENCES relation_types(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_derived_relations_to ON derived_relations(relation_type, to_entity_id);
+
+-- 3. Asserted and derived relations together
+CREATE VIEW IF NOT EXISTS relation_closure AS
+SELECT from_entity_id, to_entity_id, relation_type, 'asserted' AS rule, 0 AS depth
+FROM relations
+UNION ALL
+SELECT from_entity_id, to_entity_id, relation_type, rule, depth
+FROM derived_relations;
+
+-- 4. Commit transaction
+COMMIT;
\ No newline at end of file
@@ -0,0 +1,41 @@
+-- Migration: Unique Relations
+-- Version: 006
+-- Description: One row per (from, relation_type, to) so bulk ingestion can use INSERT ... ON CONFLICT
+
+-- Start transaction
+BEGIN;
+
+-- 1. Point observations at the surviving copy of duplicated relations
+UPDATE observations
+SET relation_id = (
+    SELECT MIN(r2.id) FROM relations r1
+    JOIN relations r2 ON r2.from_entity_id = r1.from_entity_id
+    AND r2.relation_type = r1.relation_type
+    AND r2.to_entity_id = r1.to_entity_id
+    WHERE r1.id = observations.relation_id
+)
+WHERE relation_id IN (SELECT id FROM relations);
+
+-- 2. Point semantic properties at the surviving copy as well
+UPDATE semantic_properties_v1
+SET relation_id = (
+    SELECT MIN(r2.id) FROM relations r1
+    JOIN relations r2 ON r2.from_entity_id = r1.from_entity_id
+    AND r2.relation_type = r1.relation_type
+    AND r2.to_entity_id = r1.to_entity_id
+    WHERE r1.id = semantic_properties_v1.relation_id
+)
+WHERE relation_id IN (SELECT id FROM relations);
+
+-- 3. Remove duplicate relations, keeping the oldest
+DELETE FROM relations
+WHERE id NOT IN (
+    SELECT MIN(id) FROM relations
+    GROUP BY from_entity_id, relation_type, to_entity_id
+);
+
+-- 4. Enforce uniqueness
+CREATE UNIQUE INDEX IF NOT EXISTS idx_relations_unique ON relations(from_entity_id, relation_type, to_entity_id);
+
+-- 5. Commit transaction
+COMMIT;
@@ -0,0 +1,74 @@
+-- Migration: Graph Full-Text Search
+-- Version: 007
+-- Description: FTS5 index over entity names and observations, kept in sync by triggers
+
+-- Start transaction
+BEGIN;
+
+-- 1. Index and sync triggers
+CREATE VIRTUAL TABLE IF NOT EXISTS graph_fts USING fts5(
+    name,
+    observation,
+    entity_type,
+    entity_id UNINDEXED,
+    tokenize = 'trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_entities_fts_insert
+AFTER INSERT ON entities
+BEGIN
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    VALUES (-NEW.id, NEW.name, '', NEW.id, NEW.entity_type);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entities_fts_update
+AFTER UPDATE OF name, entity_type ON entities
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = -OLD.id;
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    VALUES (-NEW.id, NEW.name, '', NEW.id, NEW.entity_type);
+    UPDATE graph_fts SET entity_type = NEW.entity_type
+    WHERE rowid IN (SELECT id FROM observations WHERE entity_id = NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entities_fts_delete
+AFTER DELETE ON entities
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = -OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_observations_fts_insert
+AFTER INSERT ON observations
+BEGIN
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    SELECT NEW.id, '', NEW.observation, NEW.entity_id, e.entity_type
+    FROM entities e WHERE e.id = NEW.entity_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_observations_fts_update
+AFTER UPDATE OF observation, entity_id ON observations
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = OLD.id;
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    SELECT NEW.id, '', NEW.observation, NEW.entity_id, e.entity_type
+    FROM entities e WHERE e.id = NEW.entity_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_observations_fts_delete
+AFTER DELETE ON observations
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = OLD.id;
+END;
+
+-- 2. Backfill rows not indexed yet
+INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+SELECT -id, name, '', id, entity_type FROM entities
+WHERE NOT EXISTS (SELECT 1 FROM graph_fts WHERE rowid = -entities.id);
+
+INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+SELECT o.id, '', o.observation, o.entity_id, e.entity_type
+FROM observations o JOIN entities e ON e.id = o.entity_id
+WHERE NOT EXISTS (SELECT 1 FROM graph_fts WHERE rowid = o.id);
+
+-- 3. Commit transaction
+COMMIT;
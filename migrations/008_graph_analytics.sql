@@ -0,0 +1,43 @@
+-- Migration: Graph Analytics
+-- Version: 008
+-- Description: Per-entity PageRank, degree and component metrics with resumable run state
+
+-- Start transaction
+BEGIN;
+
+-- 1. Metrics per entity and scope (a semantic_category, or 'all')
+CREATE TABLE IF NOT EXISTS graph_metrics (
+    entity_id INTEGER NOT NULL,
+    scope TEXT NOT NULL, -- semantic_category the metrics were computed over, or 'all'
+    pagerank REAL NOT NULL,
+    importance REAL NOT NULL, -- PageRank percentile within the scope (0-1)
+    in_degree TEXT NOT NULL, -- JSON {relation_name: count}
+    out_degree TEXT NOT NULL, -- JSON {relation_name: count}
+    component_id INTEGER NOT NULL, -- Smallest entity id in the weakly connected component
+    component_size INTEGER NOT NULL,
+    run_id INTEGER NOT NULL, -- References graph_analytics_runs(id)
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (entity_id, scope),
+    FOREIGN KEY (entity_id) REFERENCES entities(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_graph_metrics_component ON graph_metrics(scope, component_id);
+
+-- 2. Run state, checkpointed so interrupted runs resume
+CREATE TABLE IF NOT EXISTS graph_analytics_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running', -- 'running', 'complete' or 'abandoned'
+    stage TEXT NOT NULL DEFAULT 'pagerank', -- 'pagerank' or 'write'
+    iteration INTEGER NOT NULL DEFAULT 0, -- PageRank iterations done
+    node_count INTEGER NOT NULL,
+    checkpoint BLOB, -- PageRank vector (float64) after the last checkpoint
+    written INTEGER NOT NULL DEFAULT 0, -- Entities (in id order) whose metrics are written
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_graph_analytics_runs_scope ON graph_analytics_runs(scope, status);
+
+-- 3. Commit transaction
+COMMIT;
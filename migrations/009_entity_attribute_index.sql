@@ -0,0 +1,13 @@
+-- Migration: Entity Attribute Covering Index
+-- Version: 009
+-- Description: Covering index for match_rules compiled to SQL (semantic/pattern_sql.py)
+
+-- Start transaction
+BEGIN;
+
+-- 1. Key/value lookups return entity ids straight from the index
+CREATE INDEX IF NOT EXISTS idx_entity_attributes_key_value
+ON entity_attributes(attribute_key, attribute_value, entity_id);
+
+-- 2. Commit transaction
+COMMIT;
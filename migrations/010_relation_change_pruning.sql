@@ -0,0 +1,17 @@
+-- Migration: Relation Change Pruning
+-- Version: 010
+-- Description: Records how far the relation_changes log has been pruned once every consumer applied it
+
+-- Start transaction
+BEGIN;
+
+-- 1. Consumers behind the pruned id rebuild instead of replaying the log (see semantic/relation_changes.py)
+CREATE TABLE IF NOT EXISTS relation_changes_pruned (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    pruned_through INTEGER NOT NULL DEFAULT 0 -- relation_changes ids up to this one are deleted
+);
+
+INSERT OR IGNORE INTO relation_changes_pruned (id, pruned_through) VALUES (1, 0);
+
+-- 2. Commit transaction
+COMMIT;
@@ -0,0 +1,13 @@
+-- Migration: Graph Analytics Fingerprint
+-- Version: 011
+-- Description: Resume graph analytics runs only when the edges, not just the entity count, are unchanged
+
+-- Start transaction
+BEGIN;
+
+-- 1. Edge count and graph digest of each run (runs recorded before this migration never resume)
+ALTER TABLE graph_analytics_runs ADD COLUMN edge_count INTEGER;
+ALTER TABLE graph_analytics_runs ADD COLUMN fingerprint TEXT; -- Digest of entity ids and edges
+
+-- 2. Commit transaction
+COMMIT;
@@ -0,0 +1,22 @@
+-- Migration: Unique Entity Observations
+-- Version: 012
+-- Description: One row per entity observation text so re-imported batches don't duplicate observations
+
+-- Start transaction
+BEGIN;
+
+-- 1. Remove duplicate entity observations, keeping the oldest
+DELETE FROM observations
+WHERE relation_id IS NULL
+AND id NOT IN (
+    SELECT MIN(id) FROM observations
+    WHERE relation_id IS NULL
+    GROUP BY entity_id, observation
+);
+
+-- 2. Enforce uniqueness (relation observations are left as they are)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_observations_unique ON observations(entity_id, observation)
+WHERE relation_id IS NULL;
+
+-- 3. Commit transaction
+COMMIT;
@@ -50,3 +50,65 @@ CREATE INDEX IF NOT EXISTS idx_entities_name ON entities(name);
 CREATE INDEX IF NOT EXISTS idx_observations_entity_id ON observations(entity_id);
 CREATE INDEX IF NOT EXISTS idx_observations_relation_id ON observations(relation_id);
 CREATE INDEX IF NOT EXISTS idx_relations_from_to ON relations(from_entity_id, to_entity_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_relations_unique ON relations(from_entity_id, relation_type, to_entity_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_observations_unique ON observations(entity_id, observation) WHERE relation_id IS NULL;
+
+-- ===========================
+-- Full-Text Search
+-- ===========================
+-- One row per entity name (rowid = -entity id) and per observation
+-- (rowid = observation id), kept in sync by triggers. The trigram tokenizer
+-- makes MATCH a case-insensitive substring search.
+CREATE VIRTUAL TABLE IF NOT EXISTS graph_fts USING fts5(
+    name,
+    observation,
+    entity_type,
+    entity_id UNINDEXED,
+    tokenize = 'trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_entities_fts_insert
+AFTER INSERT ON entities
+BEGIN
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    VALUES (-NEW.id, NEW.name, '', NEW.id, NEW.entity_type);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entities_fts_update
+AFTER UPDATE OF name, entity_type ON entities
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = -OLD.id;
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    VALUES (-NEW.id, NEW.name, '', NEW.id, NEW.entity_type);
+    UPDATE graph_fts SET entity_type = NEW.entity_type
+    WHERE rowid IN (SELECT id FROM observations WHERE entity_id = NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entities_fts_delete
+AFTER DELETE ON entities
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = -OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_observations_fts_insert
+AFTER INSERT ON observations
+BEGIN
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    SELECT NEW.id, '', NEW.observation, NEW.entity_id, e.entity_type
+    FROM entities e WHERE e.id = NEW.entity_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_observations_fts_update
+AFTER UPDATE OF observation, entity_id ON observations
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = OLD.id;
+    INSERT INTO graph_fts (rowid, name, observation, entity_id, entity_type)
+    SELECT NEW.id, '', NEW.observation, NEW.entity_id, e.entity_type
+    FROM entities e WHERE e.id = NEW.entity_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_observations_fts_delete
+AFTER DELETE ON observations
+BEGIN
+    DELETE FROM graph_fts WHERE rowid = OLD.id;
+END;
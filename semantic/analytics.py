@@ -0,0 +1,276 @@
+# analytics.py
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import hashlib
+import json
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+ALL_SCOPE = 'all'
+
+class GraphAnalytics:
+    """Batch PageRank, per-relation-type degree and weakly connected components.
+
+    The graph is every entity plus the relations whose relation type is in
+    ``category`` (all relations when None). Results go to graph_metrics,
+    one row per entity and scope. Progress is checkpointed in
+    graph_analytics_runs (the PageRank vector every ``checkpoint_every``
+    iterations, then the number of entities written), so an interrupted
+    run for the same scope resumes where it stopped, provided the graph
+    (entities and edges, compared by fingerprint) has not changed since.
+    """
+
+    def __init__(self, db: Session, category: Optional[str] = None, damping: float = 0.85,
+                 tolerance: float = 1e-9, max_iterations: int = 100,
+                 checkpoint_every: int = 10, write_batch: int = 5000):
+        self.db = db
+        self.category = category
+        self.scope = category or ALL_SCOPE
+        self.damping = damping
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.checkpoint_every = checkpoint_every
+        self.write_batch = write_batch
+
+    async def run(self) -> Dict[str, Any]:
+        node_ids, sources, targets, types = await self._load_graph()
+        node_count = len(node_ids)
+        run = await self._resume_or_start(node_count, len(sources),
+                                          graph_fingerprint(node_ids, sources, targets, types))
+
+        if run['stage'] == 'pagerank':
+            ranks = await self._pagerank(run, sources, targets, node_count)
+            await self._update_run(run, stage='write', checkpoint=ranks.tobytes())
+        else:
+            ranks = np.frombuffer(run['checkpoint'], dtype=np.float64)
+
+        components = weakly_connected_components(sources, targets, node_count)
+        await self._write_metrics(run, node_ids, ranks, components, sources, targets, types)
+        await self._update_run(run, status='complete', checkpoint=None)
+        await self.db.commit()
+
+        return {
+            'run_id': run['id'],
+            'scope': self.scope,
+            'nodes': node_count,
+            'edges': len(sources),
+            'iterations': run['iteration'],
+            'components': len(np.unique(components)) if node_count else 0
+        }
+
+    async def _load_graph(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Entity ids (sorted) and edges as dense (source, target) indices with their relation types."""
+        result = await self.db.execute(text("SELECT id FROM entities ORDER BY id"))
+        node_ids = np.array([row.id for row in result.fetchall()], dtype=np.int64)
+
+        result = await self.db.execute(
+            text("""
+                SELECT r.from_entity_id, r.to_entity_id, r.relation_type
+                FROM relations r
+                JOIN relation_types rt ON rt.id = r.relation_type
+                WHERE :category IS NULL OR rt.semantic_category = :category
+            """),
+            {'category': self.category}
+        )
+        edges = np.array(result.fetchall(), dtype=np.int64).reshape(-1, 3)
+        sources = np.searchsorted(node_ids, edges[:, 0])
+        targets = np.searchsorted(node_ids, edges[:, 1])
+        # Drop relations whose entities no longer exist
+        valid = (sources < len(node_ids)) & (targets < len(node_ids))
+        valid[valid] &= (node_ids[sources[valid]] == edges[valid, 0]) & (node_ids[targets[valid]] == edges[valid, 1])
+        return node_ids, sources[valid], targets[valid], edges[valid, 2]
+
+    async def _pagerank(self, run: Dict[str, Any], sources: np.ndarray, targets: np.ndarray,
+                        node_count: int) -> np.ndarray:
+        if not node_count:
+            return np.zeros(0, dtype=np.float64)
+        if run['checkpoint'] is not None:
+            ranks = np.frombuffer(run['checkpoint'], dtype=np.float64).copy()
+        else:
+            ranks = np.full(node_count, 1.0 / node_count)
+
+        out_degree = np.bincount(sources, minlength=node_count).astype(np.float64)
+        dangling = out_degree == 0
+        inverse_degree = np.divide(1.0, out_degree, out=np.zeros(node_count), where=~dangling)
+
+        while run['iteration'] < self.max_iterations:
+            # Sparse mat-vec: each edge carries rank / out-degree from source to target
+            flow = np.bincount(targets, weights=ranks[sources] * inverse_degree[sources], minlength=node_count)
+            updated = (1.0 - self.damping) / node_count + self.damping * (flow + ranks[dangling].sum() / node_count)
+            delta = np.abs(updated - ranks).sum()
+            ranks = updated
+            run['iteration'] += 1
+            if delta < self.tolerance:
+                break
+            if run['iteration'] % self.checkpoint_every == 0:
+                await self._update_run(run, checkpoint=ranks.tobytes())
+                await self.db.commit()
+        return ranks
+
+    async def _write_metrics(self, run: Dict[str, Any], node_ids: np.ndarray, ranks: np.ndarray,
+                             components: np.ndarray, sources: np.ndarray, targets: np.ndarray,
+                             types: np.ndarray) -> None:
+        node_count = len(node_ids)
+        names = await self._relation_names()
+        # PageRank percentile, so importance is comparable across scopes
+        importance = np.empty(node_count)
+        importance[np.argsort(ranks, kind='stable')] = np.arange(node_count) / max(node_count - 1, 1)
+        component_sizes = np.bincount(components, minlength=node_count)
+
+        out_degree = _degrees_by_type(sources, types, node_count)
+        in_degree = _degrees_by_type(targets, types, node_count)
+
+        insert = text("""
+            INSERT OR REPLACE INTO graph_metrics (
+                entity_id, scope, pagerank, importance, in_degree, out_degree,
+                component_id, component_size, run_id
+            ) VALUES (
+                :entity_id, :scope, :pagerank, :importance, :in_degree, :out_degree,
+                :component_id, :component_size, :run_id
+            )
+        """)
+        for start in range(run['written'], node_count, self.write_batch):
+            end = min(start + self.write_batch, node_count)
+            rows = [
+                {
+                    'entity_id': int(node_ids[i]),
+                    'scope': self.scope,
+                    'pagerank': float(ranks[i]),
+                    'importance': float(importance[i]),
+                    'in_degree': json.dumps({names.get(t, str(t)): c for t, c in in_degree.get(i, {}).items()}),
+                    'out_degree': json.dumps({names.get(t, str(t)): c for t, c in out_degree.get(i, {}).items()}),
+                    'component_id': int(node_ids[components[i]]),
+                    'component_size': int(component_sizes[components[i]]),
+                    'run_id': run['id']
+                }
+                for i in range(start, end)
+            ]
+            await self.db.execute(insert, rows)
+            run['written'] = end
+            await self._update_run(run)
+            await self.db.commit()
+
+    async def _resume_or_start(self, node_count: int, edge_count: int, fingerprint: str) -> Dict[str, Any]:
+        """The unfinished run for this scope, or a new one if none matches the graph."""
+        result = await self.db.execute(
+            text("""
+                SELECT id, stage, iteration, node_count, edge_count, fingerprint, checkpoint, written
+                FROM graph_analytics_runs
+                WHERE scope = :scope AND status = 'running'
+                ORDER BY id DESC
+                LIMIT 1
+            """),
+            {'scope': self.scope}
+        )
+        row = result.fetchone()
+        matches = row is not None and (row.node_count, row.edge_count, row.fingerprint) == (
+            node_count, edge_count, fingerprint
+        )
+        if matches:
+            return dict(row._mapping)
+        if row is not None:
+            # The graph changed; checkpoints no longer line up
+            await self.db.execute(
+                text("UPDATE graph_analytics_runs SET status = 'abandoned' WHERE id = :id"), {'id': row.id}
+            )
+
+        result = await self.db.execute(
+            text("""
+                INSERT INTO graph_analytics_runs (scope, node_count, edge_count, fingerprint)
+                VALUES (:scope, :node_count, :edge_count, :fingerprint)
+            """),
+            {'scope': self.scope, 'node_count': node_count, 'edge_count': edge_count, 'fingerprint': fingerprint}
+        )
+        await self.db.commit()
+        return {'id': result.lastrowid, 'stage': 'pagerank', 'iteration': 0, 'node_count': node_count,
+                'edge_count': edge_count, 'fingerprint': fingerprint, 'checkpoint': None, 'written': 0}
+
+    async def _update_run(self, run: Dict[str, Any], **changes: Any) -> None:
+        run.update(changes)
+        await self.db.execute(
+            text("""
+                UPDATE graph_analytics_runs
+                SET status = :status, stage = :stage, iteration = :iteration,
+                    checkpoint = :checkpoint, written = :written, updated_at = CURRENT_TIMESTAMP
+                WHERE id = :id
+            """),
+            {
+                'id': run['id'],
+                'status': run.get('status', 'running'),
+                'stage': run['stage'],
+                'iteration': run['iteration'],
+                'checkpoint': run['checkpoint'],
+                'written': run['written']
+            }
+        )
+
+    async def _relation_names(self) -> Dict[int, str]:
+        result = await self.db.execute(text("SELECT id, relation_name FROM relation_types"))
+        return {row.id: row.relation_name for row in result.fetchall()}
+
+def graph_fingerprint(node_ids: np.ndarray, sources: np.ndarray, targets: np.ndarray,
+                      types: np.ndarray) -> str:
+    """Digest of the entity ids and the (source, target, type) edges, independent of edge order."""
+    order = np.lexsort((types, targets, sources))
+    digest = hashlib.blake2b(digest_size=16)
+    for array in (node_ids, sources[order], targets[order], types[order]):
+        digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+def weakly_connected_components(sources: np.ndarray, targets: np.ndarray, node_count: int) -> np.ndarray:
+    """Component label per node: the smallest node index in its weakly connected component.
+
+    Min-label propagation over the edge arrays, with pointer jumping to
+    shortcut long chains.
+    """
+    labels = np.arange(node_count)
+    if not len(sources):
+        return labels
+    while True:
+        previous = labels.copy()
+        edge_min = np.minimum(labels[sources], labels[targets])
+        np.minimum.at(labels, sources, edge_min)
+        np.minimum.at(labels, targets, edge_min)
+        # Pointer jumping: follow labels to their own labels until stable
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+def _degrees_by_type(nodes: np.ndarray, types: np.ndarray, node_count: int) -> Dict[int, Dict[int, int]]:
+    """node -> {relation_type: edge count}, for nodes with at least one edge."""
+    degrees: Dict[int, Dict[int, int]] = {}
+    if not len(nodes):
+        return degrees
+    pairs, counts = np.unique(np.stack([nodes, types], axis=1), axis=0, return_counts=True)
+    for (node, relation_type), count in zip(pairs.tolist(), counts.tolist()):
+        degrees.setdefault(node, {})[relation_type] = count
+    return degrees
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    engine = create_async_engine(args.database_url)
+    try:
+        async with AsyncSession(engine) as session:
+            summary = await GraphAnalytics(session, category=args.category).run()
+            print(json.dumps(summary))
+            return summary
+    finally:
+        await engine.dispose()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from core.config import settings
+
+    parser = argparse.ArgumentParser(description="Compute PageRank, degrees and components into graph_metrics")
+    parser.add_argument("--category", help="restrict to relations of this semantic_category")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    asyncio.run(_main(parser.parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# closure.py
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from collections import defaultdict
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+import json
+from .relation_changes import get_change_watermark, get_pruned_through, read_relation_changes
+from .table_versions import get_table_versions
+
+# (relation_type, from_entity_id, to_entity_id)
+Fact = Tuple[int, int, int]
+
+class Derivation(NamedTuple):
+    rule: str                    # 'transitive', 'symmetric' or 'inverse'
+    premises: Tuple[Fact, ...]
+    depth: int                   # derivation steps from asserted relations
+
+class RelationClosure:
+    """Materialized closure of transitive, symmetric and inverse relations.
+
+    Asserted relations of flagged relation types are held in memory together
+    with every fact derivable from them; each derived fact records the
+    premises it was derived from. Inserts are propagated semi-naively, so
+    only joins involving new facts are evaluated. Deletes use
+    delete-and-rederive: only facts whose recorded derivation depends on a
+    removed relation are retracted and checked for another derivation.
+    Reflexive facts (a, a) are never derived.
+    """
+
+    TABLES = ('relation_types',)
+
+    def __init__(self):
+        self.version: Optional[Tuple[Optional[int], ...]] = None
+        self.watermark: Optional[int] = None
+        # Set when a refresh needed a rebuild it was not allowed to do
+        self.rebuild_pending = False
+        self.transitive: Set[int] = set()
+        self.symmetric: Set[int] = set()
+        self.inverse: Dict[int, int] = {}
+        # Asserted facts mapped to the number of relations rows asserting them
+        self._asserted: Dict[Fact, int] = {}
+        self._derived: Dict[Fact, Derivation] = {}
+        self._dependents: Dict[Fact, Set[Fact]] = defaultdict(set)
+        self._out: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+        self._in: Dict[Tuple[int, int], Set[int]] = defaultdict(set)
+
+    @property
+    def relation_types(self) -> Set[int]:
+        return self.transitive | self.symmetric | set(self.inverse)
+
+    @property
+    def derived(self) -> Dict[Fact, Derivation]:
+        return dict(self._derived)
+
+    def holds(self, fact: Fact) -> bool:
+        return fact in self._asserted or fact in self._derived
+
+    def targets(self, relation_type: int, from_id: int) -> Set[int]:
+        return set(self._out.get((relation_type, from_id), ()))
+
+    def sources(self, relation_type: int, to_id: int) -> Set[int]:
+        return set(self._in.get((relation_type, to_id), ()))
+
+    def configure(self, transitive: Iterable[int] = (), symmetric: Iterable[int] = (),
+                  inverse: Optional[Dict[int, int]] = None) -> None:
+        """Set relation type flags and drop all facts."""
+        self.transitive = set(transitive)
+        self.symmetric = set(symmetric)
+        self.inverse = {}
+        for relation_type, inverse_type in (inverse or {}).items():
+            # Inverses are mutual even when only one side declares it
+            self.inverse[relation_type] = inverse_type
+            self.inverse.setdefault(inverse_type, relation_type)
+        self._asserted.clear()
+        self._derived.clear()
+        self._dependents.clear()
+        self._out.clear()
+        self._in.clear()
+
+    def add_relations(self, facts: Iterable[Fact]) -> Tuple[Dict[Fact, Derivation], Set[Fact]]:
+        """Assert relations; returns derived facts (added, removed)."""
+        relation_types = self.relation_types
+        removed: Set[Fact] = set()
+        delta: List[Fact] = []
+        for fact in facts:
+            if fact[0] not in relation_types:
+                continue
+            count = self._asserted.get(fact, 0)
+            self._asserted[fact] = count + 1
+            if count:
+                continue
+            if fact in self._derived:
+                # Now asserted, so it no longer needs a derivation
+                self._drop_derivation(fact)
+                removed.add(fact)
+            else:
+                self._index(fact)
+                delta.append(fact)
+        return self._propagate(delta), removed
+
+    def remove_relations(self, facts: Iterable[Fact]) -> Tuple[Dict[Fact, Derivation], Set[Fact]]:
+        """Retract relations; returns derived facts (added, removed)."""
+        retracted: List[Fact] = []
+        for fact in facts:
+            count = self._asserted.get(fact, 0)
+            if count > 1:
+                self._asserted[fact] = count - 1
+            elif count == 1:
+                del self._asserted[fact]
+                retracted.append(fact)
+
+        # 1. Retract every derived fact whose recorded derivation depends on a retracted fact
+        retracted_derived: Set[Fact] = set()
+        stack = list(retracted)
+        while stack:
+            premise = stack.pop()
+            for dependent in self._dependents.pop(premise, ()):
+                derivation = self._derived.get(dependent)
+                if derivation is None or premise not in derivation.premises:
+                    continue
+                if dependent not in retracted_derived:
+                    retracted_derived.add(dependent)
+                    stack.append(dependent)
+
+        for fact in retracted:
+            self._unindex(fact)
+        for fact in retracted_derived:
+            self._drop_derivation(fact)
+            self._unindex(fact)
+
+        # 2. Rederive retracted facts that still follow from what is left
+        seeds: List[Fact] = []
+        added: Dict[Fact, Derivation] = {}
+        for fact in [*retracted, *retracted_derived]:
+            if self.holds(fact):
+                continue
+            derivation = self._derivation_of(fact)
+            if derivation is not None:
+                self._record(fact, derivation)
+                added[fact] = derivation
+                seeds.append(fact)
+        added.update(self._propagate(seeds))
+        return added, retracted_derived - added.keys()
+
+    def load(self, facts: Iterable[Fact]) -> Dict[Fact, Derivation]:
+        """Replace all facts with the given asserted relations and derive the closure."""
+        self.configure(self.transitive, self.symmetric, self.inverse)
+        added, _ = self.add_relations(facts)
+        return added
+
+    async def refresh(self, db: Session, rebuild: bool = True) -> "RelationClosure":
+        """Bring derived_relations up to date with relations and relation_types.
+
+        Relation inserts and deletes since the last refresh are read from
+        relation_changes and applied incrementally. A change to relation_types,
+        a first refresh, or changes pruned from the log before they were read
+        rebuild the closure; with ``rebuild=False`` that is left undone and
+        ``rebuild_pending`` is set instead.
+        """
+        versions = await get_table_versions(db, self.TABLES)
+        version = tuple(versions[table] for table in self.TABLES)
+        watermark = await get_change_watermark(db)
+
+        if (self.watermark is None or None in version or version != self.version
+                or self.watermark < await get_pruned_through(db)):
+            if not rebuild:
+                self.rebuild_pending = True
+                return self
+            await self._rebuild(db)
+        elif watermark != self.watermark:
+            added: Dict[Fact, Derivation] = {}
+            removed: Set[Fact] = set()
+            for operation, facts in await read_relation_changes(db, self.watermark, watermark):
+                apply = self.add_relations if operation == 'INSERT' else self.remove_relations
+                run_added, run_removed = apply(facts)
+                for fact in run_removed:
+                    added.pop(fact, None)
+                removed.difference_update(run_added)
+                removed.update(run_removed)
+                added.update(run_added)
+            await self._persist(db, added, removed)
+
+        self.version = version
+        self.watermark = watermark
+        self.rebuild_pending = False
+        return self
+
+    async def _rebuild(self, db: Session) -> None:
+        result = await db.execute(text("SELECT id, inverse_relation, transitive, symmetric FROM relation_types"))
+        transitive, symmetric, inverse = set(), set(), {}
+        for row in result.fetchall():
+            if row.transitive:
+                transitive.add(row.id)
+            if row.symmetric:
+                symmetric.add(row.id)
+            if row.inverse_relation is not None:
+                inverse[row.id] = row.inverse_relation
+        self.configure(transitive, symmetric, inverse)
+
+        facts: List[Fact] = []
+        if self.relation_types:
+            result = await db.execute(
+                text("""
+                    SELECT relation_type, from_entity_id, to_entity_id
+                    FROM relations
+                    WHERE relation_type IN :relation_types
+                """).bindparams(bindparam("relation_types", expanding=True)),
+                {"relation_types": sorted(self.relation_types)}
+            )
+            facts = [tuple(row) for row in result.fetchall()]
+        derived = self.load(facts)
+
+        await db.execute(text("DELETE FROM derived_relations"))
+        await self._persist(db, derived, set())
+
+    async def _persist(self, db: Session, added: Dict[Fact, Derivation], removed: Set[Fact]) -> None:
+        if removed:
+            await db.execute(
+                text("""
+                    DELETE FROM derived_relations
+                    WHERE relation_type = :relation_type
+                    AND from_entity_id = :from_entity_id
+                    AND to_entity_id = :to_entity_id
+                """),
+                [_fact_params(fact) for fact in removed]
+            )
+        if added:
+            await db.execute(
+                text("""
+                    INSERT OR REPLACE INTO derived_relations (
+                        from_entity_id, to_entity_id, relation_type, rule, premises, depth
+                    ) VALUES (
+                        :from_entity_id, :to_entity_id, :relation_type, :rule, :premises, :depth
+                    )
+                """),
+                [
+                    {**_fact_params(fact), "rule": derivation.rule,
+                     "premises": json.dumps([list(p) for p in derivation.premises]),
+                     "depth": derivation.depth}
+                    for fact, derivation in added.items()
+                ]
+            )
+        await db.commit()
+
+    def _propagate(self, delta: List[Fact]) -> Dict[Fact, Derivation]:
+        """Semi-naive fixpoint: join only newly added facts against all facts."""
+        added: Dict[Fact, Derivation] = {}
+        while delta:
+            next_delta = []
+            for fact in delta:
+                for consequence, derivation in self._consequences(fact):
+                    if consequence[1] == consequence[2] or self.holds(consequence):
+                        continue
+                    self._record(consequence, derivation)
+                    added[consequence] = derivation
+                    next_delta.append(consequence)
+            delta = next_delta
+        return added
+
+    def _consequences(self, fact: Fact):
+        relation_type, a, b = fact
+        depth = self._depth(fact) + 1
+        if relation_type in self.symmetric:
+            yield (relation_type, b, a), Derivation('symmetric', (fact,), depth)
+        inverse_type = self.inverse.get(relation_type)
+        if inverse_type is not None:
+            yield (inverse_type, b, a), Derivation('inverse', (fact,), depth)
+        if relation_type in self.transitive:
+            for c in list(self._out.get((relation_type, b), ())):
+                right = (relation_type, b, c)
+                yield (relation_type, a, c), Derivation(
+                    'transitive', (fact, right), max(depth, self._depth(right) + 1)
+                )
+            for z in list(self._in.get((relation_type, a), ())):
+                left = (relation_type, z, a)
+                yield (relation_type, z, b), Derivation(
+                    'transitive', (left, fact), max(depth, self._depth(left) + 1)
+                )
+
+    def _derivation_of(self, fact: Fact) -> Optional[Derivation]:
+        """A one-step derivation of a fact from the facts currently held, if any."""
+        relation_type, a, c = fact
+        if a == c:
+            return None
+        candidates = []
+        flipped = (relation_type, c, a)
+        if relation_type in self.symmetric and self.holds(flipped):
+            candidates.append(Derivation('symmetric', (flipped,), self._depth(flipped) + 1))
+        inverse_type = self.inverse.get(relation_type)
+        if inverse_type is not None and self.holds((inverse_type, c, a)):
+            premise = (inverse_type, c, a)
+            candidates.append(Derivation('inverse', (premise,), self._depth(premise) + 1))
+        if relation_type in self.transitive:
+            for b in self._out.get((relation_type, a), set()) & self._in.get((relation_type, c), set()):
+                left, right = (relation_type, a, b), (relation_type, b, c)
+                candidates.append(Derivation(
+                    'transitive', (left, right), max(self._depth(left), self._depth(right)) + 1
+                ))
+        return min(candidates, key=lambda d: d.depth, default=None)
+
+    def _depth(self, fact: Fact) -> int:
+        derivation = self._derived.get(fact)
+        return 0 if derivation is None else derivation.depth
+
+    def _record(self, fact: Fact, derivation: Derivation) -> None:
+        self._derived[fact] = derivation
+        for premise in derivation.premises:
+            self._dependents[premise].add(fact)
+        self._index(fact)
+
+    def _drop_derivation(self, fact: Fact) -> None:
+        derivation = self._derived.pop(fact)
+        for premise in derivation.premises:
+            dependents = self._dependents.get(premise)
+            if dependents is not None:
+                dependents.discard(fact)
+
+    def _index(self, fact: Fact) -> None:
+        relation_type, a, b = fact
+        self._out[(relation_type, a)].add(b)
+        self._in[(relation_type, b)].add(a)
+
+    def _unindex(self, fact: Fact) -> None:
+        relation_type, a, b = fact
+        self._out[(relation_type, a)].discard(b)
+        self._in[(relation_type, b)].discard(a)
+
+def _fact_params(fact: Fact) -> Dict[str, int]:
+    relation_type, from_entity_id, to_entity_id = fact
+    return {"relation_type": relation_type, "from_entity_id": from_entity_id, "to_entity_id": to_entity_id}
+
+# Shared by inference engines and write paths in this process
+relation_closure = RelationClosure()
@@ -1,11 +1,19 @@
 from typing import Dict, List, Any, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from collections import defaultdict
 import numpy as np
 from .models import SemanticMetadata, SemanticPattern
+from .scoring import PatternMatrix
+from .pattern_sql import compile_match_rules
+from .pattern_mining import PatternLearner, python_type
+from .pattern_stats import pattern_stats
 import datetime
 
+# Entity ids per IN list / multi-row insert, well under SQLite's variable limit
+METADATA_CHUNK_SIZE = 500
+
 class SemanticEngine:
     def _matches_pattern(self, entity: Dict[str, Any], pattern: Dict[str, Any]) -> bool:
         """Check if an entity matches a semantic pattern."""
@@ -23,14 +31,59 @@ class SemanticEngine:
                     return False
             elif rule_type == 'attribute_type':
                 attr_value = entity.get('attributes', {}).get(rule['attribute'])
-                if not isinstance(attr_value, rule['value_type']):
+                if not isinstance(attr_value, python_type(rule['value_type'])):
                     return False
                     
         return True
 
-    async def _get_patterns(self, pattern_type: str) -> List[Dict[str, Any]]:
-        """Retrieve patterns of a specific type from the database."""
+    async def learn_patterns(self, entities: Optional[List[Dict[str, Any]]] = None,
+                             min_support: float = 0.01, min_confidence: float = 0.8) -> List[Dict[str, Any]]:
+        """Mine entity-type patterns from the given entities, or the whole graph when None."""
+        learner = PatternLearner(self.session, min_support=min_support, min_confidence=min_confidence)
+        candidates = await learner.learn(entities)
+        return [candidate._asdict() for candidate in candidates]
+
+    async def find_matching_entities(self, pattern: Dict[str, Any], plan: str = 'auto') -> List[int]:
+        """Ids of entities whose entity_attributes satisfy a pattern's match_rules.
+
+        Same semantics as ``_matches_pattern``, evaluated by the database in one
+        query instead of loading every entity.
+        """
+        query = compile_match_rules(pattern.get('match_rules') or [], plan)
+        if query is None:
+            return []
+        result = await self.session.execute(query)
+        return sorted(row[0] for row in result.fetchall())
+
+    async def score_entities(self, entities: List[Dict[str, Any]], pattern_type: str) -> List[Dict[str, float]]:
+        """Vectorized scoring mode: score a batch of entities against stored attribute patterns."""
+        patterns = [
+            pattern for pattern in await self._get_patterns(pattern_type, active_only=True)
+            if 'attribute_patterns' in pattern['pattern_data']
+        ]
+        matrix = PatternMatrix([
+            (pattern['pattern_data'].get('type', pattern['pattern_type']), pattern['pattern_data'], pattern['confidence'])
+            for pattern in patterns
+        ])
+        scores = matrix.score_matrix(entities)
+        pattern_stats.record_predictions(
+            [pattern['id'] for pattern in patterns], matrix.labels, scores,
+            [entity.get('type') for entity in entities]
+        )
+        await pattern_stats.maybe_flush(self.session)
+        return matrix.label_scores(scores)
+
+    async def _get_patterns(self, pattern_type: str, active_only: bool = False) -> List[Dict[str, Any]]:
+        """Retrieve patterns of a specific type from the database.
+
+        With ``active_only`` (the scoring path), patterns whose decayed success
+        rate fell below ``pattern_stats.prune_below`` are left out.
+        """
         query = select(SemanticPattern).where(SemanticPattern.pattern_type == pattern_type)
+        if active_only:
+            query = query.where(
+                or_(SemanticPattern.success_rate.is_(None), SemanticPattern.success_rate >= pattern_stats.prune_below)
+            )
         result = await self.session.execute(query)
         patterns = result.scalars().all()
         
@@ -79,6 +132,47 @@ class SemanticEngine:
             
         return metadata
 
+    async def _get_metadata_batch(self, entity_ids: List[str]) -> Dict[str, SemanticMetadata]:
+        """Get or create semantic metadata for many entities.
+
+        Existing rows are loaded with one IN query per chunk; missing rows are
+        created with one multi-row upsert per chunk and a single commit.
+        """
+        entity_ids = list(dict.fromkeys(entity_ids))
+        metadata = await self._select_metadata(entity_ids)
+
+        missing = [entity_id for entity_id in entity_ids if entity_id not in metadata]
+        if missing:
+            now = datetime.datetime.utcnow()
+            for start in range(0, len(missing), METADATA_CHUNK_SIZE):
+                chunk = missing[start:start + METADATA_CHUNK_SIZE]
+                # Rows created concurrently since the select are left as they are
+                await self.session.execute(
+                    sqlite_insert(SemanticMetadata)
+                    .values([{'entity_id': entity_id, 'last_updated': now} for entity_id in chunk])
+                    .on_conflict_do_nothing(index_elements=['entity_id'])
+                )
+            await self.session.commit()
+            # The commit expired the rows loaded above, so read the whole batch back
+            metadata = await self._select_metadata(entity_ids)
+
+        return metadata
+
+    async def _select_metadata(self, entity_ids: List[str]) -> Dict[str, SemanticMetadata]:
+        metadata = {}
+        for start in range(0, len(entity_ids), METADATA_CHUNK_SIZE):
+            chunk = entity_ids[start:start + METADATA_CHUNK_SIZE]
+            result = await self.session.execute(
+                select(SemanticMetadata).where(SemanticMetadata.entity_id.in_(chunk))
+            )
+            metadata.update((row.entity_id, row) for row in result.scalars().all())
+        return metadata
+
+    async def enrich_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enhance a batch of entities with their semantic metadata, fetched and created in bulk."""
+        metadata = await self._get_metadata_batch([entity['id'] for entity in entities])
+        return [self._enhance_entity_with_metadata(entity, metadata[entity['id']]) for entity in entities]
+
     def _enhance_entity_with_metadata(self, entity: Dict[str, Any], metadata: SemanticMetadata) -> Dict[str, Any]:
         """Enhance an entity with its semantic metadata."""
         enhanced = entity.copy()
@@ -0,0 +1,313 @@
+# graph_index.py
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from collections import defaultdict
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .relation_changes import Edge, get_change_watermark, get_pruned_through, read_relation_changes
+from .table_versions import get_table_versions
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+class _CSR:
+    """Compressed sparse rows: the edges leaving node n are at indptr[n]:indptr[n + 1]."""
+
+    __slots__ = ('indptr', 'indices', 'types')
+
+    def __init__(self, sources: np.ndarray, targets: np.ndarray, types: np.ndarray, node_count: int):
+        order = np.argsort(sources, kind='stable')
+        self.indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=node_count), out=self.indptr[1:])
+        self.indices = targets[order]
+        self.types = types[order]
+
+    @property
+    def node_count(self) -> int:
+        return len(self.indptr) - 1
+
+    def edges(self, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(source, target, type) arrays for every edge leaving ``nodes``."""
+        nodes = nodes[(nodes >= 0) & (nodes < self.node_count)]
+        starts = self.indptr[nodes]
+        lengths = self.indptr[nodes + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return _EMPTY, _EMPTY, _EMPTY
+        # Position k of the output belongs to node i: starts[i] + (k - edges before i)
+        offsets = np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return np.repeat(nodes, lengths), self.indices[offsets], self.types[offsets]
+
+    def all_edges(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        sources = np.repeat(np.arange(self.node_count, dtype=np.int64), np.diff(self.indptr))
+        return sources, self.indices, self.types
+
+class GraphIndex:
+    """In-memory adjacency over relations, in CSR form both forward and reverse.
+
+    Node ids are entity ids and every edge carries its relation_type, so
+    traversals can be limited to relation types or a semantic_category.
+    Writes since the last build live in a small overlay (added edges by
+    node, removed edges as a set) that traversals merge in; once the
+    overlay outgrows ``compact_ratio`` of the graph the arrays are rebuilt.
+    """
+
+    TABLES = ('relation_types',)
+
+    def __init__(self, compact_ratio: float = 0.05, min_compact: int = 1000):
+        self.version: Optional[Tuple[Optional[int], ...]] = None
+        self.watermark: Optional[int] = None
+        # Set when a refresh needed a full load it was not allowed to do
+        self.rebuild_pending = False
+        self.compact_ratio = compact_ratio
+        self.min_compact = min_compact
+        self.relation_ids: Dict[str, int] = {}
+        self.categories: Dict[int, str] = {}
+        self._forward = _CSR(_EMPTY, _EMPTY, _EMPTY, 0)
+        self._reverse = _CSR(_EMPTY, _EMPTY, _EMPTY, 0)
+        self._added: Set[Edge] = set()
+        self._removed: Set[Edge] = set()
+        # node -> {(neighbour, relation_type)} for added edges, per direction
+        self._added_out: Dict[int, Set[Tuple[int, int]]] = defaultdict(set)
+        self._added_in: Dict[int, Set[Tuple[int, int]]] = defaultdict(set)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._forward.indices) + len(self._added) - len(self._removed)
+
+    def load(self, edges: Iterable[Edge]) -> None:
+        """Replace the graph with the given (relation_type, from, to) edges."""
+        array = np.array(list(edges), dtype=np.int64).reshape(-1, 3)
+        self._build(array[:, 0], array[:, 1], array[:, 2])
+
+    def add_edges(self, edges: Iterable[Edge]) -> None:
+        for edge in edges:
+            if edge in self._removed:
+                self._removed.discard(edge)
+            elif edge not in self._added and not self._in_base(edge):
+                relation_type, from_id, to_id = edge
+                self._added.add(edge)
+                self._added_out[from_id].add((to_id, relation_type))
+                self._added_in[to_id].add((from_id, relation_type))
+        self._maybe_compact()
+
+    def remove_edges(self, edges: Iterable[Edge]) -> None:
+        for edge in edges:
+            if edge in self._added:
+                relation_type, from_id, to_id = edge
+                self._added.discard(edge)
+                self._added_out[from_id].discard((to_id, relation_type))
+                self._added_in[to_id].discard((from_id, relation_type))
+            elif self._in_base(edge):
+                self._removed.add(edge)
+        self._maybe_compact()
+
+    def neighbors(self, node: int, direction: str = 'out',
+                  relation_types: Optional[Iterable[Union[str, int]]] = None,
+                  category: Optional[str] = None) -> np.ndarray:
+        """Sorted distinct neighbours of a node."""
+        allowed = self._allowed_types(relation_types, category)
+        _, targets = self._expand(np.array([node], dtype=np.int64), direction, allowed)
+        return np.unique(targets)
+
+    def k_hop(self, start: int, k: int, direction: str = 'out',
+              relation_types: Optional[Iterable[Union[str, int]]] = None,
+              category: Optional[str] = None) -> Dict[int, int]:
+        """Nodes within ``k`` hops of ``start`` mapped to their hop count (start is 0)."""
+        allowed = self._allowed_types(relation_types, category)
+        hops = {start: 0}
+        visited = np.zeros(self._node_bound(start), dtype=bool)
+        visited[start] = True
+        frontier = np.array([start], dtype=np.int64)
+        for hop in range(1, k + 1):
+            _, targets = self._expand(frontier, direction, allowed)
+            frontier = np.unique(targets[~visited[targets]])
+            if not len(frontier):
+                break
+            hops.update(dict.fromkeys(frontier.tolist(), hop))
+            visited[frontier] = True
+        return hops
+
+    def reachable(self, start: int, category: Optional[str] = None,
+                  relation_types: Optional[Iterable[Union[str, int]]] = None,
+                  direction: str = 'out', max_depth: Optional[int] = None) -> Set[int]:
+        """Nodes reachable from ``start`` over edges of the given category or types."""
+        hops = self.k_hop(start, max_depth if max_depth is not None else self._max_hops(),
+                          direction, relation_types, category)
+        del hops[start]
+        return set(hops)
+
+    def shortest_path(self, source: int, target: int, direction: str = 'out',
+                      relation_types: Optional[Iterable[Union[str, int]]] = None,
+                      category: Optional[str] = None,
+                      max_depth: Optional[int] = None) -> Optional[List[int]]:
+        """Fewest-hop path from ``source`` to ``target`` (BFS), or None."""
+        if source == target:
+            return [source]
+        allowed = self._allowed_types(relation_types, category)
+        parents = {source: source}
+        visited = np.zeros(self._node_bound(source, target), dtype=bool)
+        visited[source] = True
+        frontier = np.array([source], dtype=np.int64)
+        for _ in range(max_depth if max_depth is not None else self._max_hops()):
+            sources, targets = self._expand(frontier, direction, allowed)
+            fresh = ~visited[targets]
+            # First edge reaching each new node becomes its parent
+            frontier, first = np.unique(targets[fresh], return_index=True)
+            if not len(frontier):
+                return None
+            parents.update(zip(frontier.tolist(), sources[fresh][first].tolist()))
+            if target in parents:
+                path = [target]
+                while path[-1] != source:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+            visited[frontier] = True
+        return None
+
+    def subgraph(self, nodes: Iterable[int],
+                 relation_types: Optional[Iterable[Union[str, int]]] = None,
+                 category: Optional[str] = None) -> List[Edge]:
+        """(relation_type, from, to) edges with both ends in ``nodes``."""
+        node_array = np.unique(np.fromiter(nodes, dtype=np.int64))
+        allowed = self._allowed_types(relation_types, category)
+        sources, targets, types = self._expand(node_array, 'out', allowed, with_types=True)
+        inside = np.isin(targets, node_array)
+        return list(zip(types[inside].tolist(), sources[inside].tolist(), targets[inside].tolist()))
+
+    async def refresh(self, db: Session, rebuild: bool = True) -> "GraphIndex":
+        """Apply relation changes logged since the last refresh.
+
+        Everything is loaded from relations the first time, and again when
+        the changes since the last refresh have been pruned from the log;
+        with ``rebuild=False`` that load is left undone and
+        ``rebuild_pending`` is set instead.
+        """
+        versions = await get_table_versions(db, self.TABLES)
+        version = tuple(versions[table] for table in self.TABLES)
+        watermark = await get_change_watermark(db)
+
+        if self.version is None or None in version or version != self.version:
+            result = await db.execute(text("SELECT id, relation_name, semantic_category FROM relation_types"))
+            rows = result.fetchall()
+            self.relation_ids = {row.relation_name: row.id for row in rows}
+            self.categories = {row.id: row.semantic_category for row in rows}
+
+        if self.watermark is None or self.watermark < await get_pruned_through(db):
+            if not rebuild:
+                self.version = version
+                self.rebuild_pending = True
+                return self
+            result = await db.execute(text("SELECT relation_type, from_entity_id, to_entity_id FROM relations"))
+            self.load(tuple(row) for row in result.fetchall())
+        elif watermark != self.watermark:
+            for operation, edges in await read_relation_changes(db, self.watermark, watermark):
+                if operation == 'INSERT':
+                    self.add_edges(edges)
+                else:
+                    self.remove_edges(edges)
+
+        self.version = version
+        self.watermark = watermark
+        self.rebuild_pending = False
+        return self
+
+    def _expand(self, frontier: np.ndarray, direction: str, allowed: Optional[np.ndarray],
+                with_types: bool = False):
+        """Edges leaving ``frontier`` in a direction, merged with the overlay."""
+        if direction == 'both':
+            parts = [self._expand(frontier, d, allowed, with_types) for d in ('out', 'in')]
+            return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+        if direction not in ('out', 'in'):
+            raise ValueError(f"Unknown direction: {direction}")
+
+        forward = direction == 'out'
+        csr = self._forward if forward else self._reverse
+        sources, targets, types = csr.edges(frontier)
+
+        if self._removed and len(sources):
+            # Only edges leaving a node with removed edges need a set lookup
+            touched = np.fromiter({edge[1] if forward else edge[2] for edge in self._removed}, dtype=np.int64)
+            keep = np.ones(len(sources), dtype=bool)
+            for i in np.nonzero(np.isin(sources, touched))[0].tolist():
+                a, b = int(sources[i]), int(targets[i])
+                edge = (int(types[i]), a, b) if forward else (int(types[i]), b, a)
+                keep[i] = edge not in self._removed
+            sources, targets, types = sources[keep], targets[keep], types[keep]
+
+        overlay = self._added_out if forward else self._added_in
+        if self._added:
+            extra = [
+                (node, neighbour, relation_type)
+                for node in frontier.tolist() if node in overlay
+                for neighbour, relation_type in overlay[node]
+            ]
+            if extra:
+                extra_array = np.array(extra, dtype=np.int64)
+                sources = np.concatenate([sources, extra_array[:, 0]])
+                targets = np.concatenate([targets, extra_array[:, 1]])
+                types = np.concatenate([types, extra_array[:, 2]])
+
+        if allowed is not None:
+            mask = np.isin(types, allowed)
+            sources, targets, types = sources[mask], targets[mask], types[mask]
+        return (sources, targets, types) if with_types else (sources, targets)
+
+    def _allowed_types(self, relation_types: Optional[Iterable[Union[str, int]]],
+                       category: Optional[str]) -> Optional[np.ndarray]:
+        if relation_types is None and category is None:
+            return None
+        allowed: Optional[Set[int]] = None
+        if relation_types is not None:
+            allowed = {self.relation_ids.get(t, -1) if isinstance(t, str) else t for t in relation_types}
+        if category is not None:
+            in_category = {type_id for type_id, c in self.categories.items() if c == category}
+            allowed = in_category if allowed is None else allowed & in_category
+        return np.fromiter(allowed, dtype=np.int64)
+
+    def _in_base(self, edge: Edge) -> bool:
+        relation_type, from_id, to_id = edge
+        if not 0 <= from_id < self._forward.node_count:
+            return False
+        start, end = self._forward.indptr[from_id], self._forward.indptr[from_id + 1]
+        return bool(np.any(
+            (self._forward.indices[start:end] == to_id) & (self._forward.types[start:end] == relation_type)
+        ))
+
+    def _node_bound(self, *nodes: int) -> int:
+        """One past the largest node id in the graph (base or overlay) or ``nodes``."""
+        return max(self._forward.node_count, max(self._added_out, default=-1) + 1,
+                   max(self._added_in, default=-1) + 1, max(nodes) + 1)
+
+    def _max_hops(self) -> int:
+        # No shortest path is longer than the number of nodes
+        return max(self._forward.node_count, 1) + len(self._added)
+
+    def _maybe_compact(self) -> None:
+        pending = len(self._added) + len(self._removed)
+        if pending < max(self.min_compact, self.compact_ratio * len(self._forward.indices)):
+            return
+        sources, targets, types = self._forward.all_edges()
+        if self._removed:
+            keep = np.array([
+                (t, s, d) not in self._removed
+                for t, s, d in zip(types.tolist(), sources.tolist(), targets.tolist())
+            ], dtype=bool)
+            sources, targets, types = sources[keep], targets[keep], types[keep]
+        if self._added:
+            added = np.array(list(self._added), dtype=np.int64)
+            types = np.concatenate([types, added[:, 0]])
+            sources = np.concatenate([sources, added[:, 1]])
+            targets = np.concatenate([targets, added[:, 2]])
+        self._build(types, sources, targets)
+
+    def _build(self, types: np.ndarray, sources: np.ndarray, targets: np.ndarray) -> None:
+        node_count = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+        self._forward = _CSR(sources, targets, types, node_count)
+        self._reverse = _CSR(targets, sources, types, node_count)
+        self._added.clear()
+        self._removed.clear()
+        self._added_out.clear()
+        self._added_in.clear()
+
+# Shared by traversal queries and write paths in this process
+graph_index = GraphIndex()
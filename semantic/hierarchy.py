@@ -0,0 +1,100 @@
+# hierarchy.py
+from typing import Dict, Optional, Set, Tuple
+from collections import defaultdict, deque
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .table_versions import get_table_versions
+
+class TypeHierarchy:
+    """In-memory transitive closure of entity_type_hierarchy.
+
+    Each type maps to its ancestors with the length of the shortest path, so
+    an ancestor lookup is a dict probe instead of a recursive CTE. Edge
+    changes only recompute the closure below the changed edge.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._loaded = False
+        self._parents: Dict[str, Set[str]] = defaultdict(set)
+        self._children: Dict[str, Set[str]] = defaultdict(set)
+        self._ancestors: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def edges(self) -> Set[Tuple[str, str]]:
+        return {(parent, child) for child, parents in self._parents.items() for parent in parents}
+
+    def ancestors(self, type_name: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """Ancestors of a type mapped to their distance (direct parents are 1)."""
+        ancestors = self._ancestors.get(type_name, {})
+        if max_depth is None:
+            return dict(ancestors)
+        return {ancestor: depth for ancestor, depth in ancestors.items() if depth <= max_depth}
+
+    def is_a(self, type_name: str, ancestor: str) -> bool:
+        return type_name == ancestor or ancestor in self._ancestors.get(type_name, {})
+
+    def descendants(self, type_name: str) -> Dict[str, int]:
+        """Descendants of a type mapped to their distance."""
+        return self._walk(type_name, self._children)
+
+    def add_edge(self, parent: str, child: str) -> None:
+        if parent in self._parents[child]:
+            return
+        self._parents[child].add(parent)
+        self._children[parent].add(child)
+
+        # Every type at or below child gains parent and parent's ancestors
+        above = {parent: 0, **self._ancestors.get(parent, {})}
+        below = {child: 0, **self.descendants(child)}
+        for descendant, down in below.items():
+            ancestors = self._ancestors.setdefault(descendant, {})
+            for ancestor, up in above.items():
+                if ancestor == descendant:
+                    continue
+                depth = down + 1 + up
+                if depth < ancestors.get(ancestor, depth + 1):
+                    ancestors[ancestor] = depth
+
+    def remove_edge(self, parent: str, child: str) -> None:
+        if parent not in self._parents.get(child, ()):
+            return
+        self._parents[child].discard(parent)
+        self._children[parent].discard(child)
+
+        # Only child and its descendants can lose ancestors
+        for affected in [child, *self.descendants(child)]:
+            self._ancestors[affected] = self._walk(affected, self._parents)
+
+    async def refresh(self, db: Session) -> "TypeHierarchy":
+        """Bring the closure up to date with entity_type_hierarchy if it changed."""
+        version = (await get_table_versions(db, ['entity_type_hierarchy']))['entity_type_hierarchy']
+        if self._loaded and version is not None and version == self.version:
+            return self
+
+        result = await db.execute(text("SELECT parent_type, child_type FROM entity_type_hierarchy"))
+        edges = {(row.parent_type, row.child_type) for row in result.fetchall()}
+
+        current = self.edges
+        for parent, child in current - edges:
+            self.remove_edge(parent, child)
+        for parent, child in edges - current:
+            self.add_edge(parent, child)
+
+        self.version = version
+        self._loaded = True
+        return self
+
+    def _walk(self, start: str, links: Dict[str, Set[str]]) -> Dict[str, int]:
+        distances: Dict[str, int] = {}
+        queue = deque([(start, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            for neighbour in links.get(node, ()):
+                if neighbour != start and neighbour not in distances:
+                    distances[neighbour] = depth + 1
+                    queue.append((neighbour, depth + 1))
+        return distances
+
+# Shared by validators and inference engines in this process
+type_hierarchy = TypeHierarchy()
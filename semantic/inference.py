@@ -1,9 +1,12 @@
 # inference.py
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from collections import defaultdict
 from dataclasses import dataclass
-from sqlalchemy import text
 from sqlalchemy.orm import Session
-import json
+from .hierarchy import TypeHierarchy, type_hierarchy
+from .rule_registry import RuleRegistry, rule_registry
+from .closure import RelationClosure, relation_closure
+from .rete import RuleNetwork, RuleNetworkCache, rule_networks
 
 @dataclass
 class InferenceResult:
@@ -15,8 +18,16 @@ class InferenceResult:
 class SemanticInferenceEngine:
     """Advanced semantic inference engine with pattern matching and confidence scoring."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, hierarchy: Optional[TypeHierarchy] = None,
+                 rules: Optional[RuleRegistry] = None,
+                 networks: Optional[RuleNetworkCache] = None,
+                 closure: Optional[RelationClosure] = None):
         self.db = db
+        self.hierarchy = hierarchy or type_hierarchy
+        self.rules = rules or rule_registry
+        self.networks = networks or rule_networks
+        self.closure = closure or relation_closure
+        self._entity_networks: Dict[Any, RuleNetwork] = {}
         self.confidence_threshold = 0.7  # Minimum confidence for inference
         
     async def infer_relations(
@@ -25,35 +36,102 @@ class SemanticInferenceEngine:
         context: Optional[Dict[str, Any]] = None
     ) -> InferenceResult:
         """Infer semantic relations for an entity using available context."""
+        # 1. Get the rule network for the entity type and match it
+        network = await self._get_rule_network(entity['entity_type'])
+        matched_rules = network.match(entity, context)
+        
+        # 2. Apply matching rules, then validate and deduplicate inferences
+        return await self._apply_matched_rules(matched_rules, entity, context)
+    
+    async def infer_relations_batch(
+        self,
+        entities: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[InferenceResult]:
+        """Infer relations for many entities; results are in input order.
+
+        A relation inferred for several entities is kept only in the result
+        of the first entity processed.
+        """
+        results: List[Optional[InferenceResult]] = [None] * len(entities)
+        async for index, result in self.iter_infer_relations(entities, context):
+            results[index] = result
+        return results
+    
+    async def iter_infer_relations(
+        self,
+        entities: List[Dict[str, Any]],
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[int, InferenceResult]]:
+        """Stream (input index, result) pairs, one entity_type group at a time.
+
+        Rules are refreshed once for the whole batch and matched through one
+        network per entity type; deduplication spans the whole batch.
+        """
+        await self._refresh_rules()
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for index, entity in enumerate(entities):
+            groups[entity['entity_type']].append(index)
+        
+        seen: Set[str] = set()
+        for entity_type, indexes in groups.items():
+            network = self._rule_network(entity_type)
+            for index in indexes:
+                entity = entities[index]
+                matched_rules = network.match(entity, context)
+                yield index, await self._apply_matched_rules(matched_rules, entity, context, seen)
+    
+    async def materialize_relations(self) -> RelationClosure:
+        """Forward-chain transitive, symmetric and inverse relations into derived_relations.
+
+        Only relation changes since the last call are propagated.
+        """
+        return await self.closure.refresh(self.db)
+    
+    async def update_inferences(
+        self,
+        entity: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None
+    ) -> InferenceResult:
+        """Re-infer relations for an entity that changed since its last update.
+
+        The rule network remembers the entity's previous test results, so only
+        tests reading changed properties or context keys are re-evaluated.
+        """
+        network = await self._get_rule_network(entity['entity_type'])
+        previous = self._entity_networks.get(entity['id'])
+        if previous is not None and previous is not network:
+            previous.forget(entity['id'])
+        self._entity_networks[entity['id']] = network
+        
+        matched_rules = network.update(entity['id'], entity, context)
+        return await self._apply_matched_rules(matched_rules, entity, context)
+    
+    async def _apply_matched_rules(self,
+        matched_rules: List[Dict[str, Any]],
+        entity: Dict[str, Any],
+        context: Optional[Dict[str, Any]] = None,
+        seen: Optional[Set[str]] = None
+    ) -> InferenceResult:
+        """Apply matched rules to an entity and validate the combined inferences."""
         inferred = []
         confidence_scores = {}
         evidence = {}
         inference_path = []
         
-        # 1. Get applicable inference rules
-        rules = await self._get_inference_rules(entity['entity_type'])
-        
-        # 2. Apply each rule and collect results
-        for rule in rules:
-            pattern = json.loads(rule['pattern'])
-            if self._matches_inference_pattern(entity, pattern, context):
-                inference_result = await self._apply_inference_rule(
-                    rule,
-                    entity,
-                    context
-                )
-                
-                if inference_result:
-                    inferred.extend(inference_result.inferred_relations)
-                    confidence_scores.update(inference_result.confidence_scores)
-                    evidence.update(inference_result.supporting_evidence)
-                    inference_path.extend(inference_result.inference_path)
-        
-        # 3. Validate and deduplicate inferences
+        for rule in matched_rules:
+            inference_result = await self._apply_inference_rule(rule, entity, context)
+            if inference_result:
+                inferred.extend(inference_result.inferred_relations)
+                confidence_scores.update(inference_result.confidence_scores)
+                evidence.update(inference_result.supporting_evidence)
+                inference_path.extend(inference_result.inference_path)
+        
         final_inferences = await self._validate_and_deduplicate(
             inferred,
             confidence_scores,
-            evidence
+            evidence,
+            seen
         )
         
         return InferenceResult(
@@ -63,85 +141,30 @@ class SemanticInferenceEngine:
             inference_path=inference_path
         )
     
+    async def _get_rule_network(self, entity_type: str) -> RuleNetwork:
+        """Get the (cached) discrimination network over the rules for an entity type."""
+        await self._refresh_rules()
+        return self._rule_network(entity_type)
+    
+    async def _refresh_rules(self) -> None:
+        await self.hierarchy.refresh(self.db)
+        await self.rules.refresh(self.db)
+    
+    def _rule_network(self, entity_type: str) -> RuleNetwork:
+        rules = self._rules_for_type(entity_type)
+        key = None
+        if self.rules.version is not None and self.hierarchy.version is not None:
+            key = (self.rules.version, self.hierarchy.version, entity_type)
+        return self.networks.get(key, rules)
+    
     async def _get_inference_rules(self, entity_type: str) -> List[Dict[str, Any]]:
         """Get applicable inference rules for an entity type."""
-        query = text("""
-        WITH RECURSIVE type_hierarchy AS (
-            -- Base case: direct type
-            SELECT parent_type, child_type, 1 as depth
-            FROM entity_type_hierarchy
-            WHERE child_type = :entity_type
-            
-            UNION ALL
-            
-            -- Recursive case: traverse up the hierarchy
-            SELECT h.parent_type, h.child_type, th.depth + 1
-            FROM entity_type_hierarchy h
-            JOIN type_hierarchy th ON h.child_type = th.parent_type
-            WHERE th.depth < 5  -- Limit recursion depth
-        )
-        SELECT DISTINCT r.*
-        FROM semantic_rules r
-        JOIN type_hierarchy th ON json_extract(r.pattern, '$.target_type') = th.parent_type
-        ORDER BY r.priority DESC
-        """)
-        
-        result = await self.db.execute(query, {'entity_type': entity_type})
-        return result.fetchall()
-    
-    def _matches_inference_pattern(self, 
-        entity: Dict[str, Any],
-        pattern: Dict[str, Any],
-        context: Optional[Dict[str, Any]] = None
-    ) -> bool:
-        """Check if an entity matches an inference pattern."""
-        # Check basic type matching
-        if 'type' in pattern and pattern['type'] != entity.get('entity_type'):
-            return False
-            
-        # Check property constraints
-        if 'properties' in pattern:
-            for prop, constraint in pattern['properties'].items():
-                if not self._check_property_constraint(entity, prop, constraint):
-                    return False
-                    
-        # Check contextual constraints
-        if context and 'context' in pattern:
-            for ctx_key, ctx_pattern in pattern['context'].items():
-                if not self._check_context_constraint(context, ctx_key, ctx_pattern):
-                    return False
-                    
-        return True
+        await self._refresh_rules()
+        return self._rules_for_type(entity_type)
     
-    def _check_property_constraint(self,
-        entity: Dict[str, Any],
-        property_name: str,
-        constraint: Any
-    ) -> bool:
-        """Check if an entity property satisfies a constraint."""
-        if property_name not in entity:
-            return False
-            
-        value = entity[property_name]
-        
-        if isinstance(constraint, dict):
-            operator = constraint.get('operator', '==')
-            target = constraint.get('value')
-            
-            if operator == '==':
-                return value == target
-            elif operator == '!=':
-                return value != target
-            elif operator == '>':
-                return value > target
-            elif operator == '<':
-                return value < target
-            elif operator == 'in':
-                return value in target
-            elif operator == 'contains':
-                return target in value
-        else:
-            return value == constraint
+    def _rules_for_type(self, entity_type: str) -> List[Dict[str, Any]]:
+        ancestor_types = list(self.hierarchy.ancestors(entity_type, max_depth=5))
+        return self.rules.for_target_types(ancestor_types)
     
     async def _apply_inference_rule(self,
         rule: Dict[str, Any],
@@ -149,7 +172,7 @@ class SemanticInferenceEngine:
         context: Optional[Dict[str, Any]] = None
     ) -> Optional[InferenceResult]:
         """Apply an inference rule to generate new relations."""
-        actions = json.loads(rule['actions'])
+        actions = rule['actions']
         inferred_relations = []
         confidence_scores = {}
         evidence = {}
@@ -228,11 +251,15 @@ class SemanticInferenceEngine:
     async def _validate_and_deduplicate(self,
         inferred: List[Dict[str, Any]],
         confidence_scores: Dict[str, float],
-        evidence: Dict[str, List[str]]
+        evidence: Dict[str, List[str]],
+        seen: Optional[Set[str]] = None
     ) -> List[Dict[str, Any]]:
-        """Validate and deduplicate inferred relations."""
+        """Validate and deduplicate inferred relations.
+
+        Pass the same ``seen`` set across calls to deduplicate over a batch.
+        """
         validated = []
-        seen = set()
+        seen = set() if seen is None else seen
         
         for relation in inferred:
             relation_id = f"{relation['from_id']}-{relation['type']}-{relation['to_id']}"
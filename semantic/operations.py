@@ -1,3 +1,13 @@
+import asyncio
+from typing import Callable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from .closure import relation_closure
+from .graph_index import graph_index
+from .relation_changes import prune_relation_changes
+
+# Background rebuild of the relation indexes scheduled by a write, if any
+_rebuild_task: Optional[asyncio.Task] = None
+
 class SemanticOperations(MCPOperations):
     """Semantic layer extending core MCP operations."""
     
@@ -6,20 +16,62 @@ class SemanticOperations(MCPOperations):
         self.type_system = type_system
 
     async def create_entities(self, entities: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Enhanced entity creation with semantic validation."""
+        """Enhanced entity creation with semantic validation.
+
+        The created entities are enhanced in one batch (one lookup per type)
+        before the result is returned.
+        """
         # First perform core MCP operation
         result = await super().create_entities(entities)
         
         # Then enhance with semantic information (non-blocking)
         try:
-            for entity in result["entities"]:
-                await self.type_system.enhance_entity(entity)
+            await self.type_system.enhance_entities(result["entities"])
         except Exception as e:
             # Log but don't block operation
             logger.warning(f"Semantic enhancement failed: {e}")
             
         return result
 
+    async def create_relations(self, relations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Relation creation that keeps the relation closure and graph index current."""
+        result = await super().create_relations(relations)
+        await self._refresh_relation_indexes()
+        return result
+
+    async def bulk_create_relations(self, relations: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """Bulk relation creation that keeps the relation closure and graph index current."""
+        result = await super().bulk_create_relations(relations, **kwargs)
+        await self._refresh_relation_indexes()
+        return result
+
+    async def _refresh_relation_indexes(self) -> None:
+        """Propagate new relations into the closure and graph index (non-blocking).
+
+        Only increments are applied here; the indexes are built at startup
+        (``build_relation_indexes``), and a rebuild they need later runs in a
+        background task on its own session. Once both indexes have applied
+        them, the consumed relation_changes rows are pruned.
+        """
+        global _rebuild_task
+        indexes = (relation_closure, graph_index)
+        for index in indexes:
+            try:
+                await index.refresh(self.db, rebuild=False)
+            except Exception as e:
+                logger.warning(f"{type(index).__name__} update failed: {e}")
+        if any(index.rebuild_pending for index in indexes) and (_rebuild_task is None or _rebuild_task.done()):
+            bind = self.db.bind
+            _rebuild_task = asyncio.create_task(build_relation_indexes(lambda: AsyncSession(bind)))
+            _rebuild_task.add_done_callback(_log_rebuild_failure)
+        watermarks = [index.watermark for index in indexes]
+        if None in watermarks:
+            return
+        try:
+            await prune_relation_changes(self.db, min(watermarks))
+        except Exception as e:
+            logger.warning(f"relation_changes pruning failed: {e}")
+
     async def semantic_validate_entity(self, entity: Dict[str, Any]) -> Dict[str, Any]:
         """Additional semantic validation (non-blocking)."""
         try:
@@ -34,4 +86,14 @@ class SemanticOperations(MCPOperations):
                 "valid": True,  # Non-blocking
                 "warnings": [str(e)],
                 "suggestions": []
-            }
\ No newline at end of file
+            }
+
+async def build_relation_indexes(session_factory: Callable[[], AsyncSession]) -> None:
+    """Load or rebuild the relation closure and graph index, each on a session of its own."""
+    for index in (relation_closure, graph_index):
+        async with session_factory() as session:
+            await index.refresh(session)
+
+def _log_rebuild_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Relation index rebuild failed: {task.exception()}")
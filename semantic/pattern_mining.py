@@ -0,0 +1,316 @@
+# pattern_mining.py
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import math
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .pattern_stats import pattern_stats
+
+# Items are ('type', entity_type), ('attr', key) or ('class', key, value_class)
+Item = Tuple[str, ...]
+Itemset = Tuple[Item, ...]
+
+_ENTITY_PAGE = text("""
+    WITH page AS (
+        SELECT id, entity_type FROM entities
+        WHERE id > :after_id
+        ORDER BY id
+        LIMIT :limit
+    )
+    SELECT page.id, page.entity_type, a.attribute_key, a.attribute_value
+    FROM page
+    LEFT JOIN entity_attributes a ON a.entity_id = page.id
+    ORDER BY page.id
+""")
+
+# Relearning keeps a live pattern's success history but revives a pruned one
+_UPSERT_PATTERN = text("""
+    INSERT INTO semantic_patterns (id, pattern_type, pattern_data, confidence, examples, success_rate)
+    VALUES (:id, :pattern_type, :pattern_data, :confidence, :examples, 1.0)
+    ON CONFLICT(id) DO UPDATE SET
+        pattern_data = excluded.pattern_data,
+        confidence = excluded.confidence,
+        examples = excluded.examples,
+        success_rate = CASE WHEN success_rate < :prune_below THEN excluded.success_rate ELSE success_rate END
+""")
+
+def value_class(value: Any) -> str:
+    """Python type name of an attribute value, as attribute_type rules name it."""
+    if isinstance(value, tuple):
+        return 'list'
+    return type(value).__name__
+
+# Types each value class name accepts under isinstance ('list' also covers tuples, see value_class)
+VALUE_TYPES: Dict[str, Any] = {
+    'str': str, 'int': int, 'float': float, 'bool': bool, 'list': (list, tuple),
+    'tuple': tuple, 'dict': dict, 'NoneType': type(None),
+}
+
+def python_type(value_type: Any) -> Any:
+    """isinstance() argument for an attribute_type rule's value_type.
+
+    Mined rules name a value class ('int', 'list', ...); types and tuples of
+    either are accepted as well.
+    """
+    if isinstance(value_type, tuple):
+        return tuple(python_type(member) for member in value_type)
+    if isinstance(value_type, str):
+        if value_type not in VALUE_TYPES:
+            raise ValueError(f"Unknown value class {value_type!r}")
+        return VALUE_TYPES[value_type]
+    return value_type
+
+def stored_value_class(stored: Optional[str]) -> str:
+    """Value class of an entity_attributes value; non-string values are stored JSON-encoded."""
+    if stored is None:
+        return 'NoneType'
+    try:
+        return value_class(json.loads(stored))
+    except ValueError:
+        return 'str'
+
+def entity_items(entity_type: Optional[str], attributes: Iterable[Tuple[str, str]]) -> List[Item]:
+    """Transaction for one entity from its type and (attribute key, value class) pairs."""
+    items: List[Item] = [('type', entity_type)] if entity_type else []
+    for key, cls in attributes:
+        items.append(('attr', key))
+        items.append(('class', key, cls))
+    return items
+
+class PatternCandidate(NamedTuple):
+    entity_type: str
+    antecedent: Itemset          # attribute items implying the type
+    count: int                   # entities with the type and every antecedent item (lower bound)
+    support: float
+    confidence: float            # P(type | antecedent)
+
+class FrequentItemsetMiner:
+    """Approximate frequent itemsets over a stream of transactions in bounded memory.
+
+    Lossy Counting (Manku & Motwani): transactions are processed in buckets
+    of ``ceil(1 / error)``; after each bucket, itemsets whose count plus
+    maximum undercount (``delta``) does not exceed the bucket number are
+    dropped. An itemset of two or more items starts being counted only
+    while every subset one item smaller is tracked and frequent in the
+    stream so far, Apriori-style, so combinations of rare items are never
+    materialized. A late starter's delta is bounded by its subsets' counts
+    plus deltas, so counts are lower bounds short by at most ``delta``.
+    """
+
+    def __init__(self, min_support: float = 0.01, error: Optional[float] = None, max_size: int = 3):
+        if not 0 < min_support <= 1:
+            raise ValueError("min_support must be in (0, 1]")
+        self.min_support = min_support
+        self.error = error if error is not None else min_support / 10
+        if not 0 < self.error < min_support:
+            raise ValueError("error must be in (0, min_support)")
+        self.max_size = max_size
+        self.bucket_width = math.ceil(1 / self.error)
+        self.transactions = 0
+        # itemset -> [count, delta]
+        self._counts: Dict[Itemset, List[int]] = {}
+
+    @property
+    def bucket(self) -> int:
+        return self.transactions // self.bucket_width + 1
+
+    @property
+    def tracked(self) -> int:
+        return len(self._counts)
+
+    def add(self, items: Iterable[Item]) -> None:
+        bucket = self.bucket
+        threshold = (self.min_support - self.error) * self.transactions
+        items = sorted(set(items))
+        counts = self._counts
+
+        level: List[Itemset] = []
+        frequent = set()
+        for item in items:
+            itemset = (item,)
+            entry = counts.get(itemset)
+            if entry is None:
+                entry = counts[itemset] = [1, bucket - 1]
+            else:
+                entry[0] += 1
+            if entry[0] >= threshold:
+                frequent.add(item)
+            level.append(itemset)
+
+        for _ in range(1, self.max_size):
+            next_level = []
+            for prefix in level:
+                keys = {_item_key(item) for item in prefix}
+                for item in items:
+                    if item <= prefix[-1] or _item_key(item) in keys:
+                        continue
+                    itemset = prefix + (item,)
+                    entry = counts.get(itemset)
+                    if entry is not None:
+                        entry[0] += 1
+                        next_level.append(itemset)
+                    elif item in frequent:
+                        delta = self._start_delta(itemset, threshold)
+                        if delta is not None:
+                            counts[itemset] = [1, delta]
+                            next_level.append(itemset)
+            level = next_level
+
+        self.transactions += 1
+        if self.transactions % self.bucket_width == 0:
+            self._prune(bucket)
+
+    def frequent(self) -> Dict[Itemset, int]:
+        """Itemsets with count >= (min_support - error) * transactions."""
+        threshold = (self.min_support - self.error) * self.transactions
+        return {itemset: entry[0] for itemset, entry in self._counts.items() if entry[0] >= threshold}
+
+    def candidates(self, min_confidence: float = 0.8) -> List[PatternCandidate]:
+        """Rules antecedent -> entity type from frequent itemsets containing one type item.
+
+        Redundant rules are dropped: those whose confidence a rule with a
+        smaller antecedent already reaches, and those requiring a value
+        class where the bare attribute covers exactly the same entities.
+        """
+        frequent = self.frequent()
+        rules: Dict[Tuple[str, Itemset], Tuple[int, float]] = {}
+        for itemset, count in frequent.items():
+            types = [item for item in itemset if item[0] == 'type']
+            if len(types) != 1 or len(itemset) < 2:
+                continue
+            antecedent = tuple(item for item in itemset if item[0] != 'type')
+            antecedent_count = frequent.get(antecedent)
+            if antecedent_count:
+                rules[(types[0][1], antecedent)] = (count, min(count / antecedent_count, 1.0))
+
+        candidates = []
+        for (entity_type, antecedent), (count, confidence) in rules.items():
+            if confidence < min_confidence or self._redundant_rule(rules, entity_type, antecedent, count, confidence):
+                continue
+            candidates.append(PatternCandidate(
+                entity_type, antecedent, count, count / self.transactions, confidence
+            ))
+        candidates.sort(key=lambda c: (-c.confidence, -c.support, c.entity_type, c.antecedent))
+        return candidates
+
+    @staticmethod
+    def _redundant_rule(rules: Dict[Tuple[str, Itemset], Tuple[int, float]], entity_type: str,
+                        antecedent: Itemset, count: int, confidence: float) -> bool:
+        for i, item in enumerate(antecedent):
+            if len(antecedent) > 1:
+                smaller = rules.get((entity_type, antecedent[:i] + antecedent[i + 1:]))
+                if smaller is not None and smaller[1] >= confidence:
+                    return True
+            if item[0] == 'class':
+                general = tuple(sorted(antecedent[:i] + (('attr', item[1]),) + antecedent[i + 1:]))
+                if rules.get((entity_type, general), (None,))[0] == count:
+                    return True
+        return False
+
+    def _start_delta(self, itemset: Itemset, threshold: float) -> Optional[int]:
+        """Max prior occurrences of an untracked itemset, or None while a subset is not frequent."""
+        delta = None
+        for i in range(len(itemset)):
+            entry = self._counts.get(itemset[:i] + itemset[i + 1:])
+            if entry is None or entry[0] < threshold:
+                return None
+            # The subset's count already includes this transaction
+            bound = entry[0] + entry[1] - 1
+            delta = bound if delta is None else min(delta, bound)
+        return delta
+
+    def _prune(self, bucket: int) -> None:
+        self._counts = {
+            itemset: entry for itemset, entry in self._counts.items() if entry[0] + entry[1] > bucket
+        }
+
+def _item_key(item: Item) -> Item:
+    """Items sharing a key never co-occur usefully: ('attr', k) is implied by
+    ('class', k, c), and a transaction has a single type."""
+    return ('type',) if item[0] == 'type' else ('attr', item[1])
+
+class PatternLearner:
+    """Learns entity-type patterns from the graph (or given entities) and stores them.
+
+    Each candidate becomes a ``semantic_patterns`` row of pattern_type
+    'entity_type' whose pattern_data carries ``match_rules`` (see
+    semantic/pattern_sql.py) and ``attribute_patterns`` (see
+    semantic/scoring.py) for the antecedent, plus its support and count.
+    Row ids are derived from the rule, so relearning updates rows in place.
+    """
+
+    PATTERN_TYPE = 'entity_type'
+
+    def __init__(self, db: Session, min_support: float = 0.01, min_confidence: float = 0.8,
+                 max_size: int = 3, page_size: int = 5000):
+        self.db = db
+        self.miner = FrequentItemsetMiner(min_support=min_support, max_size=max_size)
+        self.min_confidence = min_confidence
+        self.page_size = page_size
+
+    async def learn(self, entities: Optional[Iterable[Dict[str, Any]]] = None) -> List[PatternCandidate]:
+        """Mine the given entity dicts, or every entity in the graph when None, and store the patterns."""
+        if entities is None:
+            async for items in self._graph_transactions():
+                self.miner.add(items)
+        else:
+            for entity in entities:
+                attributes = entity.get('attributes', {})
+                self.miner.add(entity_items(
+                    entity.get('type'), ((key, value_class(value)) for key, value in attributes.items())
+                ))
+
+        candidates = self.miner.candidates(self.min_confidence)
+        if candidates:
+            await self.db.execute(_UPSERT_PATTERN, [self._pattern_row(c) for c in candidates])
+            await self.db.commit()
+        return candidates
+
+    async def _graph_transactions(self) -> AsyncIterator[List[Item]]:
+        after_id = 0
+        while True:
+            result = await self.db.execute(_ENTITY_PAGE, {"after_id": after_id, "limit": self.page_size})
+            rows = result.fetchall()
+            if not rows:
+                return
+            current, entity_type, attributes = None, None, []
+            for row in rows:
+                if row.id != current:
+                    if current is not None:
+                        yield entity_items(entity_type, attributes)
+                    current, entity_type, attributes = row.id, row.entity_type, []
+                if row.attribute_key is not None:
+                    attributes.append((row.attribute_key, stored_value_class(row.attribute_value)))
+            yield entity_items(entity_type, attributes)
+            after_id = current
+
+    def _pattern_row(self, candidate: PatternCandidate) -> Dict[str, Any]:
+        match_rules, attribute_patterns = [], {}
+        for item in candidate.antecedent:
+            if item[0] == 'attr':
+                match_rules.append({'type': 'attribute_exists', 'attribute': item[1]})
+                attribute_patterns.setdefault(item[1], {'required': True, 'type': 'any'})
+            else:
+                match_rules.append({'type': 'attribute_type', 'attribute': item[1], 'value_type': item[2]})
+                # PatternMatrix scores 'string' like SemanticCore and other value classes by isinstance
+                spec_type = 'string' if item[2] == 'str' else item[2]
+                attribute_patterns[item[1]] = {'required': True, 'type': spec_type}
+
+        rule_key = json.dumps([candidate.entity_type, [list(item) for item in candidate.antecedent]])
+        return {
+            'id': f"mined_{hashlib.sha1(rule_key.encode()).hexdigest()[:16]}",
+            'pattern_type': self.PATTERN_TYPE,
+            'pattern_data': json.dumps({
+                'type': candidate.entity_type,
+                'match_rules': match_rules,
+                'attribute_patterns': attribute_patterns,
+                'support': candidate.support,
+                'count': candidate.count,
+                'confidence': candidate.confidence,
+                'source': 'mined'
+            }),
+            'confidence': candidate.confidence,
+            'examples': json.dumps([]),
+            'prune_below': pattern_stats.prune_below
+        }
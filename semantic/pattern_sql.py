@@ -0,0 +1,147 @@
+# pattern_sql.py
+from typing import Any, Dict, List, Optional, Tuple
+import json
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+# json_type() of the stored text for each Python type an attribute_type rule may name.
+# entity_attributes.attribute_value is TEXT, so non-string values are stored JSON-encoded.
+_JSON_TYPES: Dict[str, Tuple[str, ...]] = {
+    'str': ('text',),
+    'int': ('integer', 'true', 'false'),    # isinstance(True, int) holds in Python
+    'bool': ('true', 'false'),
+    'float': ('real',),
+    'list': ('array',),
+    'tuple': ('array',),
+    'dict': ('object',),
+    'NoneType': ('null',),
+}
+
+PLANS = ('auto', 'exists', 'intersect')
+
+def encode_attribute_value(value: Any) -> Optional[str]:
+    """Text form of an attribute value as stored in entity_attributes."""
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True)
+
+def _equal_texts(value: Any) -> List[str]:
+    """Stored text forms of every value equal to ``value`` (1 == 1.0 == True in Python)."""
+    texts = [encode_attribute_value(value)]
+    if isinstance(value, (bool, int, float)) and float(value).is_integer():
+        number = int(value)
+        texts.extend([str(number), f"{number}.0"])
+        if number in (0, 1):
+            texts.append('true' if number else 'false')
+    return list(dict.fromkeys(texts))
+
+def compile_match_rules(match_rules: List[Dict[str, Any]], plan: str = 'auto') -> Optional[TextClause]:
+    """Compile a pattern's match_rules into one query returning matching entity ids.
+
+    Mirrors ``SemanticEngine._matches_pattern``: every rule must hold, rules of
+    unknown type are ignored, and an empty rule list matches nothing (None is
+    returned). Each rule becomes a predicate on (attribute_key,
+    attribute_value) served by idx_entity_attributes_key_value. The 'exists'
+    plan drives from the first positive rule and probes the others with
+    correlated EXISTS; the 'intersect' plan evaluates every rule as an
+    independent index range and combines them with INTERSECT / EXCEPT, which
+    only pays off when every rule is selective. 'auto' picks 'intersect' when
+    there are several rules and each is a value equality or type test, and
+    'exists' (driven by a key/value rule when there is one) otherwise.
+    """
+    if plan not in PLANS:
+        raise ValueError(f"Unknown plan {plan!r}; expected one of {PLANS}")
+    if not match_rules:
+        return None
+
+    params: Dict[str, Any] = {}
+    positive: List[str] = []
+    negative: List[str] = []
+    for rule in _order_rules(match_rules):
+        compiled = _compile_rule(rule, len(params), params)
+        if compiled is None:
+            continue
+        predicate, negated = compiled
+        (negative if negated else positive).append(predicate)
+
+    if plan == 'auto':
+        plan = 'intersect' if _all_selective(match_rules) else 'exists'
+    sql = _intersect_plan(positive, negative) if plan == 'intersect' else _exists_plan(positive, negative)
+    return text(sql).bindparams(**params)
+
+def _all_selective(match_rules: List[Dict[str, Any]]) -> bool:
+    """Whether every rule is a value equality or type test, with at least two of them."""
+    return len(match_rules) > 1 and all(
+        rule.get('type') == 'attribute_type'
+        or (rule.get('type') == 'attribute_value' and rule.get('value') is not None)
+        for rule in match_rules
+    )
+
+def _order_rules(match_rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Most selective rules first: key and value equality, then key-only rules."""
+    rank = {'attribute_value': 0, 'attribute_type': 1, 'attribute_exists': 2}
+    return sorted(match_rules, key=lambda rule: rank.get(rule.get('type'), 3))
+
+def _compile_rule(rule: Dict[str, Any], index: int, params: Dict[str, Any]) -> Optional[Tuple[str, bool]]:
+    """(predicate template over alias ``{a}``, negated) for a rule; None for rule types the matcher ignores."""
+    rule_type = rule.get('type')
+    key_param = f"k{index}"
+    if rule_type == 'attribute_exists':
+        params[key_param] = rule['attribute']
+        return f"{{a}}.attribute_key = :{key_param}", False
+
+    if rule_type == 'attribute_value':
+        params[key_param] = rule['attribute']
+        if rule['value'] is None:
+            # get() == None also holds when the attribute is missing
+            return f"{{a}}.attribute_key = :{key_param} AND {{a}}.attribute_value IS NOT NULL", True
+        value_params = []
+        for position, value in enumerate(_equal_texts(rule['value'])):
+            params[f"v{index}_{position}"] = value
+            value_params.append(f":v{index}_{position}")
+        return f"{{a}}.attribute_key = :{key_param} AND {{a}}.attribute_value IN ({', '.join(value_params)})", False
+
+    if rule_type == 'attribute_type':
+        params[key_param] = rule['attribute']
+        json_types = _json_types(rule['value_type'])
+        if 'null' in json_types:
+            raise ValueError("attribute_type rules on NoneType cannot be pushed down")
+        types = ", ".join(f"'{json_type}'" for json_type in json_types)
+        # Text that is not valid JSON can only have been stored from a str
+        value_type = "CASE WHEN json_valid({a}.attribute_value) THEN json_type({a}.attribute_value) ELSE 'text' END"
+        return (
+            f"{{a}}.attribute_key = :{key_param} AND {{a}}.attribute_value IS NOT NULL AND {value_type} IN ({types})",
+            False
+        )
+
+    return None
+
+def _json_types(value_type: Any) -> Tuple[str, ...]:
+    """json_type() results for a type, a type name, or a tuple of either (as isinstance accepts)."""
+    if isinstance(value_type, tuple):
+        return tuple(json_type for member in value_type for json_type in _json_types(member))
+    name = value_type if isinstance(value_type, str) else getattr(value_type, '__name__', None)
+    if name not in _JSON_TYPES:
+        raise ValueError(f"attribute_type {value_type!r} cannot be pushed down")
+    return _JSON_TYPES[name]
+
+def _exists_plan(positive: List[str], negative: List[str]) -> str:
+    if positive:
+        # Drive from the most selective rule's index range, probe the rest per entity
+        sql = f"SELECT d.entity_id FROM entity_attributes d WHERE {positive[0].format(a='d')}"
+        outer, probes = "d.entity_id", positive[1:]
+    else:
+        sql = "SELECT e.id FROM entities e WHERE 1"
+        outer, probes = "e.id", []
+    for predicate in probes:
+        sql += f"\nAND EXISTS (SELECT 1 FROM entity_attributes a WHERE a.entity_id = {outer} AND {predicate.format(a='a')})"
+    for predicate in negative:
+        sql += f"\nAND NOT EXISTS (SELECT 1 FROM entity_attributes a WHERE a.entity_id = {outer} AND {predicate.format(a='a')})"
+    return sql
+
+def _intersect_plan(positive: List[str], negative: List[str]) -> str:
+    branches = [f"SELECT a.entity_id FROM entity_attributes a WHERE {predicate.format(a='a')}" for predicate in positive]
+    sql = "\nINTERSECT\n".join(branches) if branches else "SELECT id FROM entities"
+    for predicate in negative:
+        sql += f"\nEXCEPT\nSELECT a.entity_id FROM entity_attributes a WHERE {predicate.format(a='a')}"
+    return sql
@@ -0,0 +1,123 @@
+# pattern_stats.py
+from typing import Dict, List, Optional, Sequence
+import datetime
+import time
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# last_applied only moves when the pattern matched in this batch
+_UPDATE_SUCCESS_RATE = text("""
+    UPDATE semantic_patterns
+    SET success_rate = COALESCE(success_rate, 1.0) * :keep + :rate * (1 - :keep),
+        last_applied = COALESCE(:last_applied, last_applied)
+    WHERE id = :id
+""")
+
+class PatternStats:
+    """Per-pattern hit/miss counts, aggregated in memory and flushed in batches.
+
+    An observation is a prediction: a pattern firing on an entity whose type
+    is known. It is a hit when the pattern's type is the entity's type and a
+    miss otherwise, so a pattern for a rare type is not penalised for the
+    entities of other types it (correctly) does not fire on.
+
+    A flush folds each pattern's pending observations into
+    semantic_patterns.success_rate as an exponentially decayed average with
+    a half-life of ``half_life`` observations: n observations with hit
+    ratio p move the rate r to ``r * keep + p * (1 - keep)`` with
+    ``keep = 0.5 ** (n / half_life)``. Patterns whose rate falls below
+    ``prune_below`` drop out of scoring (``SemanticEngine.score_entities``)
+    but are still listed; their rows are kept, and relearning
+    a pruned pattern (``PatternLearner``) resets its rate.
+    """
+
+    def __init__(self, half_life: float = 200.0, prune_below: float = 0.05,
+                 flush_every: int = 10000, flush_interval: float = 30.0):
+        self.half_life = half_life
+        self.prune_below = prune_below
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        # pattern id -> [hits, observations]
+        self._pending: Dict[str, List[int]] = {}
+        self._pending_observations = 0
+        self._last_applied: Dict[str, datetime.datetime] = {}
+        self._last_flush = time.monotonic()
+
+    @property
+    def pending(self) -> int:
+        return self._pending_observations
+
+    def record(self, pattern_id: str, hits: int, observations: int = 1) -> None:
+        """Record ``observations`` evaluations of a pattern, ``hits`` of which matched."""
+        if observations <= 0:
+            return
+        counts = self._pending.setdefault(pattern_id, [0, 0])
+        counts[0] += hits
+        counts[1] += observations
+        self._pending_observations += observations
+        if hits:
+            self._last_applied[pattern_id] = datetime.datetime.utcnow()
+
+    def record_predictions(self, pattern_ids: Sequence[str], pattern_types: Sequence[str],
+                           scores: np.ndarray, entity_types: Sequence[Optional[str]]) -> None:
+        """Record a scored batch (entities x patterns); a score above zero is a prediction."""
+        actual = np.array(entity_types, dtype=object)
+        known = np.array([entity_type is not None for entity_type in entity_types], dtype=bool)
+        fired = (scores > 0) & known[:, None]
+        correct = fired & (actual[:, None] == np.array(pattern_types, dtype=object)[None, :])
+        for pattern_id, hits, observations in zip(pattern_ids, correct.sum(axis=0).tolist(),
+                                                  fired.sum(axis=0).tolist()):
+            self.record(pattern_id, hits, observations)
+
+    def due(self) -> bool:
+        return bool(self._pending) and (
+            self._pending_observations >= self.flush_every
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    async def maybe_flush(self, db: AsyncSession) -> int:
+        """Flush when due, on a session of its own so the caller's transaction is left alone."""
+        if not self.due():
+            return 0
+        async with AsyncSession(db.bind) as session:
+            return await self.flush(session)
+
+    async def flush(self, db: Session) -> int:
+        """Write pending counts as one batched UPDATE; returns the number of patterns updated."""
+        pending, last_applied = self._pending, self._last_applied
+        self._pending, self._last_applied = {}, {}
+        self._pending_observations = 0
+        self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        rows = [
+            {
+                'id': pattern_id,
+                'keep': 0.5 ** (observations / self.half_life),
+                'rate': hits / observations,
+                'last_applied': last_applied.get(pattern_id)
+            }
+            for pattern_id, (hits, observations) in pending.items()
+        ]
+        try:
+            await db.execute(_UPDATE_SUCCESS_RATE, rows)
+            await db.commit()
+        except Exception:
+            self._restore(pending, last_applied)
+            raise
+        return len(rows)
+
+    def _restore(self, pending: Dict[str, List[int]], last_applied: Dict[str, datetime.datetime]) -> None:
+        for pattern_id, (hits, observations) in pending.items():
+            counts = self._pending.setdefault(pattern_id, [0, 0])
+            counts[0] += hits
+            counts[1] += observations
+            self._pending_observations += observations
+        for pattern_id, applied in last_applied.items():
+            self._last_applied.setdefault(pattern_id, applied)
+
+# Shared by semantic engines in this process
+pattern_stats = PatternStats()
@@ -0,0 +1,79 @@
+# relation_changes.py
+from typing import Iterator, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# (relation_type, from_entity_id, to_entity_id)
+Edge = Tuple[int, int, int]
+
+# Consumed changes are deleted in runs of at least this many rows
+PRUNE_BATCH = 1000
+
+async def get_change_watermark(db: Session) -> int:
+    """Id of the latest relation_changes row ever written (0 before the first).
+
+    Read from sqlite_sequence, so pruning the log never moves it back.
+    """
+    result = await db.execute(text("""
+        SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'relation_changes'), 0)
+    """))
+    return result.scalar()
+
+async def get_pruned_through(db: Session) -> int:
+    """Id up to which relation_changes has been pruned (0 when never pruned).
+
+    A consumer whose watermark is below it has missed changes and must
+    rebuild from relations instead of replaying the log.
+    """
+    result = await db.execute(text("""
+        SELECT COALESCE((SELECT pruned_through FROM relation_changes_pruned WHERE id = 1), 0)
+    """))
+    return result.scalar()
+
+async def prune_relation_changes(db: Session, upto: int, min_rows: int = PRUNE_BATCH) -> int:
+    """Delete changes up to ``upto``, the lowest watermark of every consumer.
+
+    Nothing is deleted until at least ``min_rows`` changes are prunable;
+    returns the number of rows deleted.
+    """
+    pruned_through = await get_pruned_through(db)
+    if upto - pruned_through < min_rows:
+        return 0
+    result = await db.execute(text("DELETE FROM relation_changes WHERE id <= :upto"), {"upto": upto})
+    await db.execute(
+        text("""
+            INSERT INTO relation_changes_pruned (id, pruned_through) VALUES (1, :upto)
+            ON CONFLICT(id) DO UPDATE SET pruned_through = MAX(pruned_through, excluded.pruned_through)
+        """),
+        {"upto": upto}
+    )
+    await db.commit()
+    return result.rowcount
+
+async def read_relation_changes(db: Session, after: int, upto: int) -> List[Tuple[str, List[Edge]]]:
+    """Relation changes in (after, upto], as runs of consecutive same-operation edges.
+
+    Applying the runs in order replays the log; each run is
+    ``('INSERT' | 'DELETE', edges)``.
+    """
+    result = await db.execute(
+        text("""
+            SELECT operation, relation_type, from_entity_id, to_entity_id
+            FROM relation_changes
+            WHERE id > :after AND id <= :upto
+            ORDER BY id
+        """),
+        {"after": after, "upto": upto}
+    )
+    return list(_runs(result.fetchall()))
+
+def _runs(rows) -> Iterator[Tuple[str, List[Edge]]]:
+    operation, edges = None, []
+    for row in rows:
+        if row.operation != operation and edges:
+            yield operation, edges
+            edges = []
+        operation = row.operation
+        edges.append((row.relation_type, row.from_entity_id, row.to_entity_id))
+    if edges:
+        yield operation, edges
@@ -0,0 +1,69 @@
+# relation_lookup.py
+from typing import Dict, List, Optional, Set, Tuple, Union
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .hierarchy import TypeHierarchy, type_hierarchy
+from .table_versions import get_table_versions
+
+class RelationLookup:
+    """In-memory (from_type, relation_id, to_type) validity lookup.
+
+    valid_type_relations is expanded through the type hierarchy, so a relation
+    allowed between two types is also allowed between their subtypes. A check
+    is a single set probe with no I/O.
+    """
+
+    TABLES = ('entity_type_hierarchy', 'relation_types', 'valid_type_relations')
+
+    def __init__(self, hierarchy: Optional[TypeHierarchy] = None, max_depth: int = 10):
+        self.hierarchy = hierarchy or type_hierarchy
+        self.max_depth = max_depth
+        self.version: Optional[Tuple[Optional[int], ...]] = None
+        self.relation_ids: Dict[str, int] = {}
+        self._valid: Set[Tuple[str, int, str]] = set()
+
+    def relation_id(self, relation_type: Union[str, int]) -> Optional[int]:
+        """Resolve a relation name (or id) to its relation_types id."""
+        if isinstance(relation_type, int):
+            return relation_type
+        if relation_type in self.relation_ids:
+            return self.relation_ids[relation_type]
+        if isinstance(relation_type, str) and relation_type.isdigit():
+            return int(relation_type)
+        return None
+
+    def is_valid(self, from_type: str, relation_type: Union[str, int], to_type: str) -> bool:
+        return (from_type, self.relation_id(relation_type), to_type) in self._valid
+
+    async def refresh(self, db: Session) -> "RelationLookup":
+        """Reload if any of the underlying tables changed since the last load."""
+        versions = await get_table_versions(db, self.TABLES)
+        version = tuple(versions[table] for table in self.TABLES)
+        if self.version is not None and None not in version and version == self.version:
+            return self
+
+        await self.hierarchy.refresh(db)
+
+        result = await db.execute(text("SELECT id, relation_name FROM relation_types"))
+        relation_ids = {row.relation_name: row.id for row in result.fetchall()}
+
+        result = await db.execute(text("SELECT from_type, relation_type, to_type FROM valid_type_relations"))
+        valid = set()
+        for row in result.fetchall():
+            from_types = self._self_and_descendants(row.from_type)
+            to_types = self._self_and_descendants(row.to_type)
+            for from_type in from_types:
+                for to_type in to_types:
+                    valid.add((from_type, row.relation_type, to_type))
+
+        self.relation_ids = relation_ids
+        self._valid = valid
+        self.version = version
+        return self
+
+    def _self_and_descendants(self, type_name: str) -> List[str]:
+        descendants = self.hierarchy.descendants(type_name)
+        return [type_name, *(t for t, depth in descendants.items() if depth <= self.max_depth)]
+
+# Shared by validators in this process
+relation_lookup = RelationLookup()
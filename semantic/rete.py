@@ -0,0 +1,273 @@
+# rete.py
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from collections import OrderedDict, defaultdict
+import json
+
+_MISSING = object()
+
+# Fields a test reads: ('type',) for entity_type, ('property', name), ('context', key)
+Field = Tuple[Any, ...]
+
+def check_property_constraint(entity: Dict[str, Any], property_name: str, constraint: Any) -> bool:
+    """Check if an entity property satisfies a constraint."""
+    if property_name not in entity:
+        return False
+
+    value = entity[property_name]
+
+    if isinstance(constraint, dict):
+        operator = constraint.get('operator', '==')
+        target = constraint.get('value')
+
+        if operator == '==':
+            return value == target
+        elif operator == '!=':
+            return value != target
+        elif operator == '>':
+            return value > target
+        elif operator == '<':
+            return value < target
+        elif operator == 'in':
+            return value in target
+        elif operator == 'contains':
+            return target in value
+        return False
+    else:
+        return value == constraint
+
+def check_context_constraint(context: Dict[str, Any], ctx_key: str, ctx_pattern: Any) -> bool:
+    """Check a context key against a pattern using the property constraint operators."""
+    return check_property_constraint(context, ctx_key, ctx_pattern)
+
+class _Test:
+    __slots__ = ('id', 'field', 'kind', 'name', 'constraint', 'rules')
+
+    def __init__(self, test_id: int, field: Field, kind: str, name: Any, constraint: Any):
+        self.id = test_id
+        self.field = field
+        self.kind = kind
+        self.name = name
+        self.constraint = constraint
+        self.rules: List[int] = []
+
+    def evaluate(self, entity: Dict[str, Any], context: Optional[Dict[str, Any]]) -> bool:
+        if self.kind == 'type':
+            return self.constraint == entity.get('entity_type')
+        # Tests run regardless of evaluation order, so incomparable values just fail
+        try:
+            if self.kind == 'property':
+                return bool(check_property_constraint(entity, self.name, self.constraint))
+            # Context constraints only apply when a context is given
+            return not context or bool(check_context_constraint(context, self.name, self.constraint))
+        except TypeError:
+            return False
+
+class _EntityState:
+    __slots__ = ('entity', 'context', 'passing', 'counts', 'matched')
+
+    def __init__(self):
+        self.entity: Dict[str, Any] = {}
+        self.context: Dict[str, Any] = {}
+        self.passing: Set[int] = set()
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.matched: Set[int] = set()
+
+class RuleNetwork:
+    """Discrimination network over inference rule patterns.
+
+    Every distinct test (type equality, property operator, context key) is a
+    single node shared by all rules that use it, so a match evaluates each
+    distinct test once. Equality tests are hashed by target value, leaving
+    only the other operators to be evaluated one by one. ``update`` keeps
+    per-entity memory and re-evaluates only the tests reading fields that
+    changed since the last call.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self._tests: List[_Test] = []
+        self._rule_sizes: List[int] = []
+        self._unconditional: List[int] = []
+        # field -> {target value: test id} for hashable equality tests
+        self._eq_index: Dict[Field, Dict[Hashable, int]] = defaultdict(dict)
+        # field -> test ids that must be evaluated individually
+        self._other_tests: Dict[Field, List[int]] = defaultdict(list)
+        self._fields: Dict[Field, List[int]] = defaultdict(list)
+        self._memory: Dict[Hashable, _EntityState] = {}
+
+        test_ids: Dict[Tuple, int] = {}
+        for rule_index, rule in enumerate(rules):
+            tests = set()
+            for key, field, kind, name, constraint in self._compile_pattern(rule['pattern']):
+                if key not in test_ids:
+                    test_ids[key] = self._add_test(field, kind, name, constraint)
+                tests.add(test_ids[key])
+            for test_id in tests:
+                self._tests[test_id].rules.append(rule_index)
+            self._rule_sizes.append(len(tests))
+            if not tests:
+                self._unconditional.append(rule_index)
+
+    @property
+    def test_count(self) -> int:
+        return len(self._tests)
+
+    def match(self, entity: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Rules matching an entity, in rule order, without keeping any memory."""
+        counts: Dict[int, int] = defaultdict(int)
+        for field in self._fields:
+            for test_id in self._passing_tests(field, entity, context):
+                for rule_index in self._tests[test_id].rules:
+                    counts[rule_index] += 1
+
+        matched = [r for r, count in counts.items() if count == self._rule_sizes[r]]
+        matched.extend(self._unconditional)
+        return [self.rules[r] for r in sorted(matched)]
+
+    def update(self, key: Hashable, entity: Dict[str, Any],
+               context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Rules matching an entity, re-evaluating only tests affected by changes since the last update."""
+        context = context or {}
+        state = self._memory.get(key)
+        if state is None:
+            state = self._memory[key] = _EntityState()
+            changed = list(self._fields)
+        else:
+            changed = self._changed_fields(state, entity, context)
+
+        for field in changed:
+            now_passing = set(self._passing_tests(field, entity, context))
+            for test_id in self._fields[field]:
+                was = test_id in state.passing
+                now = test_id in now_passing
+                if was == now:
+                    continue
+                for rule_index in self._tests[test_id].rules:
+                    if now:
+                        state.counts[rule_index] += 1
+                        if state.counts[rule_index] == self._rule_sizes[rule_index]:
+                            state.matched.add(rule_index)
+                    else:
+                        state.matched.discard(rule_index)
+                        state.counts[rule_index] -= 1
+                if now:
+                    state.passing.add(test_id)
+                else:
+                    state.passing.discard(test_id)
+
+        # Values are compared on the next update, so keep shallow copies
+        state.entity = dict(entity)
+        state.context = dict(context)
+        matched = state.matched.union(self._unconditional)
+        return [self.rules[r] for r in sorted(matched)]
+
+    def forget(self, key: Hashable) -> None:
+        self._memory.pop(key, None)
+
+    def _changed_fields(self, state: _EntityState, entity: Dict[str, Any], context: Dict[str, Any]) -> List[Field]:
+        changed = []
+        context_toggled = bool(state.context) != bool(context)
+        for field in self._fields:
+            if field[0] == 'type':
+                before, after = state.entity.get('entity_type'), entity.get('entity_type')
+            elif field[0] == 'property':
+                before, after = state.entity.get(field[1], _MISSING), entity.get(field[1], _MISSING)
+            else:
+                if context_toggled:
+                    changed.append(field)
+                    continue
+                before, after = state.context.get(field[1], _MISSING), context.get(field[1], _MISSING)
+            if before is not after and before != after:
+                changed.append(field)
+        return changed
+
+    def _passing_tests(self, field: Field, entity: Dict[str, Any], context: Optional[Dict[str, Any]]):
+        eq_index = self._eq_index.get(field)
+        if eq_index:
+            if field[0] == 'context' and not context:
+                yield from eq_index.values()
+            else:
+                value = self._field_value(field, entity, context)
+                if value is not _MISSING:
+                    try:
+                        test_id = eq_index.get(value)
+                    except TypeError:
+                        test_id = None
+                    if test_id is not None:
+                        yield test_id
+        for test_id in self._other_tests.get(field, ()):
+            if self._tests[test_id].evaluate(entity, context):
+                yield test_id
+
+    @staticmethod
+    def _field_value(field: Field, entity: Dict[str, Any], context: Optional[Dict[str, Any]]) -> Any:
+        if field[0] == 'type':
+            return entity.get('entity_type')
+        source = entity if field[0] == 'property' else context
+        return source.get(field[1], _MISSING)
+
+    def _add_test(self, field: Field, kind: str, name: Any, constraint: Any) -> int:
+        test = _Test(len(self._tests), field, kind, name, constraint)
+        self._tests.append(test)
+        self._fields[field].append(test.id)
+
+        target = _equality_target(kind, constraint)
+        if target is not _MISSING:
+            try:
+                if target not in self._eq_index[field]:
+                    self._eq_index[field][target] = test.id
+                    return test.id
+            except TypeError:
+                pass
+        self._other_tests[field].append(test.id)
+        return test.id
+
+    @staticmethod
+    def _compile_pattern(pattern: Dict[str, Any]):
+        """Yield (dedup key, field, kind, name, constraint) for every test in a pattern."""
+        if 'type' in pattern:
+            yield ('type', _canonical(pattern['type'])), ('type',), 'type', 'entity_type', pattern['type']
+        for prop, constraint in pattern.get('properties', {}).items():
+            yield (
+                ('property', prop, _canonical(constraint)),
+                ('property', prop), 'property', prop, constraint
+            )
+        for ctx_key, ctx_pattern in pattern.get('context', {}).items():
+            yield (
+                ('context', ctx_key, _canonical(ctx_pattern)),
+                ('context', ctx_key), 'context', ctx_key, ctx_pattern
+            )
+
+def _equality_target(kind: str, constraint: Any) -> Any:
+    if kind == 'type':
+        return constraint
+    if isinstance(constraint, dict):
+        if constraint.get('operator', '==') == '==':
+            return constraint.get('value')
+        return _MISSING
+    return constraint
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+class RuleNetworkCache:
+    """Networks keyed by rule-set identity (e.g. rule and hierarchy versions plus entity type)."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._networks: "OrderedDict[Hashable, RuleNetwork]" = OrderedDict()
+
+    def get(self, key: Optional[Hashable], rules: List[Dict[str, Any]]) -> RuleNetwork:
+        if key is None:
+            return RuleNetwork(rules)
+        network = self._networks.get(key)
+        if network is None:
+            network = self._networks[key] = RuleNetwork(rules)
+            while len(self._networks) > self.max_size:
+                self._networks.popitem(last=False)
+        else:
+            self._networks.move_to_end(key)
+        return network
+
+# Shared by inference engines in this process
+rule_networks = RuleNetworkCache()
@@ -0,0 +1,85 @@
+# rule_registry.py
+from typing import Any, Dict, Iterable, List, Optional
+from collections import defaultdict
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import heapq
+import json
+from .table_versions import get_table_versions
+
+class RuleRegistry:
+    """Compiled, in-process view of the latest version of every semantic rule.
+
+    Rules are parsed once and bucketed by the relation type (``pattern.type``)
+    and target entity type (``pattern.target_type``) they apply to, each
+    bucket sorted by priority. Rule dicts are shared and must not be mutated.
+    """
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.rules: List[Dict[str, Any]] = []
+        self._by_relation_type: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_target_type: Dict[str, List[Dict[str, Any]]] = {}
+
+    def for_relation_type(self, relation_type: str) -> List[Dict[str, Any]]:
+        return self._by_relation_type.get(relation_type, [])
+
+    def for_target_type(self, target_type: str) -> List[Dict[str, Any]]:
+        return self._by_target_type.get(target_type, [])
+
+    def for_target_types(self, target_types: Iterable[str]) -> List[Dict[str, Any]]:
+        """Rules targeting any of the given types, merged in priority order."""
+        buckets = [self._by_target_type[t] for t in set(target_types) if t in self._by_target_type]
+        return list(heapq.merge(*buckets, key=_priority_key))
+
+    async def refresh(self, db: Session) -> "RuleRegistry":
+        """Reload from semantic_rules_v1 if the rule table changed."""
+        version = (await get_table_versions(db, ['semantic_rules_v1']))['semantic_rules_v1']
+        # Without a version counter (None), reload on every refresh
+        if self.version is not None and version == self.version:
+            return self
+
+        result = await db.execute(text("""
+        SELECT id, rule_name, pattern, actions, priority, context, version
+        FROM semantic_rules_v1
+        """))
+
+        # Keep only the latest version of each rule, like the semantic_rules view
+        latest: Dict[str, Any] = {}
+        for row in result.fetchall():
+            current = latest.get(row.rule_name)
+            if current is None or row.version > current.version:
+                latest[row.rule_name] = row
+
+        rules = sorted((self._compile(row) for row in latest.values()), key=_priority_key)
+        by_relation_type = defaultdict(list)
+        by_target_type = defaultdict(list)
+        for rule in rules:
+            if 'type' in rule['pattern']:
+                by_relation_type[rule['pattern']['type']].append(rule)
+            if 'target_type' in rule['pattern']:
+                by_target_type[rule['pattern']['target_type']].append(rule)
+
+        self.rules = rules
+        self._by_relation_type = dict(by_relation_type)
+        self._by_target_type = dict(by_target_type)
+        self.version = version
+        return self
+
+    @staticmethod
+    def _compile(row: Any) -> Dict[str, Any]:
+        return {
+            'id': row.id,
+            'rule_name': row.rule_name,
+            'pattern': json.loads(row.pattern),
+            'actions': json.loads(row.actions),
+            'priority': row.priority or 0,
+            'context': json.loads(row.context) if row.context else None,
+            'version': row.version
+        }
+
+def _priority_key(rule: Dict[str, Any]):
+    return (-rule['priority'], rule['id'])
+
+# Shared by validators and inference engines in this process
+rule_registry = RuleRegistry()
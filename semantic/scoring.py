@@ -0,0 +1,139 @@
+from typing import Dict, List, Any, Tuple, Union
+import json
+import re
+import numpy as np
+from .pattern_mining import VALUE_TYPES
+
+_MISSING = object()
+
+class PatternMatrix:
+    """Attribute patterns encoded as weight matrices for vectorized scoring.
+
+    Mirrors the scalar ``SemanticCore._match_pattern`` scoring: required
+    attributes weigh 2, optional ones 1, and a missing required attribute
+    zeroes the pattern. Identical attribute specs are shared between patterns
+    so each feature column is computed once per batch.
+
+    Besides ``"string"`` specs, mined patterns use ``"any"`` (scores 1 when
+    present) and value class names such as ``"int"`` (scores 1 for values of
+    that class); specs of any other type score 0, as in SemanticCore.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, Union[str, Dict[str, Any]], float]]):
+        self.labels: List[str] = []
+        self._columns: List[Tuple[str, Dict[str, Any]]] = []
+        self._attribute_names: List[str] = []
+        column_index: Dict[Tuple[str, str], int] = {}
+        name_index: Dict[str, int] = {}
+        entries = []
+
+        for label, pattern_data, confidence in patterns:
+            if isinstance(pattern_data, str):
+                pattern_data = json.loads(pattern_data)
+            attr_patterns = pattern_data.get("attribute_patterns", {})
+            total_weight = sum(2 if spec.get("required", False) else 1 for spec in attr_patterns.values())
+
+            weighted, required = [], []
+            for attr_name, spec in attr_patterns.items():
+                key = (attr_name, json.dumps(spec, sort_keys=True))
+                if key not in column_index:
+                    column_index[key] = len(self._columns)
+                    self._columns.append((attr_name, spec))
+                if attr_name not in name_index:
+                    name_index[attr_name] = len(self._attribute_names)
+                    self._attribute_names.append(attr_name)
+
+                is_required = spec.get("required", False)
+                weight = (2 if is_required else 1) / total_weight * confidence
+                weighted.append((column_index[key], weight))
+                if is_required:
+                    required.append(name_index[attr_name])
+
+            self.labels.append(label)
+            entries.append((weighted, required))
+
+        # weights: feature column -> pattern, pre-divided by total weight and scaled by confidence
+        self.weights = np.zeros((len(self._columns), len(entries)))
+        # required: attribute name -> pattern, with the number of required names per pattern
+        self.required = np.zeros((len(self._attribute_names), len(entries)))
+        self.required_totals = np.zeros(len(entries))
+        for p, (weighted, required) in enumerate(entries):
+            for column, weight in weighted:
+                self.weights[column, p] += weight
+            for name in required:
+                self.required[name, p] += 1
+            self.required_totals[p] = len(required)
+
+        self._compiled = [
+            (
+                frozenset(v for v in spec["values"] if isinstance(v, str)) if "values" in spec else None,
+                re.compile(spec["pattern"]) if "pattern" in spec else None,
+                [kw.lower() for kw in spec["keywords"] if isinstance(kw, str)] if spec.get("keywords") else None
+            )
+            for _, spec in self._columns
+        ]
+
+    def encode(self, entities: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode entities as (attribute presence, per-column match quality) matrices."""
+        presence = np.zeros((len(entities), len(self._attribute_names)))
+        quality = np.zeros((len(entities), len(self._columns)))
+        attributes = [entity.get("attributes", {}) for entity in entities]
+
+        for n, attr_name in enumerate(self._attribute_names):
+            presence[:, n] = [attr_name in attrs for attrs in attributes]
+
+        for j, (attr_name, spec) in enumerate(self._columns):
+            spec_type = spec.get("type")
+            if spec_type == "any":
+                quality[:, j] = [attr_name in attrs for attrs in attributes]
+                continue
+            if spec_type in VALUE_TYPES:
+                accepted = VALUE_TYPES[spec_type]
+                quality[:, j] = [attr_name in attrs and isinstance(attrs[attr_name], accepted) for attrs in attributes]
+                continue
+            if spec_type != "string":
+                continue
+            values, regex, keywords = self._compiled[j]
+            column = [attrs.get(attr_name, _MISSING) for attrs in attributes]
+            is_string = np.array([isinstance(v, str) for v in column])
+            if not is_string.any():
+                continue
+
+            value_in_set = np.ones(len(entities), dtype=bool)
+            regex_hit = np.ones(len(entities), dtype=bool)
+            keyword_hit = np.zeros(len(entities), dtype=bool)
+            for i in np.flatnonzero(is_string):
+                value = column[i]
+                if values is not None:
+                    value_in_set[i] = value in values
+                if regex is not None:
+                    regex_hit[i] = regex.match(value) is not None
+                if keywords is not None:
+                    lowered = value.lower()
+                    keyword_hit[i] = any(kw in lowered for kw in keywords)
+
+            score = np.where(value_in_set, 1.0, 0.5) * np.where(regex_hit, 1.0, 0.5)
+            score *= np.where(keyword_hit, 1.2, 1.0)
+            quality[:, j] = np.where(is_string, np.minimum(score, 1.0), 0.0)
+
+        return presence, quality
+
+    def score_matrix(self, entities: List[Dict[str, Any]]) -> np.ndarray:
+        """Score a batch of entities against every pattern (entities x patterns)."""
+        presence, quality = self.encode(entities)
+        eligible = (presence @ self.required) == self.required_totals
+        return (quality @ self.weights) * eligible
+
+    def score(self, entities: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        """Score a batch of entities, returning per-entity {type: score} like infer_types."""
+        return self.label_scores(self.score_matrix(entities))
+
+    def label_scores(self, matrix: np.ndarray) -> List[Dict[str, float]]:
+        """Per-entity {type: score} for a score matrix from ``score_matrix``."""
+        results = []
+        for row in matrix:
+            scores = {}
+            for p in np.flatnonzero(row > 0):
+                scores[self.labels[p]] = float(row[p])
+            results.append(scores)
+        return results
@@ -0,0 +1,20 @@
+# table_versions.py
+from typing import Dict, Iterable, Optional
+from sqlalchemy import text, bindparam
+from sqlalchemy.orm import Session
+
+async def get_table_versions(db: Session, table_names: Iterable[str]) -> Dict[str, Optional[int]]:
+    """Fetch change counters from semantic_table_versions in one query.
+
+    Tables without a counter map to None, which callers treat as "always stale".
+    """
+    table_names = list(table_names)
+    query = text("""
+        SELECT table_name, version
+        FROM semantic_table_versions
+        WHERE table_name IN :table_names
+    """).bindparams(bindparam('table_names', expanding=True))
+
+    result = await db.execute(query, {'table_names': table_names})
+    versions = {row.table_name: row.version for row in result.fetchall()}
+    return {name: versions.get(name) for name in table_names}
@@ -1,3 +1,6 @@
+from typing import Any, Dict, List
+from collections import defaultdict
+
 class TypeSystem:
     """Semantic type system implementation."""
     
@@ -7,15 +10,34 @@ class TypeSystem:
 
     async def enhance_entity(self, entity: Dict[str, Any]) -> None:
         """Add semantic information to entity."""
-        if not entity.get("type"):
-            return
-            
-        type_info = self.type_hierarchies.get(entity["type"])
-        if type_info:
-            entity["semantic"] = {
-                "type_hierarchy": type_info.get("hierarchy", []),
-                "attributes": type_info.get("attributes", {})
-            }
+        await self.enhance_entities([entity])
+
+    async def enhance_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add semantic information to a batch of entities.
+
+        Entities are grouped by type and each type's definition is looked up
+        once per batch. Every entity gets its own plain, JSON-serializable
+        copy of the info, so changing one entity's ``semantic`` leaves the
+        others alone.
+        """
+        by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for entity in entities:
+            if entity.get("type"):
+                by_type[entity["type"]].append(entity)
+
+        for entity_type, group in by_type.items():
+            type_info = self.type_hierarchies.get(entity_type)
+            if not type_info:
+                continue
+            for entity in group:
+                entity["semantic"] = self._semantic_info(type_info)
+        return entities
+
+    def _semantic_info(self, type_info: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type_hierarchy": list(type_info.get("hierarchy", [])),
+            "attributes": dict(type_info.get("attributes", {}))
+        }
 
     async def validate_entity(self, entity: Dict[str, Any]) -> Dict[str, Any]:
         """Perform semantic validation."""
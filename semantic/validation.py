@@ -1,9 +1,13 @@
 # validation.py
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from sqlalchemy.orm import Session
+import asyncio
 import json
+from .hierarchy import TypeHierarchy, type_hierarchy
+from .relation_lookup import RelationLookup, relation_lookup
+from .rule_registry import RuleRegistry, rule_registry
 
 @dataclass
 class ValidationResult:
@@ -13,121 +17,220 @@ class ValidationResult:
     confidence: float
     context: Dict[str, Any]
 
+# Checks whose failure makes a relation invalid regardless of context
+HARD_CHECKS = ('type_hierarchy', 'semantic_rules', 'constraints')
+
 class SemanticValidator:
-    """Enhanced semantic validation system with support for complex rules and context."""
+    """Enhanced semantic validation system with support for complex rules and context.
+
+    The checks of a relation run concurrently. Pass ``session_factory`` (e.g.
+    an async sessionmaker) so each database check runs on a session of its
+    own; without one, every check shares ``db`` and their queries are
+    serialized by a lock, so only the in-memory work overlaps.
+    """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, hierarchy: Optional[TypeHierarchy] = None,
+                 relations: Optional[RelationLookup] = None,
+                 session_factory: Optional[Callable[[], Any]] = None,
+                 rules: Optional[RuleRegistry] = None):
         self.db = db
+        self.hierarchy = hierarchy or type_hierarchy
+        self.relations = relations or (relation_lookup if hierarchy is None else RelationLookup(self.hierarchy))
+        self.rules = rules or rule_registry
+        # A session can't run queries concurrently; with a factory each check gets its own
+        self.session_factory = session_factory
+        self._db_lock = asyncio.Lock()
         
     async def validate_relation(
         self,
         from_entity: Dict[str, Any],
         to_entity: Dict[str, Any],
         relation_type: str,
-        context: Optional[Dict[str, Any]] = None
+        context: Optional[Dict[str, Any]] = None,
+        fail_fast: bool = False
     ) -> ValidationResult:
-        """Validate a semantic relation with full context awareness."""
-        violations = []
-        suggestions = []
-        confidence = 1.0
-        validation_context = context or {}
+        """Validate a semantic relation with full context awareness.
 
-        # 1. Type Hierarchy Validation
-        type_valid, type_violations = await self._validate_type_hierarchy(
-            from_entity['entity_type'],
-            to_entity['entity_type'],
-            relation_type
-        )
-        violations.extend(type_violations)
-
-        # 2. Semantic Rules Validation
-        rules_valid, rule_violations, rule_suggestions = await self._validate_semantic_rules(
-            from_entity,
-            to_entity,
-            relation_type,
-            validation_context
-        )
-        violations.extend(rule_violations)
-        suggestions.extend(rule_suggestions)
-
-        # 3. Constraint Validation
-        constraints_valid, constraint_violations = await self._validate_constraints(
-            from_entity,
-            to_entity,
-            relation_type,
-            validation_context
-        )
-        violations.extend(constraint_violations)
+        The independent checks run concurrently. With ``fail_fast`` the
+        remaining checks are cancelled once a hard violation (type hierarchy,
+        semantic rules or constraints) is found.
+        """
+        validation_context = context or {}
+        checks = self._relation_checks(from_entity, to_entity, relation_type, validation_context)
+        results = await self._run_checks(checks, fail_fast)
+        return self._combine_results(results, validation_context)
 
-        # 4. Context Validation
-        context_valid, context_violations, context_confidence = await self._validate_context(
-            validation_context
-        )
-        violations.extend(context_violations)
-        confidence *= context_confidence
+    async def validate_relations(
+        self,
+        relations: List[Tuple[Dict[str, Any], Dict[str, Any], str]],
+        context: Optional[Dict[str, Any]] = None,
+        fail_fast: bool = False
+    ) -> List[ValidationResult]:
+        """Validate many (from_entity, to_entity, relation_type) triples.
+
+        Relation lookups, semantic rules and constraints are loaded once for
+        the whole batch instead of once per relation.
+        """
+        validation_context = context or {}
+        relation_types = {relation_type for _, _, relation_type in relations}
+
+        lookup = await self._with_session(self.relations.refresh)
+        rules = await self._load_semantic_rules(relation_types)
+        constraints = await self._load_constraints(relation_types)
+
+        results = []
+        for from_entity, to_entity, relation_type in relations:
+            checks = self._relation_checks(
+                from_entity,
+                to_entity,
+                relation_type,
+                validation_context,
+                lookup=lookup,
+                rules=rules.get(relation_type, []),
+                constraints=constraints.get(relation_type, [])
+            )
+            check_results = await self._run_checks(checks, fail_fast)
+            results.append(self._combine_results(check_results, validation_context))
+        return results
 
-        # Overall validation result
-        is_valid = type_valid and rules_valid and constraints_valid and context_valid
+    def _relation_checks(
+        self,
+        from_entity: Dict[str, Any],
+        to_entity: Dict[str, Any],
+        relation_type: str,
+        context: Dict[str, Any],
+        lookup: Optional[RelationLookup] = None,
+        rules: Optional[List[Dict[str, Any]]] = None,
+        constraints: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Awaitable]:
+        return {
+            # 1. Type Hierarchy Validation
+            'type_hierarchy': self._validate_type_hierarchy(
+                from_entity['entity_type'],
+                to_entity['entity_type'],
+                relation_type,
+                lookup
+            ),
+            # 2. Semantic Rules Validation
+            'semantic_rules': self._validate_semantic_rules(
+                from_entity,
+                to_entity,
+                relation_type,
+                context,
+                rules
+            ),
+            # 3. Constraint Validation
+            'constraints': self._validate_constraints(
+                from_entity,
+                to_entity,
+                relation_type,
+                context,
+                constraints
+            ),
+            # 4. Context Validation
+            'context': self._validate_context(context)
+        }
+
+    async def _run_checks(self, checks: Dict[str, Awaitable], fail_fast: bool) -> Dict[str, Tuple]:
+        """Run checks concurrently, stopping early on a hard violation when fail_fast is set."""
+        tasks = {asyncio.ensure_future(check): name for name, check in checks.items()}
+        pending = set(tasks)
+        results = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[tasks[task]] = task.result()
+                if fail_fast and any(
+                    not results[name][0] for name in HARD_CHECKS if name in results
+                ):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return results
+
+    def _combine_results(self, results: Dict[str, Tuple], context: Dict[str, Any]) -> ValidationResult:
+        violations = []
+        suggestions = []
+        confidence = 1.0
+        # Checks skipped by fail-fast leave the relation invalid
+        is_valid = len(results) == len(HARD_CHECKS) + 1
+
+        if 'type_hierarchy' in results:
+            type_valid, type_violations = results['type_hierarchy']
+            violations.extend(type_violations)
+            is_valid = is_valid and type_valid
+
+        if 'semantic_rules' in results:
+            rules_valid, rule_violations, rule_suggestions = results['semantic_rules']
+            violations.extend(rule_violations)
+            suggestions.extend(rule_suggestions)
+            is_valid = is_valid and rules_valid
+
+        if 'constraints' in results:
+            constraints_valid, constraint_violations = results['constraints']
+            violations.extend(constraint_violations)
+            is_valid = is_valid and constraints_valid
+
+        if 'context' in results:
+            context_valid, context_violations, context_confidence = results['context']
+            violations.extend(context_violations)
+            confidence *= context_confidence
+            is_valid = is_valid and context_valid
 
         return ValidationResult(
             is_valid=is_valid,
             violations=violations,
             suggestions=suggestions,
             confidence=confidence,
-            context=validation_context
+            context=context
         )
 
+    async def _with_session(self, operation: Callable[[Session], Awaitable[Any]]) -> Any:
+        """Run a database operation on its own session, or on the shared one under a lock.
+
+        The operation itself is shielded: fail-fast may cancel a check that is
+        waiting for the session, but never one in the middle of a query.
+        """
+        if self.session_factory is not None:
+            return await self._shielded(self._with_own_session(operation))
+        async with self._db_lock:
+            return await self._shielded(operation(self.db))
+
+    async def _with_own_session(self, operation: Callable[[Session], Awaitable[Any]]) -> Any:
+        async with self.session_factory() as session:
+            return await operation(session)
+
+    @staticmethod
+    async def _shielded(operation: Awaitable[Any]) -> Any:
+        task = asyncio.ensure_future(operation)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            await asyncio.wait([task])
+            raise
+
+    @staticmethod
+    async def _fetchall(db: Session, query: Any, params: Dict[str, Any]) -> List[Any]:
+        result = await db.execute(query, params)
+        return result.fetchall()
+
     async def _validate_type_hierarchy(
         self,
         from_type: str,
         to_type: str,
-        relation_type: str
+        relation_type: str,
+        lookup: Optional[RelationLookup] = None
     ) -> Tuple[bool, List[str]]:
         """Validate types against the semantic hierarchy."""
-        query = text("""
-        WITH RECURSIVE type_hierarchy_path AS (
-            -- Base case: direct relationships
-            SELECT 
-                parent_type,
-                child_type,
-                1 as depth,
-                child_type as path
-            FROM entity_type_hierarchy
-            WHERE child_type = :from_type OR child_type = :to_type
-
-            UNION ALL
-
-            -- Recursive case: traverse up the hierarchy
-            SELECT 
-                h.parent_type,
-                h.child_type,
-                thp.depth + 1,
-                h.child_type || '>' || thp.path
-            FROM entity_type_hierarchy h
-            JOIN type_hierarchy_path thp ON h.child_type = thp.parent_type
-            WHERE thp.depth < 10  -- Prevent infinite recursion
-        )
-        SELECT DISTINCT path, depth
-        FROM type_hierarchy_path
-        WHERE parent_type IN (
-            SELECT from_type FROM valid_type_relations
-            WHERE relation_type = :relation_type
-        )
-        """)
-
-        result = await self.db.execute(
-            query,
-            {
-                'from_type': from_type,
-                'to_type': to_type,
-                'relation_type': relation_type
-            }
-        )
-
-        paths = result.fetchall()
+        if lookup is None:
+            lookup = await self._with_session(self.relations.refresh)
         violations = []
 
-        if not paths:
+        if not lookup.is_valid(from_type, relation_type, to_type):
             violations.append(
                 f"Invalid type hierarchy: {from_type} -> {relation_type} -> {to_type}"
             )
@@ -135,34 +238,31 @@ class SemanticValidator:
 
         return True, violations
 
+    async def _load_semantic_rules(self, relation_types: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Load and parse semantic rules for the given relation types, by relation type."""
+        registry = await self._with_session(self.rules.refresh)
+        return {relation_type: registry.for_relation_type(relation_type) for relation_type in relation_types}
+
     async def _validate_semantic_rules(
         self,
         from_entity: Dict[str, Any],
         to_entity: Dict[str, Any],
         relation_type: str,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        rules: Optional[List[Dict[str, Any]]] = None
     ) -> Tuple[bool, List[str], List[str]]:
         """Validate against defined semantic rules."""
-        query = text("""
-        SELECT rule_name, pattern, actions, priority
-        FROM semantic_rules
-        WHERE json_extract(pattern, '$.type') = :relation_type
-        ORDER BY priority DESC
-        """)
-
-        result = await self.db.execute(query, {'relation_type': relation_type})
-        rules = result.fetchall()
+        if rules is None:
+            rules = (await self._load_semantic_rules([relation_type])).get(relation_type, [])
 
         violations = []
         suggestions = []
         is_valid = True
 
         for rule in rules:
-            pattern = json.loads(rule.pattern)
-            if self._matches_pattern(from_entity, to_entity, pattern, context):
-                actions = json.loads(rule.actions)
+            if self._matches_pattern(from_entity, to_entity, rule['pattern'], context):
                 rule_valid, rule_violations, rule_suggestions = self._apply_rule_actions(
-                    actions,
+                    rule['actions'],
                     from_entity,
                     to_entity,
                     context
@@ -174,27 +274,38 @@ class SemanticValidator:
 
         return is_valid, violations, suggestions
 
+    async def _load_constraints(self, relation_types: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Load and parse relation_types.validation_rules for the given relation types."""
+        query = text("""
+        SELECT rt.relation_name, rt.validation_rules
+        FROM relation_types rt
+        WHERE rt.relation_name IN :relation_types
+        """).bindparams(bindparam('relation_types', expanding=True))
+
+        params = {'relation_types': list(relation_types)}
+        rows = await self._with_session(lambda db: self._fetchall(db, query, params))
+
+        return {
+            row.relation_name: json.loads(row.validation_rules)
+            for row in rows
+            if row.validation_rules
+        }
+
     async def _validate_constraints(
         self,
         from_entity: Dict[str, Any],
         to_entity: Dict[str, Any],
         relation_type: str,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        rules: Optional[List[Dict[str, Any]]] = None
     ) -> Tuple[bool, List[str]]:
         """Validate semantic constraints."""
-        query = text("""
-        SELECT rt.validation_rules
-        FROM relation_types rt
-        WHERE rt.relation_name = :relation_type
-        """)
-
-        result = await self.db.execute(query, {'relation_type': relation_type})
-        validation_rules = result.fetchone()
+        if rules is None:
+            rules = (await self._load_constraints([relation_type])).get(relation_type)
 
-        if not validation_rules or not validation_rules.validation_rules:
+        if not rules:
             return True, []
 
-        rules = json.loads(validation_rules.validation_rules)
         violations = []
 
         for rule in rules:
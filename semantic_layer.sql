@@ -140,6 +140,222 @@ BEGIN
     );
 END;
 
+-- ===========================
+-- Semantic Rules Table
+-- ===========================
+-- Versioned rules (see migrations/001); the rule registry keeps the latest
+-- version of each rule_name.
+CREATE TABLE IF NOT EXISTS semantic_rules_v1 (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    rule_name TEXT NOT NULL,
+    pattern TEXT NOT NULL, -- Store as JSON string for SQLite compatibility
+    actions TEXT NOT NULL, -- Store as JSON string
+    priority INTEGER DEFAULT 0,
+    context TEXT, -- Store as JSON string
+    version INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ===========================
+-- Table Versions for In-Process Caches
+-- ===========================
+-- Bumped on every change so in-memory snapshots (type hierarchy, relation
+-- lookups, rule registry) know when to refresh.
+CREATE TABLE IF NOT EXISTS semantic_table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO semantic_table_versions (table_name, version) VALUES
+('entity_type_hierarchy', 0),
+('relation_types', 0),
+('valid_type_relations', 0),
+('semantic_rules_v1', 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_entity_type_hierarchy_version_insert
+AFTER INSERT ON entity_type_hierarchy
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'entity_type_hierarchy';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entity_type_hierarchy_version_update
+AFTER UPDATE ON entity_type_hierarchy
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'entity_type_hierarchy';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_entity_type_hierarchy_version_delete
+AFTER DELETE ON entity_type_hierarchy
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'entity_type_hierarchy';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relation_types_version_insert
+AFTER INSERT ON relation_types
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'relation_types';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relation_types_version_update
+AFTER UPDATE ON relation_types
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'relation_types';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relation_types_version_delete
+AFTER DELETE ON relation_types
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'relation_types';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_type_relations_version_insert
+AFTER INSERT ON valid_type_relations
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'valid_type_relations';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_type_relations_version_update
+AFTER UPDATE ON valid_type_relations
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'valid_type_relations';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_valid_type_relations_version_delete
+AFTER DELETE ON valid_type_relations
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'valid_type_relations';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_semantic_rules_v1_version_insert
+AFTER INSERT ON semantic_rules_v1
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'semantic_rules_v1';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_semantic_rules_v1_version_update
+AFTER UPDATE ON semantic_rules_v1
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'semantic_rules_v1';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_semantic_rules_v1_version_delete
+AFTER DELETE ON semantic_rules_v1
+BEGIN
+    UPDATE semantic_table_versions SET version = version + 1 WHERE table_name = 'semantic_rules_v1';
+END;
+
+-- ===========================
+-- Materialized Relation Closure
+-- ===========================
+-- relation_changes logs every relation insert and delete so the closure of
+-- transitive, symmetric and inverse relations in derived_relations can be
+-- maintained incrementally (see semantic/closure.py).
+CREATE TABLE IF NOT EXISTS relation_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL CHECK (operation IN ('INSERT', 'DELETE')),
+    relation_type INTEGER NOT NULL,
+    from_entity_id INTEGER NOT NULL,
+    to_entity_id INTEGER NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_relations_changes_insert
+AFTER INSERT ON relations
+BEGIN
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('INSERT', NEW.relation_type, NEW.from_entity_id, NEW.to_entity_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relations_changes_update
+AFTER UPDATE OF relation_type, from_entity_id, to_entity_id ON relations
+BEGIN
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('DELETE', OLD.relation_type, OLD.from_entity_id, OLD.to_entity_id);
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('INSERT', NEW.relation_type, NEW.from_entity_id, NEW.to_entity_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_relations_changes_delete
+AFTER DELETE ON relations
+BEGIN
+    INSERT INTO relation_changes (operation, relation_type, from_entity_id, to_entity_id)
+    VALUES ('DELETE', OLD.relation_type, OLD.from_entity_id, OLD.to_entity_id);
+END;
+
+-- Changes every consumer has applied are deleted; consumers behind
+-- pruned_through rebuild instead of replaying the log.
+CREATE TABLE IF NOT EXISTS relation_changes_pruned (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    pruned_through INTEGER NOT NULL DEFAULT 0 -- relation_changes ids up to this one are deleted
+);
+
+INSERT OR IGNORE INTO relation_changes_pruned (id, pruned_through) VALUES (1, 0);
+
+CREATE TABLE IF NOT EXISTS derived_relations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_entity_id INTEGER NOT NULL,
+    to_entity_id INTEGER NOT NULL,
+    relation_type INTEGER NOT NULL, -- References relation_types(id)
+    rule TEXT NOT NULL, -- 'transitive', 'symmetric' or 'inverse'
+    premises TEXT NOT NULL, -- JSON list of [relation_type, from_entity_id, to_entity_id]
+    depth INTEGER NOT NULL, -- Derivation steps from asserted relations
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(relation_type, from_entity_id, to_entity_id),
+    FOREIGN KEY (from_entity_id) REFERENCES entities(id),
+    FOREIGN KEY (to_entity_id) REFERENCES entities(id),
+    FOREIGN KEY (relation_type) REFERENCES relation_types(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_derived_relations_to ON derived_relations(relation_type, to_entity_id);
+
+-- Asserted and derived relations together
+CREATE VIEW IF NOT EXISTS relation_closure AS
+SELECT from_entity_id, to_entity_id, relation_type, 'asserted' AS rule, 0 AS depth
+FROM relations
+UNION ALL
+SELECT from_entity_id, to_entity_id, relation_type, rule, depth
+FROM derived_relations;
+
+-- ===========================
+-- Graph Analytics
+-- ===========================
+-- PageRank, per-relation-type degree and weakly connected components per
+-- entity, computed over all relations or one semantic_category
+-- (see semantic/analytics.py).
+CREATE TABLE IF NOT EXISTS graph_metrics (
+    entity_id INTEGER NOT NULL,
+    scope TEXT NOT NULL, -- semantic_category the metrics were computed over, or 'all'
+    pagerank REAL NOT NULL,
+    importance REAL NOT NULL, -- PageRank percentile within the scope (0-1)
+    in_degree TEXT NOT NULL, -- JSON {relation_name: count}
+    out_degree TEXT NOT NULL, -- JSON {relation_name: count}
+    component_id INTEGER NOT NULL, -- Smallest entity id in the weakly connected component
+    component_size INTEGER NOT NULL,
+    run_id INTEGER NOT NULL, -- References graph_analytics_runs(id)
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (entity_id, scope),
+    FOREIGN KEY (entity_id) REFERENCES entities(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_graph_metrics_component ON graph_metrics(scope, component_id);
+
+CREATE TABLE IF NOT EXISTS graph_analytics_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scope TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running', -- 'running', 'complete' or 'abandoned'
+    stage TEXT NOT NULL DEFAULT 'pagerank', -- 'pagerank' or 'write'
+    iteration INTEGER NOT NULL DEFAULT 0, -- PageRank iterations done
+    node_count INTEGER NOT NULL,
+    edge_count INTEGER,
+    fingerprint TEXT, -- Digest of entity ids and edges; a run resumes only on the same graph
+    checkpoint BLOB, -- PageRank vector (float64) after the last checkpoint
+    written INTEGER NOT NULL DEFAULT 0, -- Entities (in id order) whose metrics are written
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_graph_analytics_runs_scope ON graph_analytics_runs(scope, status);
+
 -- ===========================
 -- Indexes for Semantic Tables
 -- ===========================
@@ -148,3 +364,4 @@ CREATE INDEX IF NOT EXISTS idx_entity_type_hierarchy_parent ON entity_type_hiera
 CREATE INDEX IF NOT EXISTS idx_entity_type_hierarchy_child ON entity_type_hierarchy(child_type);
 CREATE INDEX IF NOT EXISTS idx_valid_type_relations_from_type ON valid_type_relations(from_type);
 CREATE INDEX IF NOT EXISTS idx_valid_type_relations_to_type ON valid_type_relations(to_type);
+CREATE INDEX IF NOT EXISTS idx_entity_attributes_key_value ON entity_attributes(attribute_key, attribute_value, entity_id);
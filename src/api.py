@@ -1,23 +1,48 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, List
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
 from semantic_core import SemanticCore
 
 app = FastAPI()
 
 # Initialize core
-semantic_core = SemanticCore()
+semantic_core = SemanticCore(
+    write_behind=os.getenv("SEMANTIC_WRITE_BEHIND", "false").lower() == "true",
+    cache_size=int(os.getenv("SEMANTIC_CACHE_SIZE", "0")),
+    cache_ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "300")) or None
+)
+
+# Bounded pool for blocking SQLite work so handlers never block the event loop
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEMANTIC_READ_WORKERS", "4")),
+    thread_name_prefix="semantic-read"
+)
+
+async def run_blocking(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, fn, *args)
+
+@app.on_event("shutdown")
+def shutdown():
+    executor.shutdown(wait=True)
+    semantic_core.close()
 
 # API Models
 class Entity(BaseModel):
     id: str
     attributes: Dict[str, Any]
 
+class EntityBatch(BaseModel):
+    entities: List[Entity]
+
 @app.post("/infer")
 async def infer_types(entity: Entity):
     try:
-        scores = semantic_core.infer_types(entity.dict())
+        scores = await run_blocking(semantic_core.infer_types, entity.dict())
         return {
             "entity_id": entity.id,
             "inferred_types": scores,
@@ -26,15 +51,28 @@ async def infer_types(entity: Entity):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/infer/batch")
+async def infer_types_batch(batch: EntityBatch):
+    try:
+        results = await run_blocking(semantic_core.infer_types_batch, [e.dict() for e in batch.entities])
+        timestamp = datetime.now().isoformat()
+        return {
+            "results": [{
+                "entity_id": entity.id,
+                "inferred_types": scores
+            } for entity, scores in zip(batch.entities, results)],
+            "total": len(results),
+            "timestamp": timestamp
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/patterns")
 async def get_patterns():
-    cursor = semantic_core.conn.cursor()
-    cursor.execute("SELECT id, type, pattern_data, confidence FROM patterns")
-    patterns = cursor.fetchall()
-    
-    return [{
-        "id": p[0],
-        "type": p[1],
-        "pattern_data": json.loads(p[2]),
-        "confidence": p[3]
-    } for p in patterns]
\ No newline at end of file
+    return await run_blocking(semantic_core.get_patterns)
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    if semantic_core.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **semantic_core.cache.stats()}
@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, FrozenSet, Pattern, Tuple, Iterator, List, Mapping
+from collections import defaultdict
+import sqlite3
+import json
+import re
+
+
+@dataclass(frozen=True)
+class CompiledAttributePattern:
+    """An attribute pattern with its regex and value/keyword sets prepared for matching."""
+    name: str
+    value_type: str
+    required: bool
+    weight: int
+    values: Optional[FrozenSet[str]] = None
+    regex: Optional[Pattern] = None
+    keywords: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def compile(cls, name: str, spec: Dict[str, Any]) -> "CompiledAttributePattern":
+        required = bool(spec.get("required", False))
+        values = None
+        if "values" in spec:
+            # Only string values are matched, so non-string entries can never hit
+            values = frozenset(v for v in spec["values"] if isinstance(v, str))
+        keywords = None
+        if "keywords" in spec:
+            keywords = frozenset(kw.lower() for kw in spec["keywords"] if isinstance(kw, str))
+        return cls(
+            name=name,
+            value_type=spec.get("type"),
+            required=required,
+            weight=2 if required else 1,
+            values=values,
+            regex=re.compile(spec["pattern"]) if "pattern" in spec else None,
+            keywords=keywords
+        )
+
+
+@dataclass(frozen=True)
+class CompiledPattern:
+    """A row of the patterns table, parsed and compiled once."""
+    id: str
+    type: str
+    confidence: float
+    attributes: Tuple[CompiledAttributePattern, ...]
+    required: Tuple[str, ...]
+    total_weight: int
+
+    @classmethod
+    def compile(cls, pattern_id: str, pattern_type: str,
+                pattern_data: Dict[str, Any], confidence: float) -> "CompiledPattern":
+        attributes = tuple(
+            CompiledAttributePattern.compile(name, spec)
+            for name, spec in pattern_data.get("attribute_patterns", {}).items()
+        )
+        return cls(
+            id=pattern_id,
+            type=pattern_type,
+            confidence=confidence,
+            attributes=attributes,
+            required=tuple(a.name for a in attributes if a.required),
+            total_weight=sum(a.weight for a in attributes)
+        )
+
+
+class CompiledPatternSet:
+    """Immutable snapshot of the patterns table at a given version."""
+
+    def __init__(self, patterns: Tuple[CompiledPattern, ...], version: int):
+        self.patterns = patterns
+        self.version = version
+        
+        # Inverted index: required attribute name -> positions of patterns requiring it
+        self._required_index: Dict[str, List[int]] = defaultdict(list)
+        self._unconstrained: List[int] = []
+        for position, pattern in enumerate(patterns):
+            if not pattern.required:
+                self._unconstrained.append(position)
+            for name in pattern.required:
+                self._required_index[name].append(position)
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection, version: int) -> "CompiledPatternSet":
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, type, pattern_data, confidence FROM patterns")
+        patterns = tuple(
+            CompiledPattern.compile(pattern_id, pattern_type, json.loads(pattern_data), confidence)
+            for pattern_id, pattern_type, pattern_data, confidence in cursor.fetchall()
+        )
+        return cls(patterns, version)
+
+    def candidates(self, attributes: Mapping[str, Any]) -> List[CompiledPattern]:
+        """Patterns whose required attributes are all present, in table order."""
+        hits: Dict[int, int] = defaultdict(int)
+        for name in attributes:
+            for position in self._required_index.get(name, ()):
+                hits[position] += 1
+        
+        positions = [
+            position for position, count in hits.items()
+            if count == len(self.patterns[position].required)
+        ]
+        positions.extend(self._unconstrained)
+        return [self.patterns[position] for position in sorted(positions)]
+
+    def __iter__(self) -> Iterator[CompiledPattern]:
+        return iter(self.patterns)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
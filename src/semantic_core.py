@@ -1,19 +1,74 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 import sqlite3
 import json
-import re
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from pattern_set import CompiledPatternSet, CompiledPattern, CompiledAttributePattern
+from write_behind import WriteBehindBuffer
+from inference_cache import InferenceCache, attribute_fingerprint
 
 class SemanticCore:
-    def __init__(self):
-        self.conn = sqlite3.connect("semantic.db")
+    def __init__(self, db_path: str = "semantic.db", write_behind: bool = False,
+                 write_behind_options: Optional[Dict[str, Any]] = None,
+                 cache_size: int = 0, cache_ttl: Optional[float] = None):
+        self.db_path = db_path
+        # Scores keyed by (pattern set version, attribute fingerprint); disabled when cache_size is 0
+        self.cache: Optional[InferenceCache] = InferenceCache(cache_size, cache_ttl) if cache_size > 0 else None
+        # Used for schema setup; request-path reads and writes use their own connections
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._pattern_set: Optional[CompiledPatternSet] = None
+        self._pattern_lock = threading.Lock()
         self.setup_database()
         self.initialize_patterns()
+        
+        # Reads use one connection per thread; all writes go through a single writer thread
+        self._local = threading.local()
+        self._read_conns: List[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic-writer")
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        
+        # Optional write-behind for semantic_metadata
+        self._write_buffer: Optional[WriteBehindBuffer] = None
+        if write_behind:
+            self._write_buffer = WriteBehindBuffer(self._flush_inferences, **(write_behind_options or {}))
+
+    def close(self):
+        """Flush pending writes and close database connections.
+
+        Connections are closed even if the final write-behind flush fails.
+        """
+        write_buffer, self._write_buffer = self._write_buffer, None
+        try:
+            if write_buffer is not None:
+                write_buffer.close()
+        finally:
+            if self._writer_conn is not None:
+                self._writer.submit(self._writer_conn.close).result()
+            self._writer.shutdown(wait=True)
+            with self._read_conns_lock:
+                for conn in self._read_conns:
+                    conn.close()
+                self._read_conns.clear()
+            self.conn.close()
+
+    def _read_conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only used from the owning thread; check_same_thread is off so close() can reach it
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._read_conns_lock:
+                self._read_conns.append(conn)
+        return conn
     
     def setup_database(self):
         cursor = self.conn.cursor()
+        # WAL lets readers proceed while the writer thread commits
+        cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS patterns (
             id TEXT PRIMARY KEY,
@@ -29,6 +84,21 @@ class SemanticCore:
             attribute_patterns TEXT,
             last_updated TEXT
         )''')
+        
+        # Bumped by triggers on every change to patterns so the compiled set can be reused
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pattern_set_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )''')
+        cursor.execute("INSERT OR IGNORE INTO pattern_set_version (id, version) VALUES (1, 0)")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_patterns_version_{event.lower()}
+            AFTER {event} ON patterns
+            BEGIN
+                UPDATE pattern_set_version SET version = version + 1 WHERE id = 1;
+            END''')
         self.conn.commit()
     
     def initialize_patterns(self):
@@ -65,56 +135,102 @@ class SemanticCore:
             )
         self.conn.commit()
 
+    def get_pattern_set(self) -> CompiledPatternSet:
+        """Return the compiled pattern set, recompiling only if the patterns table changed."""
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT version FROM pattern_set_version WHERE id = 1")
+        version = cursor.fetchone()[0]
+        
+        pattern_set = self._pattern_set
+        if pattern_set is None or pattern_set.version != version:
+            with self._pattern_lock:
+                pattern_set = self._pattern_set
+                if pattern_set is None or pattern_set.version != version:
+                    pattern_set = CompiledPatternSet.load(self._read_conn(), version)
+                    self._pattern_set = pattern_set
+        return pattern_set
+
+    def get_patterns(self) -> List[Dict[str, Any]]:
+        cursor = self._read_conn().cursor()
+        cursor.execute("SELECT id, type, pattern_data, confidence FROM patterns")
+        return [{
+            "id": p[0],
+            "type": p[1],
+            "pattern_data": json.loads(p[2]),
+            "confidence": p[3]
+        } for p in cursor.fetchall()]
+
     def infer_types(self, entity: Dict[str, Any]) -> Dict[str, float]:
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT type, pattern_data, confidence FROM patterns")
-        patterns = cursor.fetchall()
+        scores = self._score_entity(entity, self.get_pattern_set())
+        
+        if entity.get("id"):
+            self._store_inference(entity["id"], scores)
+        
+        return scores
+
+    def infer_types_batch(self, entities: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        """Score many entities against one pattern set and persist them in a single transaction."""
+        pattern_set = self.get_pattern_set()
+        results = [self._score_entity(entity, pattern_set) for entity in entities]
+        
+        self._store_inferences([
+            (entity["id"], scores)
+            for entity, scores in zip(entities, results)
+            if entity.get("id")
+        ])
+        
+        return results
+
+    def _score_entity(self, entity: Dict[str, Any], pattern_set: CompiledPatternSet) -> Dict[str, float]:
+        attributes = entity.get("attributes", {})
+        cache_key = None
+        if self.cache is not None:
+            cache_key = (pattern_set.version, attribute_fingerprint(attributes))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
         
         scores = {}
-        for pattern_type, pattern_data, confidence in patterns:
-            pattern = json.loads(pattern_data)
+        for pattern in pattern_set.candidates(attributes):
             match_score = self._match_pattern(entity, pattern)
             if match_score > 0:
-                scores[pattern_type] = match_score * confidence
-        
-        if entity.get("id"):
-            self._store_inference(entity["id"], scores)
+                scores[pattern.type] = match_score * pattern.confidence
         
+        if cache_key is not None:
+            self.cache.put(cache_key, dict(scores))
         return scores
     
-    def _match_pattern(self, entity: Dict[str, Any], pattern: Dict[str, Any]) -> float:
+    def _match_pattern(self, entity: Dict[str, Any], pattern: CompiledPattern) -> float:
         attributes = entity.get("attributes", {})
-        attr_patterns = pattern["attribute_patterns"]
+        
+        # Reject on a missing required attribute before any value matching
+        for name in pattern.required:
+            if name not in attributes:
+                return 0.0
         
         matches = 0
-        total_weight = 0
         
-        for attr_name, attr_pattern in attr_patterns.items():
-            weight = 2 if attr_pattern.get("required", False) else 1
-            total_weight += weight
-            
-            if attr_name not in attributes:
-                if attr_pattern.get("required", False):
-                    return 0.0
+        for attr_pattern in pattern.attributes:
+            if attr_pattern.name not in attributes:
                 continue
             
-            attr_value = attributes[attr_name]
+            attr_value = attributes[attr_pattern.name]
             match_score = self._match_value(attr_value, attr_pattern)
-            matches += match_score * weight
+            matches += match_score * attr_pattern.weight
         
-        return matches / total_weight if total_weight > 0 else 0.0
+        return matches / pattern.total_weight if pattern.total_weight > 0 else 0.0
     
-    def _match_value(self, value: Any, pattern: Dict[str, Any]) -> float:
-        if pattern["type"] == "string" and isinstance(value, str):
+    def _match_value(self, value: Any, pattern: CompiledAttributePattern) -> float:
+        if pattern.value_type == "string" and isinstance(value, str):
             score = 1.0
             
-            if "values" in pattern and value not in pattern["values"]:
+            if pattern.values is not None and value not in pattern.values:
                 score *= 0.5
             
-            if "pattern" in pattern and not re.match(pattern["pattern"], value):
+            if pattern.regex is not None and not pattern.regex.match(value):
                 score *= 0.5
             
-            if "keywords" in pattern and any(kw in value.lower() for kw in pattern["keywords"]):
+            if pattern.keywords and any(kw in value.lower() for kw in pattern.keywords):
                 score *= 1.2
             
             return min(score, 1.0)
@@ -122,9 +238,40 @@ class SemanticCore:
         return 0.0
     
     def _store_inference(self, entity_id: str, scores: Dict[str, float]):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO semantic_metadata (entity_id, inferred_types, last_updated) VALUES (?, ?, ?)",
-            (entity_id, json.dumps(scores), datetime.now().isoformat())
-        )
-        self.conn.commit()
\ No newline at end of file
+        if self._write_buffer is not None:
+            self._write_buffer.put(entity_id, (json.dumps(scores), datetime.now().isoformat()))
+            return
+        
+        self._writer.submit(
+            self._execute_write,
+            [(entity_id, json.dumps(scores), datetime.now().isoformat())]
+        ).result()
+
+    def _store_inferences(self, inferences: List[Tuple[str, Dict[str, float]]]):
+        if not inferences:
+            return
+        timestamp = datetime.now().isoformat()
+        rows = [(entity_id, json.dumps(scores), timestamp) for entity_id, scores in inferences]
+        
+        if self._write_buffer is not None:
+            self._write_buffer.put_many([(entity_id, (inferred, ts)) for entity_id, inferred, ts in rows])
+            return
+        
+        self._writer.submit(self._execute_write, rows).result()
+
+    def _flush_inferences(self, pending: List[Tuple[str, Tuple[str, str]]]):
+        rows = [(entity_id, inferred, ts) for entity_id, (inferred, ts) in pending]
+        self._writer.submit(self._execute_write, rows).result()
+
+    def _execute_write(self, rows: List[Tuple[str, str, str]]):
+        # Runs on the writer thread, which owns the only writing connection
+        if self._writer_conn is None:
+            self._writer_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._write_inferences(self._writer_conn, rows)
+
+    def _write_inferences(self, conn: sqlite3.Connection, rows: List[Tuple[str, str, str]]):
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO semantic_metadata (entity_id, inferred_types, last_updated) VALUES (?, ?, ?)",
+                rows
+            )
\ No newline at end of file
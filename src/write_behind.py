@@ -0,0 +1,146 @@
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Bounded write-behind queue that coalesces writes per key.
+
+    Writes are flushed from a background thread once ``flush_size`` keys are
+    pending or ``flush_interval`` seconds have passed. Repeated writes for the
+    same key replace each other, so only the latest value is flushed. When
+    ``max_pending`` keys are queued, ``put`` blocks until the next flush frees
+    space (or raises ``queue.Full`` after ``timeout``).
+
+    A failed flush is re-queued (behind newer writes for the same keys) and
+    retried up to ``max_retries`` times, backing off from ``retry_backoff``
+    seconds. A batch that still fails is dropped and its error is raised from
+    the next ``flush`` or ``close``.
+    """
+
+    def __init__(self, flush: Callable[[List[Tuple[Hashable, Any]]], None],
+                 max_pending: int = 10000, flush_size: int = 500, flush_interval: float = 1.0,
+                 max_retries: int = 3, retry_backoff: float = 0.1):
+        if flush_size > max_pending:
+            raise ValueError("flush_size must not exceed max_pending")
+        self.max_pending = max_pending
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._flush = flush
+        self._pending: Dict[Hashable, Any] = {}
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._closed = False
+        self._cycles_started = 0
+        self._cycles_done = 0
+        self._retrying = False
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, key: Hashable, value: Any, timeout: Optional[float] = None):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            if key not in self._pending:
+                has_space = self._cond.wait_for(
+                    lambda: self._closed or len(self._pending) < self.max_pending,
+                    timeout
+                )
+                if not has_space:
+                    raise queue.Full(f"Write-behind buffer full ({self.max_pending} pending)")
+                if self._closed:
+                    raise RuntimeError("Write-behind buffer is closed")
+            self._pending[key] = value
+            if len(self._pending) >= self.flush_size:
+                self._cond.notify_all()
+
+    def put_many(self, items: List[Tuple[Hashable, Any]], timeout: Optional[float] = None):
+        for key, value in items:
+            self.put(key, value, timeout)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self):
+        """Block until everything queued before this call has been flushed or dropped.
+
+        Raises the error of a batch dropped since the last ``flush``/``close``.
+        """
+        with self._cond:
+            target = self._cycles_started + 1
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: (self._cycles_done >= target and not self._retrying) or not self._thread.is_alive()
+            )
+            self._raise_error()
+
+    def close(self):
+        """Flush remaining writes and stop the background thread.
+
+        Raises the error of a batch dropped since the last ``flush``/``close``.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._cond:
+            self._raise_error()
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._cond:
+                if failures:
+                    # Back off before retrying, whatever else is requested meanwhile
+                    self._cond.wait_for(lambda: False, self.retry_backoff * 2 ** (failures - 1))
+                else:
+                    self._cond.wait_for(
+                        lambda: self._closed or self._flush_requested or len(self._pending) >= self.flush_size,
+                        self.flush_interval
+                    )
+                batch, self._pending = self._pending, {}
+                closing = self._closed
+                self._flush_requested = False
+                self._cycles_started += 1
+                self._cond.notify_all()
+
+            error = None
+            if batch:
+                try:
+                    self._flush(list(batch.items()))
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    if failures > self.max_retries:
+                        logger.exception("Write-behind flush of %d entries failed, dropping them", len(batch))
+                        error, failures = e, 0
+                    else:
+                        logger.warning("Write-behind flush of %d entries failed (attempt %d), retrying",
+                                       len(batch), failures, exc_info=True)
+
+            with self._cond:
+                if failures:
+                    # Writes queued since the batch was taken are newer and win
+                    batch.update(self._pending)
+                    self._pending = batch
+                if error is not None:
+                    self._error = error
+                self._retrying = failures > 0
+                self._cycles_done += 1
+                self._cond.notify_all()
+
+            if closing and not failures:
+                return
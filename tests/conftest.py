@@ -0,0 +1,48 @@
+import importlib
+import sys
+import types
+import pytest
+from sqlalchemy import JSON, Column, DateTime, Float, String
+from sqlalchemy.orm import declarative_base
+
+def _models_module():
+    """semantic_metadata / semantic_patterns models matching alembic/versions/initial.py."""
+    Base = declarative_base()
+
+    class SemanticMetadata(Base):
+        __tablename__ = 'semantic_metadata'
+        entity_id = Column(String, primary_key=True)
+        inferred_types = Column(JSON)
+        derived_attributes = Column(JSON)
+        type_hierarchy = Column(JSON)
+        relationship_patterns = Column(JSON)
+        suggested_relations = Column(JSON)
+        last_updated = Column(DateTime)
+        confidence_score = Column(Float)
+        provenance = Column(JSON)
+
+    class SemanticPattern(Base):
+        __tablename__ = 'semantic_patterns'
+        id = Column(String, primary_key=True)
+        pattern_type = Column(String)
+        pattern_data = Column(JSON)
+        confidence = Column(Float)
+        examples = Column(JSON)
+        last_applied = Column(DateTime)
+        success_rate = Column(Float)
+
+    module = types.ModuleType('semantic.models')
+    module.Base, module.SemanticMetadata, module.SemanticPattern = Base, SemanticMetadata, SemanticPattern
+    return module
+
+@pytest.fixture
+def engine_module(monkeypatch):
+    # semantic.models is not part of this tree; fall back to models built from the migration
+    try:
+        importlib.import_module('semantic.models')
+    except ImportError:
+        monkeypatch.setitem(sys.modules, 'semantic.models', _models_module())
+    monkeypatch.delitem(sys.modules, 'semantic.engine', raising=False)
+    module = importlib.import_module('semantic.engine')
+    monkeypatch.setitem(sys.modules, 'semantic.engine', module)
+    return module
@@ -0,0 +1,64 @@
+import itertools
+import random
+import pytest
+from semantic.closure import RelationClosure
+
+EXTENDS, PEER, CONTAINS, PART_OF = 1, 2, 3, 4
+
+@pytest.fixture
+def closure():
+    c = RelationClosure()
+    c.configure(transitive={EXTENDS, PEER}, symmetric={PEER}, inverse={CONTAINS: PART_OF})
+    return c
+
+def naive_closure(closure, asserted):
+    facts = set(asserted)
+    while True:
+        new = set()
+        for rel, a, b in facts:
+            if rel in closure.symmetric:
+                new.add((rel, b, a))
+            if rel in closure.inverse:
+                new.add((closure.inverse[rel], b, a))
+        for (r1, a, b), (r2, c, d) in itertools.product(facts, facts):
+            if r1 == r2 and r1 in closure.transitive and b == c:
+                new.add((r1, a, d))
+        new = {f for f in new if f[1] != f[2]} - facts
+        if not new:
+            return facts - set(asserted)
+        facts |= new
+
+def test_transitive_chain_records_provenance(closure):
+    added, removed = closure.add_relations([(EXTENDS, 1, 2), (EXTENDS, 2, 3)])
+    assert set(added) == {(EXTENDS, 1, 3)}
+    assert added[(EXTENDS, 1, 3)].rule == 'transitive'
+    assert added[(EXTENDS, 1, 3)].premises == ((EXTENDS, 1, 2), (EXTENDS, 2, 3))
+    assert not removed
+
+def test_symmetric_and_inverse(closure):
+    added, _ = closure.add_relations([(PEER, 1, 2), (CONTAINS, 5, 6)])
+    assert set(added) == {(PEER, 2, 1), (PART_OF, 6, 5)}
+
+def test_delete_rederives_alternative_paths(closure):
+    closure.add_relations([(EXTENDS, 1, 2), (EXTENDS, 2, 4), (EXTENDS, 1, 3), (EXTENDS, 3, 4)])
+    added, removed = closure.remove_relations([(EXTENDS, 1, 2)])
+    assert closure.holds((EXTENDS, 1, 4))
+    assert not removed
+    assert added[(EXTENDS, 1, 4)].premises == ((EXTENDS, 1, 3), (EXTENDS, 3, 4))
+
+def test_duplicate_rows_keep_fact_asserted(closure):
+    closure.add_relations([(EXTENDS, 1, 2), (EXTENDS, 1, 2), (EXTENDS, 2, 3)])
+    closure.remove_relations([(EXTENDS, 1, 2)])
+    assert closure.holds((EXTENDS, 1, 3))
+
+def test_incremental_matches_naive_closure(closure):
+    rng = random.Random(3)
+    asserted = []
+    for _ in range(300):
+        fact = (rng.choice([EXTENDS, PEER, CONTAINS, PART_OF]), rng.randrange(8), rng.randrange(8))
+        if asserted and rng.random() < 0.4:
+            closure.remove_relations([asserted.pop(rng.randrange(len(asserted)))])
+        else:
+            asserted.append(fact)
+            closure.add_relations([fact])
+        assert set(closure.derived) == naive_closure(closure, asserted)
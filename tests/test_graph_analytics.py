@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import sqlite3
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from mcp.operations import MCPOperations
+from semantic.analytics import GraphAnalytics, weakly_connected_components
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "graph.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(open(os.path.join(ROOT, "schema.sql")).read())
+    conn.executescript("""
+        CREATE TABLE relation_types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            relation_name TEXT NOT NULL UNIQUE,
+            semantic_category TEXT NOT NULL
+        );
+        INSERT INTO relation_types (relation_name, semantic_category)
+        VALUES ('uses', 'dependency'), ('extends', 'inheritance');
+    """)
+    for migration in ("008_graph_analytics.sql", "011_graph_analytics_fingerprint.sql"):
+        conn.executescript(open(os.path.join(ROOT, "migrations", migration)).read())
+    # 1 -> 2 -> 3 -> 1 cycle plus 4 -> 3, and an isolated pair 5 - 6
+    conn.executemany("INSERT INTO entities (id, name, entity_type) VALUES (?, ?, 'Class')",
+                     [(i, f"node{i}") for i in range(1, 8)])
+    conn.executemany("INSERT INTO relations (from_entity_id, to_entity_id, relation_type) VALUES (?, ?, ?)",
+                     [(1, 2, 1), (2, 3, 1), (3, 1, 1), (4, 3, 1), (5, 6, 2)])
+    conn.commit()
+    conn.close()
+    return path
+
+def run(db_path, operation):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await operation(session)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def metrics(db_path, scope="all"):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM graph_metrics WHERE scope = ? ORDER BY entity_id", (scope,)).fetchall()
+    conn.close()
+    return {row["entity_id"]: row for row in rows}
+
+def test_pagerank_degrees_and_components(db_path):
+    summary = run(db_path, lambda db: GraphAnalytics(db).run())
+    assert summary["nodes"] == 7 and summary["edges"] == 5 and summary["components"] == 3
+
+    rows = metrics(db_path)
+    assert sum(row["pagerank"] for row in rows.values()) == pytest.approx(1.0)
+    assert max(rows, key=lambda i: rows[i]["pagerank"]) == 3
+    assert json.loads(rows[3]["in_degree"]) == {"uses": 2}
+    assert json.loads(rows[3]["out_degree"]) == {"uses": 1}
+    assert [rows[i]["component_id"] for i in range(1, 8)] == [1, 1, 1, 1, 5, 5, 7]
+    assert rows[1]["component_size"] == 4 and rows[7]["component_size"] == 1
+
+def test_category_scope(db_path):
+    run(db_path, lambda db: GraphAnalytics(db, category="inheritance").run())
+    rows = metrics(db_path, "inheritance")
+    assert json.loads(rows[6]["in_degree"]) == {"extends": 1}
+    assert json.loads(rows[3]["in_degree"]) == {}
+    assert rows[1]["component_size"] == 1
+    assert metrics(db_path) == {}
+
+class Interrupted(Exception):
+    pass
+
+def interrupt_after_first_batch(db_path):
+    async def interrupt(db):
+        analytics = GraphAnalytics(db, max_iterations=1000, tolerance=0.0, checkpoint_every=5, write_batch=3)
+        update_run = analytics._update_run
+
+        async def fail_after_first_batch(run, **changes):
+            await update_run(run, **changes)
+            if run["written"]:
+                await db.commit()
+                raise Interrupted()
+        analytics._update_run = fail_after_first_batch
+        await analytics.run()
+
+    with pytest.raises(Interrupted):
+        run(db_path, interrupt)
+    assert len(metrics(db_path)) == 3
+
+def test_interrupted_run_resumes(db_path):
+    interrupt_after_first_batch(db_path)
+    summary = run(db_path, lambda db: GraphAnalytics(db, max_iterations=1000, tolerance=0.0).run())
+    conn = sqlite3.connect(db_path)
+    runs = conn.execute("SELECT status, iteration FROM graph_analytics_runs").fetchall()
+    conn.close()
+    # The interrupted run finished where it left off rather than starting over
+    assert runs == [("complete", 1000)]
+    assert summary["iterations"] == 1000
+    assert len(metrics(db_path)) == 7
+
+def test_weakly_connected_components_long_chain():
+    sources = np.arange(1, 500)
+    targets = np.arange(0, 499)
+    labels = weakly_connected_components(sources[::-1], targets[::-1], 501)
+    assert set(labels[:500]) == {0} and labels[500] == 500
+
+def test_search_boosted_by_importance(db_path):
+    run(db_path, lambda db: GraphAnalytics(db).run())
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE entities SET name = 'widget' || id")
+    conn.commit()
+    conn.close()
+
+    plain = run(db_path, lambda db: MCPOperations(db).search("widget", snippets=0))
+    boosted = run(db_path, lambda db: MCPOperations(db).search("widget", snippets=0, importance_weight=1.0))
+    assert [r["id"] for r in plain][0] == 1
+    assert [r["id"] for r in boosted][0] == 3
+    short = run(db_path, lambda db: MCPOperations(db).search("wi", importance_weight=1.0))
+    assert [r["id"] for r in short][0] == 3
+
+def test_run_restarts_when_edges_changed(db_path):
+    interrupt_after_first_batch(db_path)
+    # Same entity and edge counts, different graph
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE relations SET to_entity_id = 7 WHERE from_entity_id = 4")
+    conn.commit()
+    conn.close()
+
+    summary = run(db_path, lambda db: GraphAnalytics(db, max_iterations=1000, tolerance=0.0).run())
+    conn = sqlite3.connect(db_path)
+    runs = conn.execute("SELECT status, iteration FROM graph_analytics_runs ORDER BY id").fetchall()
+    conn.close()
+    assert [status for status, _ in runs] == ["abandoned", "complete"]
+    assert summary["components"] == 3
+    assert metrics(db_path)[7]["component_size"] == 2
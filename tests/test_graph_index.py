@@ -0,0 +1,137 @@
+import asyncio
+import os
+import random
+import sqlite3
+from collections import deque
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from semantic.graph_index import GraphIndex
+from semantic.relation_changes import get_change_watermark, prune_relation_changes
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+USES, EXTENDS, IMPLEMENTS = 1, 2, 3
+
+@pytest.fixture
+def graph():
+    g = GraphIndex(min_compact=4)
+    g.categories = {USES: 'dependency', EXTENDS: 'inheritance', IMPLEMENTS: 'inheritance'}
+    g.relation_ids = {'uses': USES, 'extends': EXTENDS, 'implements': IMPLEMENTS}
+    g.load([(EXTENDS, 1, 2), (IMPLEMENTS, 2, 3), (USES, 1, 4), (USES, 4, 5), (EXTENDS, 6, 1)])
+    return g
+
+def test_k_hop_and_directions(graph):
+    assert graph.k_hop(1, 1) == {1: 0, 2: 1, 4: 1}
+    assert graph.k_hop(1, 2) == {1: 0, 2: 1, 4: 1, 3: 2, 5: 2}
+    assert graph.k_hop(1, 1, direction='in') == {1: 0, 6: 1}
+    assert graph.k_hop(1, 1, direction='both') == {1: 0, 2: 1, 4: 1, 6: 1}
+
+def test_reachability_by_category(graph):
+    assert graph.reachable(1, category='inheritance') == {2, 3}
+    assert graph.reachable(6, relation_types=['extends']) == {1, 2}
+    assert graph.reachable(3, category='inheritance', direction='in') == {2, 1, 6}
+
+def test_shortest_path_and_subgraph(graph):
+    assert graph.shortest_path(6, 5) == [6, 1, 4, 5]
+    assert graph.shortest_path(6, 5, category='inheritance') is None
+    assert sorted(graph.subgraph([1, 2, 3, 6])) == [(EXTENDS, 1, 2), (EXTENDS, 6, 1), (IMPLEMENTS, 2, 3)]
+
+def test_overlay_and_compaction_match_rebuild(graph):
+    rng = random.Random(5)
+    edges = {(EXTENDS, 1, 2), (IMPLEMENTS, 2, 3), (USES, 1, 4), (USES, 4, 5), (EXTENDS, 6, 1)}
+    for _ in range(200):
+        edge = (rng.choice([USES, EXTENDS]), rng.randrange(12), rng.randrange(12))
+        if edge in edges and rng.random() < 0.5:
+            edges.discard(edge)
+            graph.remove_edges([edge])
+        else:
+            edges.add(edge)
+            graph.add_edges([edge])
+        start = rng.randrange(12)
+        assert graph.reachable(start) == bfs(edges, start)
+    assert graph.edge_count == len(edges)
+
+def bfs(edges, start):
+    seen, queue = {start}, deque([start])
+    while queue:
+        node = queue.popleft()
+        for _, a, b in edges:
+            if a == node and b not in seen:
+                seen.add(b)
+                queue.append(b)
+    return seen - {start}
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "graph.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(open(os.path.join(ROOT, "schema.sql")).read())
+    conn.executescript("""
+        CREATE TABLE relation_types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            relation_name TEXT NOT NULL UNIQUE,
+            semantic_category TEXT NOT NULL
+        );
+        INSERT INTO relation_types (relation_name, semantic_category) VALUES ('uses', 'dependency');
+        CREATE TABLE semantic_table_versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);
+        INSERT INTO semantic_table_versions VALUES ('relation_types', 0);
+    """)
+    for migration in ("005_derived_relations.sql", "010_relation_change_pruning.sql"):
+        conn.executescript(open(os.path.join(ROOT, "migrations", migration)).read())
+    conn.executemany("INSERT INTO entities (id, name, entity_type) VALUES (?, ?, 'Class')",
+                     [(i, f"node{i}") for i in range(1, 6)])
+    conn.commit()
+    conn.close()
+    return path
+
+def relate(db_path, *pairs, delete=False):
+    conn = sqlite3.connect(db_path)
+    statement = ("DELETE FROM relations WHERE relation_type = ? AND from_entity_id = ? AND to_entity_id = ?"
+                 if delete else "INSERT INTO relations (relation_type, from_entity_id, to_entity_id) VALUES (?, ?, ?)")
+    conn.executemany(statement, [(USES, a, b) for a, b in pairs])
+    conn.commit()
+    conn.close()
+
+def on_session(db_path, operation):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await operation(session)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def test_refresh_replays_changes_and_rebuilds_after_pruning(db_path):
+    index, stale = GraphIndex(), GraphIndex()
+    relate(db_path, (1, 2), (2, 3))
+    on_session(db_path, index.refresh)
+    on_session(db_path, stale.refresh)
+
+    relate(db_path, (3, 4))
+    relate(db_path, (1, 2), delete=True)
+    on_session(db_path, index.refresh)
+    assert index.reachable(2) == {3, 4} and index.reachable(1) == set()
+
+    assert on_session(db_path, lambda db: prune_relation_changes(db, index.watermark, min_rows=10)) == 0
+    assert on_session(db_path, lambda db: prune_relation_changes(db, index.watermark, min_rows=1)) == 4
+    # The watermark does not move back once the log is empty
+    assert on_session(db_path, get_change_watermark) == index.watermark == 4
+
+    # The changes this index had not read are gone, so it reloads from relations
+    relate(db_path, (4, 5))
+    on_session(db_path, stale.refresh)
+    assert stale.reachable(1) == set() and stale.reachable(2) == {3, 4, 5}
+    on_session(db_path, index.refresh)
+    assert index.reachable(2) == {3, 4, 5}
+
+def test_incremental_refresh_leaves_rebuilds_pending(db_path):
+    index = GraphIndex()
+    relate(db_path, (1, 2))
+    on_session(db_path, lambda db: index.refresh(db, rebuild=False))
+    assert index.rebuild_pending and index.watermark is None and index.edge_count == 0
+
+    on_session(db_path, index.refresh)
+    relate(db_path, (2, 3))
+    on_session(db_path, lambda db: index.refresh(db, rebuild=False))
+    assert not index.rebuild_pending and index.reachable(1) == {2, 3}
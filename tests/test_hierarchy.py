@@ -0,0 +1,31 @@
+import pytest
+from semantic.hierarchy import TypeHierarchy
+
+@pytest.fixture
+def hierarchy():
+    h = TypeHierarchy()
+    for parent, child in [("Pattern", "CorePattern"), ("Implementation", "CorePattern"),
+                          ("Artifact", "Pattern"), ("Thing", "Artifact")]:
+        h.add_edge(parent, child)
+    return h
+
+def test_ancestors_with_depth(hierarchy):
+    assert hierarchy.ancestors("CorePattern") == {
+        "Pattern": 1, "Implementation": 1, "Artifact": 2, "Thing": 3
+    }
+    assert hierarchy.ancestors("CorePattern", max_depth=2) == {
+        "Pattern": 1, "Implementation": 1, "Artifact": 2
+    }
+
+def test_add_edge_updates_existing_descendants(hierarchy):
+    hierarchy.add_edge("Root", "Thing")
+    assert hierarchy.ancestors("CorePattern")["Root"] == 4
+    hierarchy.add_edge("Root", "Pattern")
+    assert hierarchy.ancestors("CorePattern")["Root"] == 2
+
+def test_remove_edge_drops_unreachable_ancestors(hierarchy):
+    hierarchy.remove_edge("Artifact", "Pattern")
+    assert hierarchy.ancestors("CorePattern") == {"Pattern": 1, "Implementation": 1}
+    assert hierarchy.ancestors("Artifact") == {"Thing": 1}
+    assert hierarchy.is_a("CorePattern", "Implementation")
+    assert not hierarchy.is_a("CorePattern", "Thing")
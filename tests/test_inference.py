@@ -0,0 +1,83 @@
+import asyncio
+from semantic.hierarchy import TypeHierarchy
+from semantic.inference import SemanticInferenceEngine
+from semantic.rete import RuleNetworkCache
+
+RULES = [
+    {'id': 1, 'rule_name': 'component-uses-core', 'priority': 0,
+     'pattern': {'target_type': 'Component'},
+     'actions': [{'type': 'infer_relation', 'relation_type': 'depends_on', 'to_id': 'core'}]},
+]
+
+class Hierarchy(TypeHierarchy):
+    """A loaded hierarchy that never changes."""
+
+    def __init__(self, edges):
+        super().__init__()
+        self.version = 1
+        for parent, child in edges:
+            self.add_edge(parent, child)
+
+    async def refresh(self, db):
+        return self
+
+class Rules:
+    """Stands in for RuleRegistry, counting refreshes and bucket lookups."""
+
+    def __init__(self, rules):
+        self.version = 1
+        self.rules = rules
+        self.refreshes = 0
+        self.lookups = []
+
+    async def refresh(self, db):
+        self.refreshes += 1
+        return self
+
+    def for_target_types(self, target_types):
+        self.lookups.append(sorted(target_types))
+        return [r for r in self.rules if r['pattern']['target_type'] in target_types]
+
+class Engine(SemanticInferenceEngine):
+    async def _infer_relation(self, entity, action, context):
+        # Every entity of a module infers the same relation
+        return {'from_id': entity['module'], 'type': action['relation_type'], 'to_id': action['to_id']}
+
+ENTITIES = [
+    {'id': 1, 'entity_type': 'Service', 'module': 'm1'},
+    {'id': 2, 'entity_type': 'Library', 'module': 'm2'},
+    {'id': 3, 'entity_type': 'Service', 'module': 'm2'},
+]
+
+def engine(rules):
+    hierarchy = Hierarchy([('Component', 'Service'), ('Component', 'Library')])
+    return Engine(db=None, hierarchy=hierarchy, rules=rules, networks=RuleNetworkCache())
+
+def inferred(result):
+    return [(r['from_id'], r['type'], r['to_id']) for r in result.inferred_relations]
+
+def test_iter_infer_relations_streams_one_type_at_a_time():
+    rules = Rules(RULES)
+
+    async def collect():
+        return [(index, inferred(result))
+                async for index, result in engine(rules).iter_infer_relations(ENTITIES)]
+
+    assert asyncio.run(collect()) == [
+        (0, [('m1', 'depends_on', 'core')]),
+        (2, [('m2', 'depends_on', 'core')]),
+        (1, []),
+    ]
+    # Rules refreshed once; one rule lookup (and network) per entity type
+    assert rules.refreshes == 1
+    assert rules.lookups == [['Component'], ['Component']]
+
+def test_infer_relations_batch_keeps_input_order_and_dedups_across_groups():
+    results = asyncio.run(engine(Rules(RULES)).infer_relations_batch(ENTITIES))
+    # m2's relation went to the Service processed before the Library
+    assert [inferred(r) for r in results] == [
+        [('m1', 'depends_on', 'core')],
+        [],
+        [('m2', 'depends_on', 'core')],
+    ]
+    assert results[2].inferred_relations[0]['confidence'] == 0.8
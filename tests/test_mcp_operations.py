@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+import sqlite3
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from mcp import operations
+from mcp.operations import MCPOperations
+
+SCHEMA = os.path.join(os.path.dirname(__file__), "..", "schema.sql")
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "graph.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(open(SCHEMA).read())
+    conn.executescript("""
+        CREATE TABLE relation_types (id INTEGER PRIMARY KEY AUTOINCREMENT, relation_name TEXT NOT NULL UNIQUE);
+        INSERT INTO relation_types (relation_name) VALUES ('uses'), ('extends');
+    """)
+    conn.close()
+    return path
+
+def run(db_path, operation):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await operation(MCPOperations(session))
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def test_bulk_entities_return_ids_in_input_order(db_path):
+    entities = [
+        {"name": "b", "entityType": "Class", "observations": ["first"]},
+        {"name": "a", "entityType": "Class"},
+        {"name": "b", "entityType": "Class", "observations": ["second"]},
+    ]
+    result = run(db_path, lambda ops: ops.bulk_create_entities(entities, chunk_size=2))
+    conn = sqlite3.connect(db_path)
+    ids = dict(conn.execute("SELECT name, id FROM entities"))
+    assert result["ids"] == [ids["b"], ids["a"], ids["b"]]
+    assert conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0] == 2
+
+    again = run(db_path, lambda ops: ops.bulk_create_entities([{"name": "a", "entityType": "Class"}]))
+    assert again["ids"] == [ids["a"]]
+
+def test_bulk_relations_resolve_names_and_skip_duplicates(db_path):
+    run(db_path, lambda ops: ops.bulk_create_entities(
+        [{"name": n, "entityType": "Class"} for n in ("a", "b", "c")]
+    ))
+    relations = [
+        {"from": "a", "to": "b", "relationType": "uses"},
+        {"from": "b", "to": "c", "relationType": "extends"},
+        {"from": "a", "to": "b", "relationType": "uses"},
+    ]
+    first = run(db_path, lambda ops: ops.bulk_create_relations(relations))
+    second = run(db_path, lambda ops: ops.bulk_create_relations(relations[:1]))
+    assert first["ids"][0] == first["ids"][2] == second["ids"][0]
+    assert sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM relations").fetchone()[0] == 2
+
+def test_bulk_statements_stay_within_old_sqlite_variable_limit(db_path, monkeypatch):
+    # SQLite before 3.32 rejects statements binding more than 999 parameters
+    monkeypatch.setattr(operations, "MAX_VARIABLES", 999)
+    entities = [{"name": f"n{i}", "entityType": "Class", "observations": ["x"]} for i in range(700)]
+    relations = [{"from": f"n{i}", "to": f"n{i + 1}", "relationType": "uses"} for i in range(699)]
+    bound = []
+
+    async def operation(ops):
+        event.listen(ops.db.bind.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, parameters, *args: bound.append(len(parameters)))
+        await ops.bulk_create_entities(entities)
+        return await ops.bulk_create_relations(relations)
+
+    result = run(db_path, operation)
+    assert len(set(result["ids"])) == 699
+    assert max(bound) <= 999
+
+def test_bulk_relations_validate_whole_batch_first(db_path):
+    run(db_path, lambda ops: ops.bulk_create_entities([{"name": "a", "entityType": "Class"}]))
+    relations = [
+        {"from": "a", "to": "a", "relationType": "uses"},
+        {"from": "a", "to": "missing", "relationType": "uses"},
+    ]
+    with pytest.raises(HTTPException, match="missing"):
+        run(db_path, lambda ops: ops.bulk_create_relations(relations))
+    assert sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM relations").fetchone()[0] == 0
+
+def test_importer_streams_embedded_graph_and_jsonl(db_path, tmp_path):
+    from mcp.importer import GraphImporter, iter_graph_records
+
+    with open(os.path.join(os.path.dirname(__file__), "..", "knowledge-graph")) as stream:
+        records = list(iter_graph_records(stream))
+    assert records[0][0] == "entity" and records[0][1]["name"] == "Hikvision"
+    assert records[-1][0] == "relation"
+
+    dump = tmp_path / "graph.jsonl"
+    dump.write_text("\n".join(json.dumps(r) for r in [
+        {"type": "entity", "name": "a", "entityType": "Class", "observations": ["x"]},
+        {"type": "entity", "name": "b", "entityType": "Class"},
+        {"type": "relation", "from": "a", "to": "b", "relationType": "uses"},
+        {"type": "relation", "from": "a", "to": "b", "relationType": "unknown"},
+    ]))
+
+    first = run(db_path, lambda ops: GraphImporter(ops, batch_size=1, progress=None).import_file(str(dump)))
+    assert (first.offset, first.entities, first.relations, first.skipped_relations) == (4, 2, 1, 1)
+
+    resumed = run(db_path, lambda ops: GraphImporter(ops, progress=None).import_file(str(dump), offset=3))
+    assert (resumed.offset, resumed.entities, resumed.relations) == (4, 0, 0)
+    assert sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM observations").fetchone()[0] == 1
+
+def test_reimporting_a_batch_does_not_duplicate_observations(db_path, tmp_path):
+    from mcp.importer import GraphImporter
+
+    dump = tmp_path / "graph.jsonl"
+    dump.write_text("\n".join(json.dumps(r) for r in [
+        {"type": "entity", "name": "a", "entityType": "Class", "observations": ["x", "y", "x"]},
+        {"type": "entity", "name": "b", "entityType": "Class", "observations": ["x"]},
+    ]))
+    for _ in range(2):
+        run(db_path, lambda ops: GraphImporter(ops, progress=None).import_file(str(dump)))
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT e.name, o.observation FROM observations o JOIN entities e ON e.id = o.entity_id
+        ORDER BY e.name, o.observation
+    """).fetchall()
+    assert rows == [("a", "x"), ("a", "y"), ("b", "x")]
+
+def test_unique_relations_migration_repoints_dependent_rows(tmp_path):
+    conn = sqlite3.connect(tmp_path / "graph.db")
+    conn.executescript("""
+        CREATE TABLE relations (id INTEGER PRIMARY KEY, from_entity_id INTEGER, relation_type INTEGER, to_entity_id INTEGER);
+        CREATE TABLE observations (id INTEGER PRIMARY KEY, entity_id INTEGER, relation_id INTEGER, observation TEXT);
+        CREATE TABLE semantic_properties_v1 (id INTEGER PRIMARY KEY, relation_id INTEGER, property_key TEXT);
+        INSERT INTO relations VALUES (1, 1, 1, 2), (2, 1, 1, 2), (3, 2, 1, 3);
+        INSERT INTO observations VALUES (1, 1, 2, 'dup'), (2, 2, 3, 'kept');
+        INSERT INTO semantic_properties_v1 VALUES (1, 2, 'weight'), (2, 3, 'weight');
+    """)
+    conn.executescript(open(os.path.join(os.path.dirname(SCHEMA), "migrations", "006_unique_relations.sql")).read())
+    assert conn.execute("SELECT id FROM relations ORDER BY id").fetchall() == [(1,), (3,)]
+    assert conn.execute("SELECT relation_id FROM observations ORDER BY id").fetchall() == [(1,), (3,)]
+    assert conn.execute("SELECT relation_id FROM semantic_properties_v1 ORDER BY id").fetchall() == [(1,), (3,)]
+
+def test_importer_detects_single_line_graph_from_prefix():
+    import io
+    from mcp import importer
+
+    class CountingStream(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return super().read(size)
+
+    entities = [{"name": f"e{i}", "entityType": "Class", "observations": ["x" * 100]} for i in range(2000)]
+    stream = CountingStream(json.dumps({"entities": entities, "relations": []}))
+    records = importer.iter_graph_records(stream)
+    assert next(records) == ("entity", entities[0])
+    # Only the first chunk was read before the first record, not the whole line
+    assert stream.reads == 1 and len(stream.getvalue()) > 2 * importer.CHUNK_SIZE
+    assert sum(1 for _ in records) == 1999
+
+def test_importer_skips_and_counts_malformed_records(db_path, tmp_path):
+    from mcp.importer import GraphImporter
+
+    dump = tmp_path / "graph.jsonl"
+    dump.write_text("\n".join([
+        json.dumps({"type": "entity", "name": "a", "entityType": "Class", "observations": ["x"]}),
+        json.dumps({"type": "entity", "name": "", "entityType": "Class"}),
+        "not json",
+        json.dumps(["a", "list"]),
+        json.dumps({"type": "entity", "name": "b", "entityType": "Class", "observations": "x"}),
+        json.dumps({"type": "entity", "name": "c", "entityType": "Class"}),
+        json.dumps({"type": "relation", "from": "a", "to": "c"}),
+        json.dumps({"type": "relation", "from": "a", "to": "c", "relationType": "uses"}),
+        json.dumps({"type": "relation", "from": "a", "to": "missing", "relationType": "uses"}),
+    ]))
+
+    stats = run(db_path, lambda ops: GraphImporter(ops, progress=None).import_file(str(dump)))
+    assert (stats.offset, stats.entities, stats.observations) == (9, 2, 1)
+    assert (stats.relations, stats.skipped_relations, stats.invalid) == (1, 1, 5)
+    conn = sqlite3.connect(db_path)
+    assert [row[0] for row in conn.execute("SELECT name FROM entities ORDER BY name")] == ["a", "c"]
+
+def collect(records):
+    async def gather(ops):
+        return [record async for record in records(ops)]
+    return gather
+
+def test_read_side_streams_pages_with_grouped_observations(db_path):
+    entities = [{"name": f"e{i}", "entityType": "Class", "observations": [f"obs {i}", "50%_off"]} for i in range(5)]
+    run(db_path, lambda ops: ops.bulk_create_entities(entities))
+    run(db_path, lambda ops: ops.bulk_create_relations([
+        {"from": "e0", "to": "e1", "relationType": "uses"},
+        {"from": "e1", "to": "e4", "relationType": "extends"},
+    ]))
+
+    graph = run(db_path, collect(lambda ops: ops.iter_read_graph(page_size=2)))
+    assert [r["name"] for r in graph if r["type"] == "entity"] == [f"e{i}" for i in range(5)]
+    assert graph[0]["observations"] == ["obs 0", "50%_off"]
+    assert [(r["from"], r["to"], r["relationType"]) for r in graph if r["type"] == "relation"] == [
+        ("e0", "e1", "uses"), ("e1", "e4", "extends")
+    ]
+
+    resumed = run(db_path, collect(lambda ops: ops.iter_read_graph(after_entity_id=graph[3]["id"], page_size=2)))
+    assert [r["name"] for r in resumed if r["type"] == "entity"] == ["e4"]
+
+    opened = run(db_path, collect(lambda ops: ops.iter_open_nodes(["e1", "e0"])))
+    assert [r.get("name", r.get("relationType")) for r in opened] == ["e0", "e1", "uses"]
+
+    found = run(db_path, collect(lambda ops: ops.iter_search_nodes("OBS 4")))
+    assert [r["name"] for r in found] == ["e4"]
+    assert len(run(db_path, collect(lambda ops: ops.iter_search_nodes("0%_")))) == 5 + 2
+
+def test_search_ranks_name_hits_and_filters_by_type(db_path):
+    run(db_path, lambda ops: ops.bulk_create_entities([
+        {"name": "Hikvision", "entityType": "Plugin", "observations": ["Supports cameras and NVRs"]},
+        {"name": "VideoCamera", "entityType": "Interface", "observations": ["Streams video"]},
+        {"name": "Reboot", "entityType": "Interface", "observations": ["Restarts a camera"]},
+    ]))
+
+    results = run(db_path, lambda ops: ops.search("camera"))
+    assert [r["name"] for r in results][0] == "VideoCamera"
+    assert {r["name"] for r in results} == {"VideoCamera", "Hikvision", "Reboot"}
+    hikvision = next(r for r in results if r["name"] == "Hikvision")
+    assert hikvision["snippets"] == ["Supports <b>camera</b>s and NVRs"]
+
+    filtered = run(db_path, lambda ops: ops.search("camera restarts", entity_type="Interface"))
+    assert [r["name"] for r in filtered] == ["Reboot"]
+
+    # Renames and deletes are picked up by the sync triggers
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE entities SET name = 'Restarter' WHERE name = 'Reboot'")
+    conn.execute("DELETE FROM observations WHERE observation = 'Streams video'")
+    conn.commit()
+    assert [r["name"] for r in run(db_path, lambda ops: ops.search("restart"))] == ["Restarter"]
+    assert run(db_path, lambda ops: ops.search("streams")) == []
+
+def test_search_falls_back_to_like_for_short_terms(db_path):
+    run(db_path, lambda ops: ops.bulk_create_entities([
+        {"name": "UserDb", "entityType": "Class", "observations": ["Stores ui settings"]},
+        {"name": "Settings", "entityType": "Class", "observations": ["Read from the db"]},
+        {"name": "Camera", "entityType": "Interface", "observations": ["No storage"]},
+    ]))
+
+    # Name hits rank first; observation hits still match
+    results = run(db_path, lambda ops: ops.search("db"))
+    assert [r["name"] for r in results] == ["UserDb", "Settings"]
+    assert results[0]["score"] > results[1]["score"] and results[0]["snippets"] == []
+    assert [r["name"] for r in run(db_path, lambda ops: ops.search("db ui"))] == ["UserDb"]
+    assert run(db_path, lambda ops: ops.search("db", entity_type="Interface")) == []
+
+    # Mixed queries rank by the long terms and require the short ones too
+    assert [r["name"] for r in run(db_path, lambda ops: ops.search("settings ui"))] == ["UserDb"]
+    assert run(db_path, lambda ops: ops.search("camera db")) == []
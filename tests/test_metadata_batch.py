@@ -0,0 +1,53 @@
+import asyncio
+import datetime
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+def run(tmp_path, engine_module, operation):
+    """Run ``operation(engine, statements)`` on a fresh database; statements logs executed SQL."""
+    async def main():
+        db = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metadata.db'}")
+        statements = []
+        event.listen(db.sync_engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement.lstrip().split()[0]))
+        event.listen(db.sync_engine, 'commit', lambda conn: statements.append('COMMIT'))
+        try:
+            async with db.begin() as conn:
+                await conn.run_sync(engine_module.SemanticMetadata.metadata.create_all)
+            async with AsyncSession(db) as session:
+                engine = engine_module.SemanticEngine()
+                engine.session = session
+                return await operation(engine, statements)
+        finally:
+            await db.dispose()
+    return asyncio.run(main())
+
+def test_enrich_entities_reuses_rows_and_creates_missing_in_one_batch(tmp_path, engine_module, monkeypatch):
+    monkeypatch.setattr(engine_module, 'METADATA_CHUNK_SIZE', 2)
+    SemanticMetadata = engine_module.SemanticMetadata
+    entities = [{'id': entity_id} for entity_id in ['a', 'b', 'c', 'b', 'd', 'e', 'f']]
+
+    async def operation(engine, statements):
+        engine.session.add(SemanticMetadata(entity_id='a', confidence_score=0.9,
+                                            last_updated=datetime.datetime(2024, 1, 1)))
+        await engine.session.commit()
+        statements.clear()
+
+        first = await engine.enrich_entities(entities)
+        created = list(statements)
+        statements.clear()
+        second = await engine.enrich_entities(entities)
+        rows = (await engine.session.execute(select(SemanticMetadata.entity_id))).scalars().all()
+        return first, second, created, list(statements), sorted(rows)
+
+    first, second, created, repeated, rows = run(tmp_path, engine_module, operation)
+
+    assert [e['id'] for e in first] == [e['id'] for e in entities]
+    assert first[0]['semantic']['confidence_score'] == 0.9
+    assert first[0]['semantic']['last_updated'] == '2024-01-01T00:00:00'
+    assert rows == ['a', 'b', 'c', 'd', 'e', 'f']
+    # Five missing ids in chunks of two: three multi-row inserts, one commit
+    assert created.count('INSERT') == 3 and created.count('COMMIT') == 1
+    # Every row exists now, so the repeated call only selects
+    assert 'INSERT' not in repeated and 'COMMIT' not in repeated
+    assert [e['semantic'] for e in second] == [e['semantic'] for e in first]
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from semantic.pattern_mining import FrequentItemsetMiner, PatternLearner, entity_items, stored_value_class
+from semantic.pattern_sql import encode_attribute_value
+from semantic.scoring import PatternMatrix
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+TYPES = {"Document": ["title", "format", "size"], "User": ["name", "email", "role"]}
+
+def synthetic_entities(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        entity_type = rng.choice(sorted(TYPES))
+        attributes = {key: "x" for key in TYPES[entity_type]}
+        attributes["size" if entity_type == "Document" else "role"] = 3 if entity_type == "Document" else "admin"
+        # Rare keys that should never become patterns
+        attributes[f"noise{rng.randrange(1000)}"] = i
+        yield {"id": str(i), "type": entity_type, "attributes": attributes}
+
+def test_miner_finds_type_rules_and_drops_redundant_ones():
+    miner = FrequentItemsetMiner(min_support=0.05, max_size=3)
+    for entity in synthetic_entities(3000):
+        miner.add(entity_items(entity["type"], [(k, type(v).__name__) for k, v in entity["attributes"].items()]))
+
+    rules = {(c.entity_type, c.antecedent): c for c in miner.candidates(min_confidence=0.9)}
+    assert set(rules) == {
+        ("Document", (("attr", "format"),)), ("Document", (("attr", "size"),)), ("Document", (("attr", "title"),)),
+        ("User", (("attr", "email"),)), ("User", (("attr", "name"),)), ("User", (("attr", "role"),)),
+    }
+    assert all(c.confidence == 1.0 for c in rules.values())
+    assert sum(c.support for key, c in rules.items() if key[1] == (("attr", "title"),)) == pytest.approx(
+        sum(1 for e in synthetic_entities(3000) if e["type"] == "Document") / 3000
+    )
+
+def test_miner_memory_stays_bounded_under_noise():
+    miner = FrequentItemsetMiner(min_support=0.05, max_size=3)
+    rng = random.Random(1)
+    sizes = []
+    for i in range(6000):
+        items = [("type", "T")] + [("attr", f"k{rng.randrange(10_000)}") for _ in range(6)]
+        miner.add(items)
+        if i % miner.bucket_width == miner.bucket_width - 1:
+            sizes.append(miner.tracked)
+    assert max(sizes[1:]) < 2 * miner.bucket_width * 7
+    assert miner.candidates() == []
+
+def test_value_classes_of_stored_values():
+    assert stored_value_class("plain text") == "str"
+    assert stored_value_class(encode_attribute_value(3)) == "int"
+    assert stored_value_class(encode_attribute_value([1])) == "list"
+    assert stored_value_class(None) == "NoneType"
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "graph.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(open(os.path.join(ROOT, "schema.sql")).read())
+    conn.executescript("""
+        CREATE TABLE entity_attributes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_id INTEGER NOT NULL,
+            attribute_key TEXT NOT NULL,
+            attribute_value TEXT,
+            UNIQUE(entity_id, attribute_key)
+        );
+        CREATE TABLE semantic_patterns (
+            id VARCHAR NOT NULL PRIMARY KEY,
+            pattern_type VARCHAR,
+            pattern_data JSON,
+            confidence FLOAT,
+            examples JSON,
+            last_applied DATETIME,
+            success_rate FLOAT
+        );
+    """)
+    for entity in synthetic_entities(400):
+        entity_id = conn.execute(
+            "INSERT INTO entities (name, entity_type) VALUES (?, ?)", (f"e{entity['id']}", entity["type"])
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO entity_attributes (entity_id, attribute_key, attribute_value) VALUES (?, ?, ?)",
+            [(entity_id, key, encode_attribute_value(value)) for key, value in entity["attributes"].items()]
+        )
+    conn.commit()
+    conn.close()
+    return path
+
+def learn(db_path, **kwargs):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await PatternLearner(session, page_size=64, **kwargs).learn()
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def test_learner_streams_graph_and_upserts_patterns(db_path):
+    candidates = learn(db_path, min_support=0.05, min_confidence=0.9)
+    assert len(candidates) == 6
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE semantic_patterns SET success_rate = 0.5")
+    conn.execute("UPDATE semantic_patterns SET success_rate = 0.01 WHERE rowid = 1")
+    conn.commit()
+    learn(db_path, min_support=0.05, min_confidence=0.9)
+    rows = conn.execute("SELECT pattern_type, pattern_data, confidence, success_rate FROM semantic_patterns").fetchall()
+    conn.close()
+
+    assert len(rows) == 6
+    assert {row[0] for row in rows} == {"entity_type"}
+    # Relearning updates rows in place, keeps live success history and revives the pruned pattern
+    assert sorted(row[3] for row in rows) == [0.5] * 5 + [1.0]
+    data = [json.loads(row[1]) for row in rows]
+    title = next(d for d in data if d["match_rules"] == [{"type": "attribute_exists", "attribute": "title"}])
+    assert title["type"] == "Document" and title["attribute_patterns"] == {"title": {"required": True, "type": "any"}}
+    assert 0 < title["support"] < 1 and title["confidence"] == 1.0
+
+def test_learned_patterns_match_in_python_sql_and_matrix(db_path, engine_module):
+    # "level" only implies a type through its value class
+    extra = [{"type": "Document", "attributes": {"level": 1}} if i % 2 else {"type": "User", "attributes": {"level": "high"}}
+             for i in range(400)]
+    conn = sqlite3.connect(db_path)
+    for i, entity in enumerate(extra):
+        entity_id = conn.execute("INSERT INTO entities (name, entity_type) VALUES (?, ?)",
+                                 (f"level{i}", entity["type"])).lastrowid
+        conn.execute("INSERT INTO entity_attributes (entity_id, attribute_key, attribute_value) VALUES (?, 'level', ?)",
+                     (entity_id, encode_attribute_value(entity["attributes"]["level"])))
+    conn.commit()
+    learn(db_path, min_support=0.05, min_confidence=0.9)
+    rows = conn.execute("SELECT pattern_data, confidence FROM semantic_patterns").fetchall()
+    conn.close()
+    patterns = [(json.loads(data), confidence) for data, confidence in rows]
+    entities = list(synthetic_entities(400)) + extra
+
+    async def find_all():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                semantic_engine = engine_module.SemanticEngine()
+                semantic_engine.session = session
+                return [await semantic_engine.find_matching_entities(data) for data, _ in patterns]
+        finally:
+            await engine.dispose()
+
+    found = asyncio.run(find_all())
+    matcher = engine_module.SemanticEngine()
+    scores = PatternMatrix([(data["type"], data, confidence) for data, confidence in patterns]).score_matrix(entities)
+    assert {"type": "attribute_type", "attribute": "level", "value_type": "int"} in [
+        rule for data, _ in patterns for rule in data["match_rules"]
+    ]
+    for p, ((data, confidence), ids) in enumerate(zip(patterns, found)):
+        # Entity ids follow insertion order
+        expected = [i + 1 for i, entity in enumerate(entities) if matcher._matches_pattern(entity, data)]
+        assert ids == expected and expected
+        # Every entity satisfying a learned pattern gets its full confidence
+        assert all(scores[i - 1, p] == pytest.approx(confidence) for i in expected)
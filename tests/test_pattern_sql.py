@@ -0,0 +1,107 @@
+import os
+import random
+import sqlite3
+import pytest
+from sqlalchemy import create_engine
+from semantic.pattern_sql import compile_match_rules, encode_attribute_value
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Strings that parse as JSON (e.g. "123") are typed as the JSON value, so none are used here
+VALUES = ["python", "rust", 0, 1, 2, 1.0, 2.5, True, False, None, [1, 2], {"a": 1, "b": 2}]
+
+def matches_pattern(attributes, match_rules):
+    """Reference semantics of SemanticEngine._matches_pattern."""
+    if not match_rules:
+        return False
+    for rule in match_rules:
+        if rule["type"] == "attribute_exists" and rule["attribute"] not in attributes:
+            return False
+        if rule["type"] == "attribute_value" and attributes.get(rule["attribute"]) != rule["value"]:
+            return False
+        if rule["type"] == "attribute_type" and not isinstance(attributes.get(rule["attribute"]), rule["value_type"]):
+            return False
+    return True
+
+@pytest.fixture
+def graph(tmp_path):
+    rng = random.Random(3)
+    path = tmp_path / "graph.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(open(os.path.join(ROOT, "schema.sql")).read())
+    conn.executescript("""
+        CREATE TABLE entity_attributes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_id INTEGER NOT NULL,
+            attribute_key TEXT NOT NULL,
+            attribute_value TEXT,
+            UNIQUE(entity_id, attribute_key)
+        );
+    """)
+    conn.executescript(open(os.path.join(ROOT, "migrations", "009_entity_attribute_index.sql")).read())
+    entities = {}
+    for entity_id in range(1, 201):
+        attributes = {key: rng.choice(VALUES) for key in rng.sample("abcd", rng.randrange(5))}
+        entities[entity_id] = attributes
+        conn.execute("INSERT INTO entities (id, name, entity_type) VALUES (?, ?, 'Class')", (entity_id, f"e{entity_id}"))
+        conn.executemany(
+            "INSERT INTO entity_attributes (entity_id, attribute_key, attribute_value) VALUES (?, ?, ?)",
+            [(entity_id, key, encode_attribute_value(value)) for key, value in attributes.items()]
+        )
+    conn.commit()
+    conn.close()
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine, entities
+    engine.dispose()
+
+def random_rules(rng):
+    rules = []
+    for _ in range(rng.randrange(1, 4)):
+        attribute = rng.choice("abcd")
+        kind = rng.choice(["attribute_exists", "attribute_value", "attribute_type"])
+        if kind == "attribute_exists":
+            rules.append({"type": kind, "attribute": attribute})
+        elif kind == "attribute_value":
+            rules.append({"type": kind, "attribute": attribute, "value": rng.choice(VALUES)})
+        else:
+            rules.append({"type": kind, "attribute": attribute,
+                          "value_type": rng.choice([str, int, float, bool, list, dict, (int, float)])})
+    return rules
+
+@pytest.mark.parametrize("plan", ["auto", "exists", "intersect"])
+def test_compiled_rules_match_python_semantics(graph, plan):
+    engine, entities = graph
+    rng = random.Random(11)
+    with engine.connect() as conn:
+        for _ in range(200):
+            rules = random_rules(rng)
+            expected = sorted(i for i, attributes in entities.items() if matches_pattern(attributes, rules))
+            found = sorted(row[0] for row in conn.execute(compile_match_rules(rules, plan)))
+            assert found == expected, rules
+
+def test_empty_and_unknown_rules(graph):
+    engine, entities = graph
+    assert compile_match_rules([]) is None
+    with engine.connect() as conn:
+        found = conn.execute(compile_match_rules([{"type": "something_else"}])).fetchall()
+    assert len(found) == len(entities)
+    with pytest.raises(ValueError):
+        compile_match_rules([{"type": "attribute_type", "attribute": "a", "value_type": set}])
+
+def test_key_value_lookup_uses_covering_index(graph):
+    engine, _ = graph
+    query = compile_match_rules([{"type": "attribute_value", "attribute": "a", "value": "python"},
+                                 {"type": "attribute_exists", "attribute": "b"}], plan="intersect")
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + str(query.compile(compile_kwargs={"literal_binds": True}))
+        ).fetchall()
+    assert all("COVERING INDEX idx_entity_attributes_key_value" in row[-1] for row in plan if "entity_attributes" in row[-1])
+
+def test_auto_plan_intersects_only_selective_rules():
+    equality = {"type": "attribute_value", "attribute": "a", "value": "python"}
+    typed = {"type": "attribute_type", "attribute": "b", "value_type": "int"}
+    assert "INTERSECT" in str(compile_match_rules([equality, typed]))
+    assert "INTERSECT" not in str(compile_match_rules([equality]))
+    assert "INTERSECT" not in str(compile_match_rules([equality, {"type": "attribute_exists", "attribute": "b"}]))
+    assert "INTERSECT" not in str(compile_match_rules([typed, {"type": "attribute_value", "attribute": "c", "value": None}]))
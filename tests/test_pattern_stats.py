@@ -0,0 +1,147 @@
+import asyncio
+import sqlite3
+import numpy as np
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from semantic.pattern_stats import PatternStats
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "patterns.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE semantic_patterns (
+            id VARCHAR NOT NULL PRIMARY KEY,
+            pattern_type VARCHAR,
+            pattern_data JSON,
+            confidence FLOAT,
+            examples JSON,
+            last_applied DATETIME,
+            success_rate FLOAT
+        );
+        INSERT INTO semantic_patterns (id, pattern_type, success_rate) VALUES
+            ('live', 'entity_type', 1.0), ('dead', 'entity_type', 1.0), ('new', 'entity_type', NULL);
+    """)
+    conn.close()
+    return path
+
+def flush(db_path, stats):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await stats.flush(session)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def rates(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = dict(conn.execute("SELECT id, success_rate FROM semantic_patterns"))
+    applied = dict(conn.execute("SELECT id, last_applied FROM semantic_patterns"))
+    conn.close()
+    return rows, applied
+
+def test_batched_flush_decays_success_rate(db_path):
+    stats = PatternStats(half_life=100)
+    for _ in range(100):
+        stats.record("live", 1)
+        stats.record("dead", 0)
+    stats.record("new", 0, observations=100)
+    assert stats.pending == 300
+
+    assert flush(db_path, stats) == 3
+    assert stats.pending == 0
+    rows, applied = rates(db_path)
+    # One half-life of misses halves the rate; hits keep it at 1
+    assert rows == {"live": pytest.approx(1.0), "dead": pytest.approx(0.5), "new": pytest.approx(0.5)}
+    assert applied["live"] is not None and applied["dead"] is None
+
+    stats.record("dead", 0, observations=400)
+    flush(db_path, stats)
+    rows, _ = rates(db_path)
+    assert rows["dead"] == pytest.approx(0.5 * 0.5 ** 4)
+    assert rows["dead"] < stats.prune_below
+    assert flush(db_path, stats) == 0
+
+def test_flush_is_due_by_count_or_interval():
+    stats = PatternStats(flush_every=10, flush_interval=3600)
+    assert not stats.due()
+    stats.record("p", 1, observations=9)
+    assert not stats.due()
+    stats.record("p", 0)
+    assert stats.due()
+
+    stats = PatternStats(flush_every=10, flush_interval=0)
+    stats.record("p", 1)
+    assert stats.due()
+
+def test_failed_flush_keeps_counts():
+    class Broken:
+        async def execute(self, *args):
+            raise RuntimeError("database is locked")
+
+    stats = PatternStats()
+    stats.record("p", 3, observations=5)
+    with pytest.raises(RuntimeError):
+        asyncio.run(stats.flush(Broken()))
+    assert stats.pending == 5
+
+def test_predictions_count_against_the_entity_type():
+    stats = PatternStats()
+    scores = np.array([
+        [0.9, 0.0],   # Document, only the Document pattern fires
+        [0.0, 0.8],   # User
+        [0.5, 0.7],   # User, the Document pattern misfires
+        [0.4, 0.0],   # untyped, not an observation
+    ])
+    stats.record_predictions(["doc", "user"], ["Document", "User"], scores, ["Document", "User", "User", None])
+    assert stats._pending == {"doc": [1, 2], "user": [2, 2]}
+
+    # A rare type that fires only on its own entities is never penalised
+    rare = np.zeros((100, 1))
+    rare[:3] = 1.0
+    stats = PatternStats()
+    stats.record_predictions(["rare"], ["Rare"], rare, ["Rare"] * 3 + ["Common"] * 97)
+    assert stats._pending == {"rare": [3, 3]}
+
+def test_maybe_flush_leaves_the_callers_transaction_alone(db_path):
+    stats = PatternStats(flush_every=1)
+    stats.record("dead", 0, observations=200)
+
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                await session.execute(text("SELECT COUNT(*) FROM semantic_patterns"))
+                assert await stats.maybe_flush(session) == 1
+                # The caller's transaction was neither committed nor closed
+                assert session.in_transaction()
+                await session.rollback()
+        finally:
+            await engine.dispose()
+    asyncio.run(main())
+
+    rows, _ = rates(db_path)
+    assert rows["dead"] == pytest.approx(0.5)
+
+def test_pruned_patterns_are_listed_but_not_scored(db_path, engine_module):
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE semantic_patterns SET success_rate = 0.01 WHERE id = 'dead'")
+    conn.commit()
+    conn.close()
+
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                semantic_engine = engine_module.SemanticEngine()
+                semantic_engine.session = session
+                listed = await semantic_engine._get_patterns('entity_type')
+                active = await semantic_engine._get_patterns('entity_type', active_only=True)
+                return sorted(p['id'] for p in listed), sorted(p['id'] for p in active)
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(main()) == (['dead', 'live', 'new'], ['live', 'new'])
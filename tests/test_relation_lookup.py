@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sqlite3
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from semantic.hierarchy import TypeHierarchy
+from semantic.relation_lookup import RelationLookup
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "types.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE entity_type_hierarchy (parent_type TEXT NOT NULL, child_type TEXT NOT NULL);
+        CREATE TABLE relation_types (id INTEGER PRIMARY KEY AUTOINCREMENT, relation_name TEXT NOT NULL UNIQUE);
+        CREATE TABLE valid_type_relations (from_type TEXT NOT NULL, relation_type INTEGER NOT NULL, to_type TEXT NOT NULL);
+    """)
+    for migration in ("002_semantic_table_versions.sql", "003_relation_table_versions.sql"):
+        conn.executescript(open(os.path.join(ROOT, "migrations", migration)).read())
+    conn.executescript("""
+        INSERT INTO entity_type_hierarchy VALUES ('Component', 'Service'), ('Interface', 'Protocol');
+        INSERT INTO relation_types (relation_name) VALUES ('uses'), ('extends');
+        INSERT INTO valid_type_relations VALUES ('Component', 1, 'Interface');
+    """)
+    conn.commit()
+    conn.close()
+    return path
+
+def execute(db_path, script):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(script)
+    conn.commit()
+    conn.close()
+
+def refresh(db_path, lookup):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await lookup.refresh(session)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def test_relations_are_inherited_by_subtypes(db_path):
+    lookup = refresh(db_path, RelationLookup(TypeHierarchy()))
+    assert lookup.is_valid("Component", "uses", "Interface")
+    assert lookup.is_valid("Service", "uses", "Protocol")
+    assert lookup.is_valid("Service", 1, "Interface")
+    # Validity is not inherited upwards, reversed or across relation types
+    assert not lookup.is_valid("Component", "uses", "Thing")
+    assert not lookup.is_valid("Interface", "uses", "Component")
+    assert not lookup.is_valid("Service", "extends", "Protocol")
+
+def test_reloads_when_a_table_version_changes(db_path):
+    lookup = refresh(db_path, RelationLookup(TypeHierarchy()))
+    valid = lookup._valid
+    refresh(db_path, lookup)
+    assert lookup._valid is valid
+
+    execute(db_path, "INSERT INTO entity_type_hierarchy VALUES ('Service', 'ApiService')")
+    refresh(db_path, lookup)
+    assert lookup.is_valid("ApiService", "uses", "Protocol")
+
+    execute(db_path, """
+        INSERT INTO relation_types (relation_name) VALUES ('implements');
+        INSERT INTO valid_type_relations VALUES ('Service', 3, 'Interface');
+    """)
+    refresh(db_path, lookup)
+    assert lookup.is_valid("ApiService", "implements", "Protocol")
+
+    execute(db_path, "DELETE FROM valid_type_relations WHERE relation_type = 1")
+    refresh(db_path, lookup)
+    assert not lookup.is_valid("Service", "uses", "Interface")
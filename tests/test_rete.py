@@ -0,0 +1,58 @@
+import random
+from semantic.rete import RuleNetwork, check_context_constraint, check_property_constraint
+
+RULES = [
+    {'id': 1, 'pattern': {'type': 'Pattern'}},
+    {'id': 2, 'pattern': {'type': 'Pattern', 'properties': {'status': 'active'}}},
+    {'id': 3, 'pattern': {'properties': {'score': {'operator': '>', 'value': 5}}}},
+    {'id': 4, 'pattern': {'type': 'Pattern', 'context': {'project': 'core'}}},
+    {'id': 5, 'pattern': {'properties': {'tags': {'operator': 'contains', 'value': 'x'},
+                                         'status': {'operator': 'in', 'value': ['active', 'draft']}}}},
+    {'id': 6, 'pattern': {}},
+]
+
+def matches(entity, pattern, context):
+    """Reference check of one pattern, evaluated test by test."""
+    if 'type' in pattern and pattern['type'] != entity.get('entity_type'):
+        return False
+    for prop, constraint in pattern.get('properties', {}).items():
+        if not check_property_constraint(entity, prop, constraint):
+            return False
+    if context:
+        for ctx_key, ctx_pattern in pattern.get('context', {}).items():
+            if not check_context_constraint(context, ctx_key, ctx_pattern):
+                return False
+    return True
+
+def expected(entity, context):
+    return [r['id'] for r in RULES if matches(entity, r['pattern'], context)]
+
+def random_entity(rng):
+    return {
+        'id': 1,
+        'entity_type': rng.choice(['Pattern', 'Component']),
+        'status': rng.choice(['active', 'draft', 'retired']),
+        'score': rng.choice([1, 5, 9]),
+        'tags': rng.choice([['x'], ['y'], []]),
+    }
+
+def test_match_agrees_with_pattern_checks():
+    network = RuleNetwork(RULES)
+    rng = random.Random(7)
+    for _ in range(200):
+        entity = random_entity(rng)
+        context = rng.choice([None, {}, {'project': 'core'}, {'project': 'other'}])
+        assert [r['id'] for r in network.match(entity, context)] == expected(entity, context)
+
+def test_update_agrees_with_match_across_changes():
+    network = RuleNetwork(RULES)
+    rng = random.Random(11)
+    for _ in range(200):
+        entity = random_entity(rng)
+        context = rng.choice([None, {'project': 'core'}, {'project': 'other'}])
+        assert [r['id'] for r in network.update(1, entity, context)] == expected(entity, context)
+
+def test_tests_are_shared_between_rules():
+    network = RuleNetwork(RULES)
+    # type, status==active, score>5, project==core, tags contains, status in
+    assert network.test_count == 6
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import os
+import sqlite3
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from semantic.rule_registry import RuleRegistry
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "rules.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE semantic_rules_v1 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rule_name TEXT NOT NULL,
+            pattern TEXT NOT NULL,
+            actions TEXT NOT NULL,
+            priority INTEGER DEFAULT 0,
+            context TEXT,
+            version INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE semantic_table_versions (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0);
+    """)
+    conn.executescript(open(os.path.join(ROOT, "migrations", "004_semantic_rule_versions.sql")).read())
+    conn.commit()
+    conn.close()
+    return path
+
+def add_rule(db_path, name, pattern, priority=0, version=1):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO semantic_rules_v1 (rule_name, pattern, actions, priority, version) VALUES (?, ?, '[]', ?, ?)",
+                 (name, json.dumps(pattern), priority, version))
+    conn.commit()
+    conn.close()
+
+def refresh(db_path, registry):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                return await registry.refresh(session)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def names(rules):
+    return [rule['rule_name'] for rule in rules]
+
+def test_buckets_are_sorted_by_priority(db_path):
+    add_rule(db_path, "low", {"target_type": "Pattern"}, priority=1)
+    add_rule(db_path, "high", {"target_type": "Pattern", "type": "uses"}, priority=9)
+    add_rule(db_path, "component", {"target_type": "Component"}, priority=5)
+    add_rule(db_path, "tie", {"target_type": "Component", "type": "uses"}, priority=5)
+    registry = refresh(db_path, RuleRegistry())
+
+    assert names(registry.for_target_type("Pattern")) == ["high", "low"]
+    assert names(registry.for_relation_type("uses")) == ["high", "tie"]
+    # Buckets merge by priority, ties by rule id
+    assert names(registry.for_target_types(["Pattern", "Component"])) == ["high", "component", "tie", "low"]
+    assert registry.for_target_type("Unknown") == []
+
+def test_reloads_only_when_the_rule_table_changes(db_path):
+    add_rule(db_path, "rule", {"target_type": "Pattern"}, priority=1)
+    registry = refresh(db_path, RuleRegistry())
+    rules, version = registry.rules, registry.version
+
+    refresh(db_path, registry)
+    assert registry.rules is rules and registry.version == version
+
+    # A new version of the rule replaces the old one
+    add_rule(db_path, "rule", {"target_type": "Component"}, priority=1, version=2)
+    refresh(db_path, registry)
+    assert registry.version == version + 1
+    assert names(registry.for_target_type("Component")) == ["rule"]
+    assert registry.for_target_type("Pattern") == []
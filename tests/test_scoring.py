@@ -0,0 +1,40 @@
+import os
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from semantic.scoring import PatternMatrix
+from semantic_core import SemanticCore
+
+@pytest.fixture
+def core(tmp_path):
+    return SemanticCore(str(tmp_path / "semantic.db"))
+
+@pytest.fixture
+def entities():
+    rng = random.Random(7)
+    titles = ["Project Report", "notes", "Specification DOC", 42]
+    formats = ["pdf", "docx", "txt", None]
+    emails = ["a@b.co", "not-an-email", 3]
+    result = []
+    for i in range(200):
+        attrs = {}
+        for name, choices in (("title", titles), ("format", formats), ("name", ["x"]), ("email", emails)):
+            if rng.random() < 0.6:
+                attrs[name] = rng.choice(choices)
+        result.append({"id": f"e{i}", "attributes": attrs})
+    return result
+
+def test_matrix_matches_scalar_scores(core, entities):
+    rows = core.conn.execute("SELECT type, pattern_data, confidence FROM patterns").fetchall()
+    matrix = PatternMatrix(rows)
+    pattern_set = core.get_pattern_set()
+    
+    vectorized = matrix.score(entities)
+    for entity, scores in zip(entities, vectorized):
+        expected = core._score_entity(entity, pattern_set)
+        assert scores.keys() == expected.keys()
+        for pattern_type, score in expected.items():
+            assert scores[pattern_type] == pytest.approx(score)
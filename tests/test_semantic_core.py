@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import sqlite3
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from semantic_core import SemanticCore
+from write_behind import WriteBehindBuffer
+
+@pytest.fixture
+def core(tmp_path):
+    return SemanticCore(str(tmp_path / "semantic.db"))
+
+@pytest.fixture
+def document_entity():
+    return {
+        "id": "doc1",
+        "attributes": {
+            "title": "Project Specification Document",
+            "format": "pdf"
+        }
+    }
+
+def test_pattern_set_is_reused(core, document_entity):
+    first = core.get_pattern_set()
+    core.infer_types(document_entity)
+    assert core.get_pattern_set() is first
+    assert len(first) == 2
+
+def test_pattern_set_reloads_on_change(core):
+    first = core.get_pattern_set()
+    core.conn.execute(
+        "INSERT INTO patterns (id, type, pattern_data, confidence) VALUES (?, ?, ?, ?)",
+        ("tag_pattern", "Tag", json.dumps({"attribute_patterns": {"label": {"type": "string", "required": True}}}), 0.5)
+    )
+    core.conn.commit()
+    second = core.get_pattern_set()
+    assert second is not first
+    assert core.infer_types({"attributes": {"label": "x"}}) == {"Tag": 0.5}
+
+def test_keywords_are_case_insensitive(core):
+    core.conn.execute(
+        "UPDATE patterns SET pattern_data = ? WHERE id = 'document_pattern'",
+        (json.dumps({"attribute_patterns": {"title": {"type": "string", "required": True, "keywords": ["Report"]}}}),)
+    )
+    core.conn.commit()
+    scores = core.infer_types({"attributes": {"title": "quarterly report"}})
+    assert scores["Document"] == pytest.approx(0.8)
+
+def test_user_inference(core):
+    scores = core.infer_types({"attributes": {"name": "John Smith", "email": "john@example.com"}})
+    assert scores == {"User": pytest.approx(0.9)}
+
+def test_batch_matches_single_inference(core, document_entity):
+    entities = [document_entity, {"id": "user1", "attributes": {"name": "A", "email": "a@b.co"}}]
+    batch = core.infer_types_batch(entities)
+    assert batch == [core.infer_types(e) for e in entities]
+    rows = core.conn.execute("SELECT entity_id FROM semantic_metadata ORDER BY entity_id").fetchall()
+    assert [r[0] for r in rows] == ["doc1", "user1"]
+
+def test_candidates_require_all_required_attributes(core):
+    pattern_set = core.get_pattern_set()
+    assert [p.type for p in pattern_set.candidates({"name": "A"})] == []
+    assert [p.type for p in pattern_set.candidates({"name": "A", "email": "a@b.co"})] == ["User"]
+    assert [p.type for p in pattern_set.candidates({"title": "t", "name": "A", "email": "e"})] == ["Document", "User"]
+
+def test_write_behind_coalesces_and_flushes_on_close(tmp_path, document_entity):
+    db_path = str(tmp_path / "semantic.db")
+    core = SemanticCore(db_path, write_behind=True, write_behind_options={"flush_interval": 60})
+    core.infer_types(document_entity)
+    core.infer_types({"id": "doc1", "attributes": {"name": "A", "email": "a@b.co"}})
+    assert core._write_buffer.pending() == 1
+    core.close()
+    
+    reader = SemanticCore(db_path)
+    rows = reader.conn.execute("SELECT entity_id, inferred_types FROM semantic_metadata").fetchall()
+    assert [(r[0], json.loads(r[1])) for r in rows] == [("doc1", {"User": pytest.approx(0.9)})]
+
+def test_write_behind_retries_failed_flushes():
+    written, calls = {}, []
+    
+    def flaky_flush(items):
+        calls.append(dict(items))
+        if len(calls) == 1:
+            # A newer write arriving while the batch is out replaces the retried value
+            buffer.put("a", 2)
+        if len(calls) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        written.update(items)
+    
+    buffer = WriteBehindBuffer(flaky_flush, flush_interval=60, retry_backoff=0.01)
+    buffer.put_many([("a", 1), ("b", 1)])
+    buffer.flush()
+    assert written == {"a": 2, "b": 1} and len(calls) == 3
+    buffer.close()
+
+def test_write_behind_surfaces_dropped_batches():
+    calls = []
+    
+    def failing_flush(items):
+        calls.append(items)
+        raise sqlite3.OperationalError("disk I/O error")
+    
+    buffer = WriteBehindBuffer(failing_flush, flush_interval=60, max_retries=2, retry_backoff=0.01)
+    buffer.put("a", 1)
+    with pytest.raises(sqlite3.OperationalError, match="disk I/O error"):
+        buffer.flush()
+    assert len(calls) == 3 and buffer.pending() == 0
+    # The error is reported once
+    buffer.flush()
+    buffer.put("b", 1)
+    with pytest.raises(sqlite3.OperationalError):
+        buffer.close()
+
+def test_concurrent_inference_from_worker_threads(core):
+    from concurrent.futures import ThreadPoolExecutor
+    entities = [{"id": f"u{i}", "attributes": {"name": "A", "email": "a@b.co"}} for i in range(50)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(core.infer_types, entities))
+    assert all(r == {"User": pytest.approx(0.9)} for r in results)
+    assert core.conn.execute("SELECT COUNT(*) FROM semantic_metadata").fetchone()[0] == 50
+
+def test_inference_cache_hits_and_invalidates_on_pattern_change(tmp_path):
+    db_path = str(tmp_path / "semantic.db")
+    assert SemanticCore(db_path).cache is None
+    core = SemanticCore(db_path, cache_size=10)
+    entity = {"id": "u1", "attributes": {"email": "a@b.co", "name": "A"}}
+    first = core.infer_types(entity)
+    second = core.infer_types({"id": "u2", "attributes": {"name": "A", "email": "a@b.co"}})
+    assert first == second
+    assert core.cache.stats()["hits"] == 1
+    
+    # A write from another connection invalidates the cached scores too
+    other = sqlite3.connect(db_path)
+    other.execute("UPDATE patterns SET confidence = 0.5 WHERE id = 'user_pattern'")
+    other.commit()
+    other.close()
+    assert core.infer_types(entity) == {"User": pytest.approx(0.5)}
+    assert core.cache.stats()["misses"] == 2
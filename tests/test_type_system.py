@@ -0,0 +1,36 @@
+import asyncio
+import json
+import pytest
+from semantic.type_system import TypeSystem
+
+@pytest.fixture
+def type_system():
+    system = TypeSystem()
+    system.type_hierarchies = {
+        "Class": {"hierarchy": ["Class", "Object"], "attributes": {"name": "string"}},
+        "Interface": {"hierarchy": ["Interface"]},
+    }
+    return system
+
+def test_enhance_entities_adds_info_per_type(type_system):
+    entities = [{"name": f"e{i}", "type": ["Class", "Interface", "Unknown"][i % 3]} for i in range(9)]
+    entities.append({"name": "untyped"})
+    asyncio.run(type_system.enhance_entities(entities))
+
+    classes = [e for e in entities if e.get("type") == "Class"]
+    assert all(e["semantic"] == {"type_hierarchy": ["Class", "Object"], "attributes": {"name": "string"}}
+               for e in classes)
+    assert "semantic" not in entities[2] and "semantic" not in entities[-1]
+    # Enhanced entities go straight into API responses
+    assert json.loads(json.dumps(entities))[0]["semantic"]["type_hierarchy"] == ["Class", "Object"]
+
+def test_entities_do_not_share_info(type_system):
+    first, second = [{"name": "a", "type": "Class"}, {"name": "b", "type": "Class"}], [{"name": "c", "type": "Class"}]
+    asyncio.run(type_system.enhance_entities(first))
+    asyncio.run(type_system.enhance_entities(second))
+    first[0]["semantic"]["type_hierarchy"].append("Mutated")
+    first[0]["semantic"]["attributes"]["extra"] = "string"
+    assert first[1]["semantic"] == second[0]["semantic"] == {
+        "type_hierarchy": ["Class", "Object"], "attributes": {"name": "string"}
+    }
+    assert type_system.type_hierarchies["Class"]["hierarchy"] == ["Class", "Object"]
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import sqlite3
+import time
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from semantic.hierarchy import TypeHierarchy
+from semantic.validation import SemanticValidator
+
+class Lookup:
+    """Stands in for RelationLookup; ``delay`` holds up the refresh."""
+
+    def __init__(self, valid, delay=0.0):
+        self.valid = valid
+        self.delay = delay
+        self.refreshes = 0
+
+    async def refresh(self, db):
+        self.refreshes += 1
+        await asyncio.sleep(self.delay)
+        return self
+
+    def is_valid(self, from_type, relation_type, to_type):
+        return (from_type, relation_type, to_type) in self.valid
+
+class Rules:
+    """Stands in for RuleRegistry with rules that match but take no action."""
+
+    def __init__(self):
+        self.refreshes = 0
+
+    async def refresh(self, db):
+        self.refreshes += 1
+        return self
+
+    def for_relation_type(self, relation_type):
+        return [{"pattern": {"type": relation_type}, "actions": []}]
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "graph.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE relation_types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            relation_name TEXT NOT NULL UNIQUE,
+            validation_rules TEXT
+        );
+    """)
+    conn.executemany("INSERT INTO relation_types (relation_name, validation_rules) VALUES (?, ?)",
+                     [("uses", json.dumps([{"type": "none", "description": "no-op"}])), ("extends", None)])
+    conn.commit()
+    conn.close()
+    return path
+
+def validate(db_path, operation, lookup, rules=None):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine) as session:
+                validator = SemanticValidator(session, hierarchy=TypeHierarchy(), relations=lookup,
+                                              rules=rules or Rules())
+                return await operation(validator)
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+def entity(entity_type):
+    return {"entity_type": entity_type}
+
+def test_violations_follow_check_order_not_completion_order(db_path):
+    # The type hierarchy check finishes last but its violation is still listed first
+    lookup = Lookup(valid=set(), delay=0.05)
+    result = validate(db_path, lambda v: v.validate_relation(entity("Class"), entity("Thing"), "uses"), lookup)
+    assert not result.is_valid
+    assert result.violations[0] == "Invalid type hierarchy: Class -> uses -> Thing"
+    assert [v.split(":")[0] for v in result.violations[1:]] == ["Missing required context"] * 3
+
+def test_fail_fast_cancels_remaining_checks(db_path):
+    cancelled = []
+
+    async def hard_violation():
+        return False, ["Invalid type hierarchy: A -> uses -> B"]
+
+    async def slow_context():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("context")
+            raise
+        return True, [], 1.0
+
+    async def run_checks(validator):
+        checks = {"type_hierarchy": hard_violation(), "context": slow_context()}
+        results = await validator._run_checks(checks, fail_fast=True)
+        return results, validator._combine_results(results, {})
+
+    started = time.monotonic()
+    results, combined = validate(db_path, run_checks, Lookup(valid=set()))
+    assert time.monotonic() - started < 5
+    assert set(results) == {"type_hierarchy"} and cancelled == ["context"]
+    # A relation whose checks were cut short is never reported valid
+    assert not combined.is_valid and combined.violations == ["Invalid type hierarchy: A -> uses -> B"]
+
+def test_validate_relations_loads_once_and_keeps_input_order(db_path):
+    lookup = Lookup(valid={("Class", "extends", "BaseClass"), ("Impl", "uses", "Protocol")})
+    rules = Rules()
+    relations = [
+        (entity("Class"), entity("BaseClass"), "extends"),
+        (entity("Class"), entity("Protocol"), "uses"),
+        (entity("Impl"), entity("Protocol"), "uses"),
+    ]
+    results = validate(db_path, lambda v: v.validate_relations(relations), lookup, rules)
+
+    assert lookup.refreshes == 1 and rules.refreshes == 1
+    hierarchy_violations = [[v for v in r.violations if v.startswith("Invalid type")] for r in results]
+    assert hierarchy_violations == [[], ["Invalid type hierarchy: Class -> uses -> Protocol"], []]